@@ -0,0 +1,37 @@
+"""add queue lease columns to transcription jobs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_job_queue"
+down_revision = "0001_initial"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("lease_owner", sa.String(length=128), nullable=True),
+    )
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("lease_expires_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index(
+        "ix_transcription_job_status_created",
+        "transcriptionjob",
+        ["status", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transcription_job_status_created", table_name="transcriptionjob")
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("attempts")
+        batch_op.drop_column("lease_expires_at")
+        batch_op.drop_column("lease_owner")
@@ -0,0 +1,26 @@
+"""add priority and start time to transcription jobs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_job_scheduling"
+down_revision = "0002_job_queue"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("priority", sa.Integer(), nullable=False, server_default="1"),
+    )
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("started_at")
+        batch_op.drop_column("priority")
@@ -0,0 +1,21 @@
+"""store provider transcript id on transcription jobs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_provider_job_id"
+down_revision = "0003_job_scheduling"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("provider_job_id", sa.String(length=64), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("provider_job_id")
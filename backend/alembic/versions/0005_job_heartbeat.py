@@ -0,0 +1,21 @@
+"""add heartbeat timestamp to transcription jobs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005_job_heartbeat"
+down_revision = "0004_provider_job_id"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("heartbeat_at")
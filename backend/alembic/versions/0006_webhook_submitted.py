@@ -0,0 +1,29 @@
+"""add submitted job status and provider id lookup index"""
+
+from alembic import op
+from sqlalchemy import text
+
+revision = "0006_webhook_submitted"
+down_revision = "0005_job_heartbeat"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block.
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE transcription_status ADD VALUE IF NOT EXISTS 'submitted'")
+    op.create_index(
+        "ix_transcription_job_provider_job_id",
+        "transcriptionjob",
+        ["provider_job_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transcription_job_provider_job_id", table_name="transcriptionjob")
+    # PostgreSQL cannot drop an enum value; hand submitted jobs back to the pollers.
+    op.get_bind().execute(
+        text("UPDATE transcriptionjob SET status = 'pending' WHERE status = 'submitted'")
+    )
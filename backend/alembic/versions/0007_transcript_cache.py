@@ -0,0 +1,40 @@
+"""add content hash to jobs and the transcript cache table"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007_transcript_cache"
+down_revision = "0006_webhook_submitted"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "transcriptionjob",
+        sa.Column("content_hash", sa.String(length=128), nullable=True),
+    )
+    op.create_table(
+        "cachedtranscript",
+        sa.Column("id", sa.String(length=36), primary_key=True, nullable=False),
+        sa.Column("content_hash", sa.String(length=128), nullable=False),
+        sa.Column("language", sa.String(length=16), nullable=False),
+        sa.Column("mode", sa.String(length=16), nullable=False),
+        sa.Column("backend", sa.String(length=32), nullable=False),
+        sa.Column("plain_text", sa.Text(), nullable=False),
+        sa.Column("diarized_json", sa.Text(), nullable=True),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint(
+            "content_hash", "language", "mode", "backend", name="uq_cached_transcript_key"
+        ),
+    )
+    op.create_index("ix_cached_transcript_last_used", "cachedtranscript", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cached_transcript_last_used", table_name="cachedtranscript")
+    op.drop_table("cachedtranscript")
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("content_hash")
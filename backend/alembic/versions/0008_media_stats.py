@@ -0,0 +1,30 @@
+"""record media size and duration on transcription jobs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008_media_stats"
+down_revision = "0007_transcript_cache"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("transcriptionjob", sa.Column("source_bytes", sa.BigInteger(), nullable=True))
+    op.add_column(
+        "transcriptionjob", sa.Column("processed_bytes", sa.BigInteger(), nullable=True)
+    )
+    op.add_column(
+        "transcriptionjob", sa.Column("audio_duration_seconds", sa.Float(), nullable=True)
+    )
+    op.add_column(
+        "transcriptionjob", sa.Column("audio_offset_seconds", sa.Float(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("audio_offset_seconds")
+        batch_op.drop_column("audio_duration_seconds")
+        batch_op.drop_column("processed_bytes")
+        batch_op.drop_column("source_bytes")
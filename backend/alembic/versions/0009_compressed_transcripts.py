@@ -0,0 +1,63 @@
+"""store transcript text as (gzip-compressed) bytes"""
+
+import gzip
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+revision = "0009_compressed_transcripts"
+down_revision = "0008_media_stats"
+branch_labels = None
+depends_on = None
+
+_COLUMNS = {
+    "transcript": ("job_id", ("plain_text", "diarized_json")),
+    "cachedtranscript": ("id", ("plain_text", "diarized_json")),
+}
+
+
+def upgrade() -> None:
+    # Existing rows keep their plain UTF-8 bytes; the column type reads both forms.
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for table, (_, columns) in _COLUMNS.items():
+        if postgres:
+            for column in columns:
+                op.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea "
+                    f"USING convert_to({column}, 'UTF8')"
+                )
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                for column in columns:
+                    batch_op.alter_column(column, type_=sa.LargeBinary(), existing_type=sa.Text())
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+    for table, (key, columns) in _COLUMNS.items():
+        for column in columns:
+            rows = bind.execute(
+                text(f"SELECT {key}, {column} FROM {table} WHERE {column} IS NOT NULL")
+            ).all()
+            for row_id, value in rows:
+                if isinstance(value, str):
+                    continue
+                data = bytes(value)
+                if data.startswith(b"\x1f\x8b"):
+                    data = gzip.decompress(data)
+                bind.execute(
+                    text(f"UPDATE {table} SET {column} = :value WHERE {key} = :id"),
+                    {"value": data if postgres else data.decode("utf-8"), "id": row_id},
+                )
+        if postgres:
+            for column in columns:
+                op.execute(
+                    f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text "
+                    f"USING convert_from({column}, 'UTF8')"
+                )
+        else:
+            with op.batch_alter_table(table) as batch_op:
+                for column in columns:
+                    batch_op.alter_column(column, type_=sa.Text(), existing_type=sa.LargeBinary())
@@ -0,0 +1,31 @@
+"""add awaiting_upload job status"""
+
+from alembic import op
+from sqlalchemy import text
+
+revision = "0010_awaiting_upload"
+down_revision = "0009_compressed_transcripts"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        # ALTER TYPE ... ADD VALUE cannot run inside a transaction block.
+        with op.get_context().autocommit_block():
+            op.execute(
+                "ALTER TYPE transcription_status ADD VALUE IF NOT EXISTS 'awaiting_upload'"
+            )
+    op.create_index(
+        "ix_transcription_job_source_object_key",
+        "transcriptionjob",
+        ["source_object_key"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transcription_job_source_object_key", table_name="transcriptionjob")
+    # PostgreSQL cannot drop an enum value; jobs still waiting for an upload are dropped.
+    op.get_bind().execute(
+        text("DELETE FROM transcriptionjob WHERE status = 'awaiting_upload'")
+    )
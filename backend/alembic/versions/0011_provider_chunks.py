@@ -0,0 +1,18 @@
+"""store per-chunk provider transcript ids on transcription jobs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011_provider_chunks"
+down_revision = "0010_awaiting_upload"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("transcriptionjob", sa.Column("provider_chunks", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("transcriptionjob") as batch_op:
+        batch_op.drop_column("provider_chunks")
@@ -0,0 +1,21 @@
+"""index pending jobs by user in scheduling order"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0012_queue_head_index"
+down_revision = "0011_provider_chunks"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_transcription_job_queue_head",
+        "transcriptionjob",
+        ["status", "user_id", sa.text("priority DESC"), "created_at", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_transcription_job_queue_head", table_name="transcriptionjob")
@@ -0,0 +1,16 @@
+from fastapi import HTTPException, status
+
+from app.services.admission import QueueFullError
+
+
+def queue_full_exception(exc: QueueFullError) -> HTTPException:
+    """429 for a user over their own limit, 503 when the whole queue is saturated."""
+    return HTTPException(
+        status_code=(
+            status.HTTP_429_TOO_MANY_REQUESTS
+            if exc.per_user
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
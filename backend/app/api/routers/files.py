@@ -1,12 +1,44 @@
-from urllib.parse import unquote
+import asyncio
+import gzip
+import hmac
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from urllib.parse import quote, unquote, unquote_plus
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import accepts_gzip, get_current_user, get_db
+from app.api.errors import queue_full_exception
+from app.core.config import get_settings
 from app.models import User
-from app.schemas import PresignRequest, PresignResponse
-from app.services.storage import LocalStorageService, get_storage_service
+from app.schemas import (
+    PresignBatchRequest,
+    PresignRequest,
+    PresignResponse,
+    S3EventNotification,
+    TranscriptionJobCreate,
+    UploadComplete,
+    UploadedPartRead,
+    UploadPartsRequest,
+    UploadPartUrl,
+    UploadSessionCreate,
+    UploadSessionResponse,
+    UploadSessionStatus,
+)
+from app.services.admission import QueueFullError
+from app.services.storage import (
+    LocalStorageService,
+    StorageService,
+    UploadedPart,
+    UploadSessionError,
+    UploadSessionNotFound,
+    UploadTooLargeError,
+    get_storage_service,
+    plan_part_size,
+)
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -14,19 +46,40 @@ router = APIRouter(prefix="/files", tags=["files"])
 @router.post("/presign", response_model=PresignResponse)
 async def presign_upload(
     payload: PresignRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> PresignResponse:
-    storage = get_storage_service()
-    object_key = storage.generate_upload_key(user.id, payload.filename)
-    try:
-        upload_url = storage.create_presigned_put(object_key, payload.content_type)
-    except Exception as exc:  # pragma: no cover - surfaces as HTTP 500
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR) from exc
+    (response,) = await _presign_all(request, session, user, [payload])
+    return response
+
+
+@router.post("/presign/batch", response_model=list[PresignResponse])
+async def presign_uploads(
+    payload: PresignBatchRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> list[PresignResponse]:
+    """Upload URLs for up to 500 files in one round trip (presigning needs no network)."""
+    return await _presign_all(request, session, user, payload.files)
 
-    if upload_url.startswith("local://upload/"):
-        local_key = unquote(upload_url.removeprefix("local://upload/"))
-        upload_url = f"/files/upload/{local_key}"
-    return PresignResponse(upload_url=upload_url, object_key=object_key)
+
+@router.post("/events/s3", status_code=status.HTTP_204_NO_CONTENT)
+async def s3_event(payload: S3EventNotification, request: Request) -> Response:
+    """Bucket ``ObjectCreated`` notifications: queue jobs waiting for those uploads."""
+    secret = get_settings().s3_event_secret
+    provided = request.headers.get("authorization", "").removeprefix("Bearer ")
+    if not secret or not hmac.compare_digest(provided.encode(), secret.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid event token")
+
+    keys = [
+        unquote_plus(record.s3.object.key)
+        for record in payload.records
+        if "ObjectCreated" in record.event_name
+    ]
+    await request.app.state.transcription_service.activate_uploads(keys)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.put("/upload/{object_path:path}", name="upload_file")
@@ -42,25 +95,276 @@ async def upload_file(
     if not object_path.startswith(f"uploads/{user.id}/"):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid object key")
 
-    data = await request.body()
-    await storage.save_upload(object_path, data)
+    max_bytes = get_settings().max_upload_bytes
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the {max_bytes} byte limit",
+        )
+
+    try:
+        await storage.save_upload_stream(object_path, request.stream(), max_bytes=max_bytes)
+    except UploadTooLargeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)
+        ) from exc
+    # Local stand-in for the bucket's ObjectCreated notification.
+    await request.app.state.transcription_service.activate_uploads([object_path])
     return {"object_key": object_path}
 
 
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload_session(
+    payload: UploadSessionCreate,
+    user: User = Depends(get_current_user),
+) -> UploadSessionResponse:
+    settings = get_settings()
+    if payload.size > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the {settings.max_upload_bytes} byte limit",
+        )
+    storage = get_storage_service()
+    object_key = storage.generate_upload_key(user.id, payload.filename)
+    upload_id = await storage.create_multipart_upload(object_key, payload.content_type)
+    part_size = plan_part_size(payload.size, settings.upload_part_size)
+    part_count = -(-payload.size // part_size)
+    return UploadSessionResponse(
+        upload_id=upload_id,
+        object_key=object_key,
+        part_size=part_size,
+        parts=_part_urls(storage, object_key, upload_id, range(1, part_count + 1)),
+    )
+
+
+@router.post("/uploads/{upload_id}/urls", response_model=list[UploadPartUrl])
+async def presign_upload_parts(
+    upload_id: str,
+    payload: UploadPartsRequest,
+    user: User = Depends(get_current_user),
+) -> list[UploadPartUrl]:
+    """Fresh part URLs, e.g. for resuming after the original ones expired."""
+    _check_upload_key(payload.object_key, user)
+    storage = get_storage_service()
+    with _session_errors():
+        await storage.list_uploaded_parts(payload.object_key, upload_id)
+    return _part_urls(storage, payload.object_key, upload_id, payload.part_numbers)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionStatus)
+async def get_upload_session(
+    upload_id: str,
+    object_key: str,
+    user: User = Depends(get_current_user),
+) -> UploadSessionStatus:
+    _check_upload_key(object_key, user)
+    with _session_errors():
+        parts = await get_storage_service().list_uploaded_parts(object_key, upload_id)
+    offset = 0
+    for expected, part in enumerate(sorted(parts, key=lambda p: p.part_number), start=1):
+        if part.part_number != expected:
+            break
+        offset += part.size
+    return UploadSessionStatus(
+        upload_id=upload_id,
+        object_key=object_key,
+        parts=[UploadedPartRead(**vars(part)) for part in parts],
+        offset=offset,
+    )
+
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", name="upload_part")
+async def upload_part(
+    upload_id: str,
+    part_number: int,
+    object_key: str,
+    request: Request,
+    user: User = Depends(get_current_user),
+):
+    storage = get_storage_service()
+    if not isinstance(storage, LocalStorageService):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    _check_upload_key(object_key, user)
+
+    with _session_errors():
+        try:
+            part = await storage.save_upload_part(
+                object_key,
+                upload_id,
+                part_number,
+                request.stream(),
+                max_bytes=get_settings().max_upload_bytes,
+            )
+        except UploadTooLargeError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)
+            ) from exc
+    return Response(status_code=status.HTTP_200_OK, headers={"ETag": part.etag})
+
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload_session(
+    upload_id: str,
+    payload: UploadComplete,
+    request: Request,
+    user: User = Depends(get_current_user),
+):
+    _check_upload_key(payload.object_key, user)
+    storage = get_storage_service()
+    max_bytes = get_settings().max_upload_bytes
+    with _session_errors():
+        uploaded = await storage.list_uploaded_parts(payload.object_key, upload_id)
+        if payload.parts is None:
+            parts = uploaded
+        else:
+            parts = [UploadedPart(**part.model_dump()) for part in payload.parts]
+        if not parts:
+            raise UploadSessionError("No parts uploaded")
+        # Sizes come from storage; the ones a client declares are not trusted.
+        sizes = {part.part_number: part.size for part in uploaded}
+        if sum(sizes.get(part.part_number, 0) for part in parts) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds the {max_bytes} byte limit",
+            )
+        try:
+            await storage.complete_multipart_upload(payload.object_key, upload_id, parts)
+        except UploadTooLargeError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)
+            ) from exc
+    await request.app.state.transcription_service.activate_uploads([payload.object_key])
+    return {"object_key": payload.object_key}
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def abort_upload_session(
+    upload_id: str,
+    object_key: str,
+    user: User = Depends(get_current_user),
+) -> Response:
+    _check_upload_key(object_key, user)
+    with _session_errors():
+        await get_storage_service().abort_multipart_upload(object_key, upload_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/download/{object_path:path}", name="download_file")
 async def download_file(
     object_path: str,
-    user: User = Depends(get_current_user),
+    expires: int,
+    signature: str,
+    gzip_ok: bool = Depends(accepts_gzip),
 ):
+    """Serve a result through a signed link from ``GET /jobs/{id}/download``.
+
+    The link itself is the credential, so no token or database lookup is needed.
+    Responses may be kept by the browser until the link expires, never by shared caches.
+    """
     storage = get_storage_service()
     if not isinstance(storage, LocalStorageService):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
 
-    if not object_path.startswith(f"results/{user.id}/"):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid object key")
+    if not storage.verify_download(object_path, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired download link"
+        )
 
+    headers = {"Cache-Control": f"private, max-age={max(0, expires - int(time.time()))}"}
+    accel_prefix = get_settings().x_accel_redirect_prefix
     try:
+        if accel_prefix:
+            # nginx sends the file itself (gzip_static picks up the .gz variant).
+            headers["X-Accel-Redirect"] = storage.accel_redirect_uri(object_path, accel_prefix)
+            return Response(headers=headers)
         path = storage.open_for_download(object_path)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid object key"
+        ) from None
     except FileNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found") from None
-    return FileResponse(path)
+    if path.name.endswith(".gz") and not object_path.endswith(".gz"):
+        headers["Vary"] = "Accept-Encoding"
+        media_type = "text/plain; charset=utf-8"
+        if gzip_ok:
+            headers["Content-Encoding"] = "gzip"
+            return FileResponse(path, media_type=media_type, headers=headers)
+        data = await asyncio.to_thread(path.read_bytes)
+        return Response(gzip.decompress(data), media_type=media_type, headers=headers)
+    return FileResponse(path, headers=headers)
+
+
+async def _presign_all(
+    request: Request, session: AsyncSession, user: User, payloads: list[PresignRequest]
+) -> list[PresignResponse]:
+    storage = get_storage_service()
+    responses = [_presign(storage, user, payload) for payload in payloads]
+    with_jobs = [
+        (response, payload)
+        for response, payload in zip(responses, payloads)
+        if payload.job is not None
+    ]
+    if with_jobs:
+        try:
+            jobs = await request.app.state.transcription_service.create_jobs(
+                session,
+                user,
+                [
+                    TranscriptionJobCreate(
+                        object_key=response.object_key, **payload.job.model_dump()
+                    )
+                    for response, payload in with_jobs
+                ],
+                awaiting_upload=True,
+            )
+        except QueueFullError as exc:
+            raise queue_full_exception(exc) from exc
+        for (response, _), job in zip(with_jobs, jobs):
+            response.job_id = job.id
+    return responses
+
+
+def _presign(storage: StorageService, user: User, payload: PresignRequest) -> PresignResponse:
+    object_key = storage.generate_upload_key(user.id, payload.filename)
+    try:
+        upload_url = storage.create_presigned_put(object_key, payload.content_type)
+    except Exception as exc:  # pragma: no cover - surfaces as HTTP 500
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR) from exc
+
+    if upload_url.startswith("local://upload/"):
+        local_key = unquote(upload_url.removeprefix("local://upload/"))
+        upload_url = f"/files/upload/{local_key}"
+    return PresignResponse(upload_url=upload_url, object_key=object_key)
+
+
+def _check_upload_key(object_key: str, user: User) -> None:
+    if not object_key.startswith(f"uploads/{user.id}/"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid object key")
+
+
+def _part_urls(
+    storage: StorageService, object_key: str, upload_id: str, part_numbers: Iterable[int]
+) -> list[UploadPartUrl]:
+    ttl = get_settings().upload_part_url_ttl
+    urls = []
+    for part_number in part_numbers:
+        url = storage.create_presigned_part(object_key, upload_id, part_number, expires_in=ttl)
+        if url.startswith("local://upload-part/"):
+            url = (
+                f"/files/uploads/{upload_id}/parts/{part_number}"
+                f"?object_key={quote(object_key)}"
+            )
+        urls.append(UploadPartUrl(part_number=part_number, upload_url=url))
+    return urls
+
+
+@contextmanager
+def _session_errors() -> Iterator[None]:
+    try:
+        yield
+    except UploadSessionNotFound as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
+    except UploadSessionError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
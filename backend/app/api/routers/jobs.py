@@ -1,16 +1,38 @@
+import hmac
+import json
+import logging
+import zlib
+from collections.abc import AsyncIterator
+from typing import Literal
 from urllib.parse import unquote
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user, get_db
-from app.models import User
-from app.schemas import DownloadResponse, TranscriptionJobCreate, TranscriptionJobRead
+from app.api.deps import accepts_gzip, get_current_user, get_db
+from app.api.errors import queue_full_exception
+from app.core.config import get_settings
+from app.models import TranscriptionStatus, User
+from app.schemas import (
+    AssemblyAIWebhook,
+    DownloadResponse,
+    TranscriptionJobBatchCreate,
+    TranscriptionJobCreate,
+    TranscriptionJobRead,
+)
 from app.services import jobs as job_service
+from app.services.admission import QueueFullError
+from app.services.assemblyai import WEBHOOK_AUTH_HEADER, AssemblyAIError
 from app.services.storage import get_storage_service
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 @router.post("/", response_model=TranscriptionJobRead, status_code=status.HTTP_201_CREATED)
 async def create_job(
@@ -20,19 +42,79 @@ async def create_job(
     user: User = Depends(get_current_user),
 ) -> TranscriptionJobRead:
     transcription_service = request.app.state.transcription_service
-    job = await transcription_service.create_job(session, user, payload)
+    try:
+        job = await transcription_service.create_job(session, user, payload)
+    except QueueFullError as exc:
+        raise queue_full_exception(exc) from exc
     return TranscriptionJobRead.model_validate(job)
 
 
-@router.get("/", response_model=list[TranscriptionJobRead])
-async def list_jobs(
+@router.post(
+    "/batch", response_model=list[TranscriptionJobRead], status_code=status.HTTP_201_CREATED
+)
+async def create_jobs(
+    payload: TranscriptionJobBatchCreate,
+    request: Request,
     session: AsyncSession = Depends(get_db),
     user: User = Depends(get_current_user),
 ) -> list[TranscriptionJobRead]:
-    jobs = await job_service.list_jobs_for_user(session, user.id)
+    """Queue up to 500 jobs at once; admission control accepts or rejects the whole batch."""
+    transcription_service = request.app.state.transcription_service
+    try:
+        jobs = await transcription_service.create_jobs(session, user, payload.jobs)
+    except QueueFullError as exc:
+        raise queue_full_exception(exc) from exc
     return [TranscriptionJobRead.model_validate(job) for job in jobs]
 
 
+@router.post("/webhooks/assemblyai", status_code=status.HTTP_204_NO_CONTENT)
+async def assemblyai_webhook(
+    payload: AssemblyAIWebhook,
+    request: Request,
+    session: AsyncSession = Depends(get_db),
+) -> Response:
+    secret = get_settings().assemblyai_webhook_secret
+    provided = request.headers.get(WEBHOOK_AUTH_HEADER, "")
+    if not secret or not hmac.compare_digest(provided.encode(), secret.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook secret")
+
+    job = await job_service.get_job_by_provider_id(session, payload.transcript_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    job_id = job.id
+    # Release the connection before the provider round-trip.
+    await session.close()
+
+    transcription_service = request.app.state.transcription_service
+    try:
+        await transcription_service.complete_provider_job(job_id)
+    except (AssemblyAIError, httpx.HTTPError) as exc:
+        logger.warning("Webhook for job %s could not fetch the transcript: %s", job_id, exc)
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(exc)) from exc
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/", response_model=list[TranscriptionJobRead])
+async def list_jobs(
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=200),
+    cursor: str | None = None,
+    status_filter: list[TranscriptionStatus] | None = Query(default=None, alias="status"),
+    session: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> list[dict]:
+    """Newest jobs first; pass ``X-Next-Cursor`` back as ``cursor`` for the next page."""
+    try:
+        rows, next_cursor = await job_service.list_jobs_for_user(
+            session, user.id, limit=limit, cursor=cursor, statuses=status_filter
+        )
+    except job_service.InvalidCursorError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return rows
+
+
 @router.get("/{job_id}", response_model=TranscriptionJobRead)
 async def get_job(
     job_id: str,
@@ -45,6 +127,83 @@ async def get_job(
     return TranscriptionJobRead.model_validate(job)
 
 
+@router.get(
+    "/{job_id}/transcript",
+    responses={206: {"description": "Requested byte range of the transcript"}},
+)
+async def get_job_transcript(
+    job_id: str,
+    request: Request,
+    format: Literal["text", "json"] = "text",
+    start: float | None = Query(default=None, ge=0, description="Window start, seconds"),
+    end: float | None = Query(default=None, ge=0, description="Window end, seconds"),
+    gzip_ok: bool = Depends(accepts_gzip),
+    session: AsyncSession = Depends(get_db),
+    user: User = Depends(get_current_user),
+) -> Response:
+    """Transcript body: plain text, or diarized utterances as JSON.
+
+    The full plain text is streamed from the stored result object (passed through
+    gzip-encoded when the client accepts it). With ``start``/``end`` only utterances
+    overlapping that window are returned (JSON only). A single ``Range: bytes=`` request
+    is answered with ``206`` from the database copy.
+    """
+    windowed = start is not None or end is not None
+    if windowed and format != "json":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Time windows apply to the diarized JSON transcript",
+        )
+    diarized = format == "json"
+    if not diarized and "range" not in request.headers:
+        streamed = await _stream_result(session, user.id, job_id, gzip_ok)
+        if streamed is not None:
+            return streamed
+    transcript = await job_service.get_transcript_for_user(
+        session, user.id, job_id, diarized=diarized
+    )
+    if transcript is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Transcript not found")
+    await session.close()
+
+    if diarized:
+        if transcript.diarized_json is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="No diarized transcript for this job"
+            )
+        body = transcript.diarized_json
+        if windowed:
+            window_start = round((start or 0) * 1000)
+            window_end = round(end * 1000) if end is not None else None
+            body = json.dumps(
+                [
+                    utterance
+                    for utterance in json.loads(body)
+                    if utterance["end"] > window_start
+                    and (window_end is None or utterance["start"] < window_end)
+                ],
+                ensure_ascii=False,
+            )
+        media_type = "application/json"
+    else:
+        body = transcript.plain_text
+        media_type = "text/plain; charset=utf-8"
+
+    data = body.encode("utf-8")
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = _byte_range(request.headers.get("range"), len(data))
+    if byte_range is None:
+        return Response(data, media_type=media_type, headers=headers)
+    first, last = byte_range
+    headers["Content-Range"] = f"bytes {first}-{last}/{len(data)}"
+    return Response(
+        data[first : last + 1],
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
 @router.get("/{job_id}/download", response_model=DownloadResponse)
 async def download_job_result(
     job_id: str,
@@ -59,6 +218,59 @@ async def download_job_result(
     storage = get_storage_service()
     download_url = storage.create_presigned_get(job.result_object_key)
     if download_url.startswith("local://download/"):
-        local_key = unquote(download_url.removeprefix("local://download/"))
-        download_url = f"/files/download/{local_key}"
+        local_key, _, query = download_url.removeprefix("local://download/").partition("?")
+        download_url = f"/files/download/{unquote(local_key)}?{query}"
     return DownloadResponse(download_url=download_url, object_key=job.result_object_key)
+
+
+async def _stream_result(
+    session: AsyncSession, user_id: str, job_id: str, gzip_ok: bool
+) -> StreamingResponse | None:
+    """Plain text straight from the job's result object; ``None`` if it has none."""
+    job = await job_service.get_job_for_user(session, user_id, job_id)
+    await session.close()
+    if job is None or not job.result_object_key:
+        return None
+    try:
+        stored = await get_storage_service().open_stream(job.result_object_key)
+    except FileNotFoundError:
+        return None
+    headers = {"Accept-Ranges": "bytes"}
+    chunks = stored.chunks
+    if stored.content_encoding == "gzip":
+        headers["Vary"] = "Accept-Encoding"
+        if gzip_ok:
+            headers["Content-Encoding"] = "gzip"
+        else:
+            chunks = _inflate(chunks)
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8", headers=headers)
+
+
+async def _inflate(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        if data := decompressor.decompress(chunk):
+            yield data
+    if tail := decompressor.flush():
+        yield tail
+
+
+def _byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Inclusive bounds of a single ``bytes=`` range; ``None`` serves the whole body."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first_text, _, last_text = header.removeprefix("bytes=").strip().partition("-")
+    try:
+        if first_text:
+            first = int(first_text)
+            last = min(int(last_text), size - 1) if last_text else size - 1
+        else:  # suffix range: the final N bytes
+            first, last = max(0, size - int(last_text)), size - 1
+    except ValueError:
+        return None
+    if first > last or first >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return first, last
@@ -0,0 +1,46 @@
+import gzip
+from datetime import datetime, timezone
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import get_settings
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class CompressedText(TypeDecorator):
+    """Text stored as gzip-compressed bytes.
+
+    Values are compressed on write when ``COMPRESS_TRANSCRIPTS`` is on. Reads accept
+    both compressed and plain UTF-8 bytes (rows written before compression, or with it
+    turned off), so the setting can be flipped at any time.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: str | None, dialect) -> bytes | None:
+        if value is None:
+            return None
+        data = value.encode("utf-8")
+        settings = get_settings()
+        if settings.compress_transcripts:
+            data = gzip.compress(data, compresslevel=settings.compression_level, mtime=0)
+        return data
+
+    def process_result_value(self, value: bytes | str | None, dialect) -> str | None:
+        if value is None or isinstance(value, str):
+            return value
+        data = bytes(value)
+        if data.startswith(GZIP_MAGIC):
+            data = gzip.decompress(data)
+        return data.decode("utf-8")
+
+
+def as_utc(value: datetime) -> datetime:
+    """``value`` as an aware UTC datetime.
+
+    SQLite hands back naive datetimes even for timezone-aware columns.
+    """
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
@@ -2,8 +2,10 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
 from app.core.config import get_settings
+from app.services.storage import close_storage_service
 from app.services.transcription import TranscriptionService
 from app.tasks.runner import TranscriptionRunner
+from app.tasks.storage_gc import StorageSweeper
 from app.api.routers import auth as auth_router
 from app.api.routers import files as files_router
 from app.api.routers import jobs as jobs_router
@@ -16,9 +18,18 @@ async def lifespan(app: FastAPI):
     app.state.transcription_runner = runner
     app.state.transcription_service = transcription_service
 
-    await runner.start()
+    settings = get_settings()
+    sweeper = StorageSweeper() if settings.gc_enabled else None
+    if settings.process_role != "api":
+        await runner.start()
+        if sweeper is not None:
+            await sweeper.start()
     yield
+    if sweeper is not None:
+        await sweeper.aclose()
     await runner.stop()
+    await transcription_service.aclose()
+    await close_storage_service()
 
 
 def create_app() -> FastAPI:
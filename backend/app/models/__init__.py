@@ -1,10 +1,13 @@
+from app.models.cached_transcript import CachedTranscript
 from app.models.transcript import Transcript
-from app.models.transcription_job import TranscriptionJob, TranscriptionStatus
+from app.models.transcription_job import JobPriority, TranscriptionJob, TranscriptionStatus
 from app.models.user import User
 
 __all__ = [
     "User",
     "TranscriptionJob",
     "TranscriptionStatus",
+    "JobPriority",
     "Transcript",
+    "CachedTranscript",
 ]
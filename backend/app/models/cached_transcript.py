@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from sqlalchemy import DateTime, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.db.types import CompressedText
+
+
+class CachedTranscript(Base):
+    """A finished transcript reusable by any job over byte-identical media."""
+
+    __table_args__ = (
+        UniqueConstraint(
+            "content_hash", "language", "mode", "backend", name="uq_cached_transcript_key"
+        ),
+    )
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
+    content_hash: Mapped[str] = mapped_column(String(128), nullable=False)
+    language: Mapped[str] = mapped_column(String(16), nullable=False)
+    mode: Mapped[str] = mapped_column(String(16), nullable=False)
+    backend: Mapped[str] = mapped_column(String(32), nullable=False)
+    plain_text: Mapped[str] = mapped_column(CompressedText, nullable=False)
+    diarized_json: Mapped[str | None] = mapped_column(CompressedText, nullable=True)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+    last_used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+
+Index("ix_cached_transcript_last_used", CachedTranscript.last_used_at)
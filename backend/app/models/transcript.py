@@ -1,9 +1,10 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
+from app.db.types import CompressedText
 
 
 class Transcript(Base):
@@ -12,8 +13,8 @@ class Transcript(Base):
         ForeignKey("transcriptionjob.id", ondelete="CASCADE"),
         primary_key=True,
     )
-    plain_text: Mapped[str] = mapped_column(Text, nullable=False)
-    diarized_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    plain_text: Mapped[str] = mapped_column(CompressedText, nullable=False)
+    diarized_json: Mapped[str | None] = mapped_column(CompressedText, nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
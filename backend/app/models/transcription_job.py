@@ -1,22 +1,42 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from enum import Enum
+from enum import Enum, IntEnum
 from uuid import uuid4
 
-from sqlalchemy import DateTime, Enum as SqlEnum, ForeignKey, Index, String, Text
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Enum as SqlEnum,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 
 
 class TranscriptionStatus(str, Enum):
+    # Created with a presigned upload; queued once the upload arrives.
+    AWAITING_UPLOAD = "awaiting_upload"
     PENDING = "pending"
     PROCESSING = "processing"
+    # Handed to the ASR provider in webhook mode; no worker holds the job.
+    SUBMITTED = "submitted"
     COMPLETED = "completed"
     FAILED = "failed"
 
 
+class JobPriority(IntEnum):
+    LOW = 0
+    NORMAL = 1
+    HIGH = 2
+
+
 class TranscriptionJob(Base):
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid4()))
     user_id: Mapped[str] = mapped_column(
@@ -36,9 +56,31 @@ class TranscriptionJob(Base):
     )
     language: Mapped[str] = mapped_column(String(16), nullable=False)
     mode: Mapped[str] = mapped_column(String(16), nullable=False)  # mono | dialogue
+    priority: Mapped[int] = mapped_column(Integer, default=JobPriority.NORMAL, nullable=False)
     source_object_key: Mapped[str] = mapped_column(String(1024), nullable=False)
     result_object_key: Mapped[str | None] = mapped_column(String(1024), nullable=True)
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Media size before and after pre-processing, the length of the audio sent to the
+    # provider and how much leading silence was trimmed off it (all in seconds).
+    source_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    processed_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    audio_duration_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    audio_offset_seconds: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Fingerprint of the source media, used as the transcript cache key.
+    content_hash: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    # Transcript id at the ASR provider, saved on submission so polling can resume.
+    provider_job_id: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Chunk plan of a chunked job with each chunk's provider transcript id (JSON),
+    # written as chunks are submitted so a retry resumes them.
+    provider_chunks: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Queue lease: the worker currently processing the job and when its claim lapses.
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -64,3 +106,19 @@ Index(
     TranscriptionJob.user_id,
     TranscriptionJob.created_at.desc(),
 )
+Index("ix_transcription_job_provider_job_id", TranscriptionJob.provider_job_id)
+Index("ix_transcription_job_source_object_key", TranscriptionJob.source_object_key)
+Index(
+    "ix_transcription_job_status_created",
+    TranscriptionJob.status,
+    TranscriptionJob.created_at,
+)
+# Serves the scheduler's per-user head-of-line lookups (see app/tasks/queue.py).
+Index(
+    "ix_transcription_job_queue_head",
+    TranscriptionJob.status,
+    TranscriptionJob.user_id,
+    TranscriptionJob.priority.desc(),
+    TranscriptionJob.created_at,
+    TranscriptionJob.id,
+)
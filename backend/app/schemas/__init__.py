@@ -1,5 +1,24 @@
-from app.schemas.job import TranscriptionJobCreate, TranscriptionJobRead
-from app.schemas.storage import DownloadResponse, PresignRequest, PresignResponse
+from app.schemas.job import (
+    AssemblyAIWebhook,
+    TranscriptionJobBatchCreate,
+    TranscriptionJobCreate,
+    TranscriptionJobOptions,
+    TranscriptionJobRead,
+)
+from app.schemas.storage import (
+    DownloadResponse,
+    PresignBatchRequest,
+    PresignRequest,
+    PresignResponse,
+    S3EventNotification,
+    UploadComplete,
+    UploadedPartRead,
+    UploadPartsRequest,
+    UploadPartUrl,
+    UploadSessionCreate,
+    UploadSessionResponse,
+    UploadSessionStatus,
+)
 from app.schemas.user import Token, UserCreate, UserRead
 
 __all__ = [
@@ -7,8 +26,20 @@ __all__ = [
     "UserRead",
     "Token",
     "TranscriptionJobCreate",
+    "TranscriptionJobBatchCreate",
+    "TranscriptionJobOptions",
     "TranscriptionJobRead",
+    "AssemblyAIWebhook",
     "PresignRequest",
+    "PresignBatchRequest",
+    "S3EventNotification",
     "PresignResponse",
     "DownloadResponse",
+    "UploadSessionCreate",
+    "UploadSessionResponse",
+    "UploadSessionStatus",
+    "UploadPartUrl",
+    "UploadPartsRequest",
+    "UploadedPartRead",
+    "UploadComplete",
 ]
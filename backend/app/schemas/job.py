@@ -5,11 +5,23 @@ from pydantic import BaseModel, ConfigDict, Field
 
 from app.models.transcription_job import TranscriptionStatus
 
+# Most files or jobs accepted by one batch request.
+MAX_BATCH_SIZE = 500
 
-class TranscriptionJobCreate(BaseModel):
-    object_key: str = Field(..., min_length=1)
+
+class TranscriptionJobOptions(BaseModel):
     language: str = Field(default="en", min_length=2, max_length=10)
     mode: Literal["mono", "dialogue", "multi"] = "mono"
+    # Clients may only lower their own priority; "high" is reserved for operators.
+    priority: Literal["low", "normal"] = "normal"
+
+
+class TranscriptionJobCreate(TranscriptionJobOptions):
+    object_key: str = Field(..., min_length=1)
+
+
+class TranscriptionJobBatchCreate(BaseModel):
+    jobs: list[TranscriptionJobCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
 
 
 class TranscriptionJobRead(BaseModel):
@@ -23,3 +35,10 @@ class TranscriptionJobRead(BaseModel):
     error_message: str | None = None
     created_at: datetime
     updated_at: datetime
+
+
+class AssemblyAIWebhook(BaseModel):
+    """Body AssemblyAI posts to the completion webhook."""
+
+    transcript_id: str
+    status: str
@@ -1,16 +1,89 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.job import MAX_BATCH_SIZE, TranscriptionJobOptions
 
 
 class PresignRequest(BaseModel):
     filename: str = Field(..., min_length=1)
     content_type: str = Field(default="application/octet-stream")
+    # When given, a job is created now and queued as soon as the upload lands.
+    job: TranscriptionJobOptions | None = None
 
 
 class PresignResponse(BaseModel):
     upload_url: str
     object_key: str
+    job_id: str | None = None
+
+
+class S3EventObject(BaseModel):
+    key: str  # URL-encoded by S3
+
+
+class S3EventEntity(BaseModel):
+    object: S3EventObject
+
+
+class S3EventRecord(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    event_name: str = Field(alias="eventName")
+    s3: S3EventEntity
+
+
+class S3EventNotification(BaseModel):
+    """Bucket notification as sent by S3 / MinIO (only the fields we read)."""
+
+    records: list[S3EventRecord] = Field(default_factory=list, alias="Records")
+
+
+class PresignBatchRequest(BaseModel):
+    files: list[PresignRequest] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
 
 
 class DownloadResponse(BaseModel):
     download_url: str
     object_key: str
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1)
+    content_type: str = Field(default="application/octet-stream")
+    size: int = Field(..., gt=0)
+
+
+class UploadPartUrl(BaseModel):
+    part_number: int
+    upload_url: str
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    object_key: str
+    part_size: int
+    parts: list[UploadPartUrl]
+
+
+class UploadPartsRequest(BaseModel):
+    object_key: str
+    part_numbers: list[int] = Field(..., min_length=1, max_length=10_000)
+
+
+class UploadedPartRead(BaseModel):
+    part_number: int
+    size: int
+    etag: str
+
+
+class UploadSessionStatus(BaseModel):
+    upload_id: str
+    object_key: str
+    parts: list[UploadedPartRead]
+    # Bytes received contiguously from the start; resume with the next part after them.
+    offset: int
+
+
+class UploadComplete(BaseModel):
+    object_key: str
+    # Omit to complete with every part the storage has received.
+    parts: list[UploadedPartRead] | None = None
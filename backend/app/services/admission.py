@@ -0,0 +1,128 @@
+import math
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.models import TranscriptionJob, TranscriptionStatus
+
+# Assumed job duration until enough jobs have completed to measure it.
+_DEFAULT_JOB_SECONDS = 120.0
+# Recent average durations are reused for this long to keep POST /jobs cheap.
+_DURATION_CACHE_SECONDS = 30.0
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue cannot take more work right now."""
+
+    def __init__(self, message: str, retry_after: int, per_user: bool = False) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.per_user = per_user
+
+
+class AdmissionController:
+    """Rejects new jobs once the queue is deeper than workers can drain.
+
+    Limits come from settings and are disabled when set to 0: a per-user cap on
+    queued plus running jobs, a global cap on pending jobs, and a ceiling on the
+    estimated wait derived from recent job durations and the number of live workers.
+    """
+
+    def __init__(self) -> None:
+        self.settings = get_settings()
+        self._duration_cache: tuple[float, float] | None = None
+
+    async def check(self, session: AsyncSession, user_id: str, new_jobs: int = 1) -> None:
+        settings = self.settings
+        if settings.max_queued_jobs_per_user:
+            user_active = await self._count(
+                session,
+                TranscriptionJob.user_id == user_id,
+                TranscriptionJob.status.in_(
+                    [
+                        # Presigned jobs are queued as soon as their upload lands.
+                        TranscriptionStatus.AWAITING_UPLOAD,
+                        TranscriptionStatus.PENDING,
+                        TranscriptionStatus.PROCESSING,
+                        TranscriptionStatus.SUBMITTED,
+                    ]
+                ),
+            )
+            if user_active + new_jobs > settings.max_queued_jobs_per_user:
+                average = await self.average_duration(session)
+                raise QueueFullError(
+                    "Too many unfinished jobs for this user",
+                    retry_after=_seconds(average),
+                    per_user=True,
+                )
+
+        if not (settings.max_queued_jobs or settings.max_estimated_wait_seconds):
+            return
+
+        pending = await self._count(
+            session, TranscriptionJob.status == TranscriptionStatus.PENDING
+        )
+        per_job = await self.average_duration(session) / await self._capacity(session)
+        if settings.max_queued_jobs and pending + new_jobs > settings.max_queued_jobs:
+            excess = pending + new_jobs - settings.max_queued_jobs
+            raise QueueFullError(
+                "Transcription queue is full", retry_after=_seconds(excess * per_job)
+            )
+
+        estimated_wait = (pending + new_jobs) * per_job
+        if (
+            settings.max_estimated_wait_seconds
+            and estimated_wait > settings.max_estimated_wait_seconds
+        ):
+            raise QueueFullError(
+                "Transcription queue is saturated",
+                retry_after=_seconds(estimated_wait - settings.max_estimated_wait_seconds),
+            )
+
+    async def average_duration(self, session: AsyncSession) -> float:
+        """Mean run time of recently completed jobs, cached briefly."""
+        now = time.monotonic()
+        if self._duration_cache and self._duration_cache[0] > now:
+            return self._duration_cache[1]
+
+        stmt = (
+            select(TranscriptionJob.started_at, TranscriptionJob.updated_at)
+            .where(
+                TranscriptionJob.status == TranscriptionStatus.COMPLETED,
+                TranscriptionJob.started_at.is_not(None),
+            )
+            .order_by(TranscriptionJob.updated_at.desc())
+            .limit(self.settings.admission_duration_samples)
+        )
+        rows = (await session.execute(stmt)).all()
+        durations = [(finished - started).total_seconds() for started, finished in rows]
+        average = sum(durations) / len(durations) if durations else _DEFAULT_JOB_SECONDS
+        average = max(1.0, average)
+        self._duration_cache = (now + _DURATION_CACHE_SECONDS, average)
+        return average
+
+    async def _capacity(self, session: AsyncSession) -> int:
+        """Concurrent job slots across the cluster.
+
+        Idle workers hold no lease, so the count of live lease owners is never taken
+        below ``ADMISSION_WORKER_COUNT``; otherwise an idle or freshly started cluster
+        would be estimated at one worker.
+        """
+        stmt = select(func.count(func.distinct(TranscriptionJob.lease_owner))).where(
+            TranscriptionJob.status == TranscriptionStatus.PROCESSING,
+            TranscriptionJob.lease_expires_at >= datetime.now(timezone.utc),
+        )
+        workers = (await session.execute(stmt)).scalar_one()
+        workers = max(workers, self.settings.admission_worker_count, 1)
+        return workers * self.settings.max_parallel_transcriptions
+
+    async def _count(self, session: AsyncSession, *criteria) -> int:
+        stmt = select(func.count()).select_from(TranscriptionJob).where(*criteria)
+        return (await session.execute(stmt)).scalar_one()
+
+
+def _seconds(value: float) -> int:
+    return max(1, math.ceil(value))
@@ -0,0 +1,126 @@
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from app.core.config import get_settings
+
+_UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Header AssemblyAI echoes back on webhook deliveries so the endpoint can authenticate them.
+WEBHOOK_AUTH_HEADER = "X-Webhook-Secret"
+
+
+class AssemblyAIError(Exception):
+    """Raised when the AssemblyAI API rejects a request."""
+
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        """Whether the request may succeed if repeated (rate limited or server error)."""
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+
+class AssemblyAIClient:
+    """Async client for the AssemblyAI v2 REST API.
+
+    Upload, submission and polling all run on the event loop over one pooled
+    ``httpx.AsyncClient``, so an in-flight job holds no thread while AssemblyAI works.
+    Transcripts are returned as the raw API JSON.
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        settings = get_settings()
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            base_url=base_url or settings.assemblyai_base_url,
+            headers={"authorization": api_key or settings.assemblyai_api_key},
+            limits=httpx.Limits(
+                max_connections=settings.assemblyai_max_connections,
+                max_keepalive_connections=settings.assemblyai_max_connections,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+
+    async def upload(self, path: Path) -> str:
+        """Stream a local file to AssemblyAI and return its private ``upload_url``."""
+        response = await self._client.post(
+            "/v2/upload",
+            content=_read_chunks(path),
+            headers={"content-type": "application/octet-stream"},
+            timeout=httpx.Timeout(None, connect=10.0),
+        )
+        return _json(response)["upload_url"]
+
+    async def submit(self, audio_url: str, config: dict[str, Any]) -> dict[str, Any]:
+        response = await self._client.post(
+            "/v2/transcript", json={"audio_url": audio_url, **config}
+        )
+        return _json(response)
+
+    async def get(self, transcript_id: str) -> dict[str, Any]:
+        response = await self._client.get(f"/v2/transcript/{transcript_id}")
+        return _json(response)
+
+    async def list_transcripts(self, limit: int = 200) -> list[dict[str, Any]]:
+        """Most recent transcripts (id and status only), newest first."""
+        response = await self._client.get("/v2/transcript", params={"limit": limit})
+        return _json(response).get("transcripts", [])
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def build_transcription_config(
+    language: str,
+    mode: str,
+    webhook_url: str | None = None,
+    webhook_secret: str | None = None,
+) -> dict[str, Any]:
+    """Translate a job's language and mode into AssemblyAI request parameters."""
+    if mode == "mono":
+        config: dict[str, Any] = {"speaker_labels": False}  # no diarization in mono mode
+    elif mode == "dialogue":
+        config = {"speaker_labels": True, "speakers_expected": 2}
+    else:  # "multi"
+        config = {"speaker_labels": True}
+
+    if language == "auto":
+        config["language_detection"] = True
+    else:
+        config["language_code"] = language
+
+    if webhook_url:
+        config["webhook_url"] = webhook_url
+        if webhook_secret:
+            config["webhook_auth_header_name"] = WEBHOOK_AUTH_HEADER
+            config["webhook_auth_header_value"] = webhook_secret
+    return config
+
+
+async def _read_chunks(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as f:
+        while chunk := await asyncio.to_thread(f.read, _UPLOAD_CHUNK_SIZE):
+            yield chunk
+
+
+def _json(response: httpx.Response) -> dict[str, Any]:
+    if response.is_error:
+        try:
+            message = response.json().get("error")
+        except ValueError:
+            message = None
+        raise AssemblyAIError(
+            message or f"AssemblyAI request failed with HTTP {response.status_code}",
+            status_code=response.status_code,
+        )
+    return response.json()
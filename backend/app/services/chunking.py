@@ -0,0 +1,230 @@
+import asyncio
+from collections import defaultdict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.media import detect_silences, extract_audio, probe_duration
+
+# A trailing piece shorter than this share of the target stays with the previous chunk.
+_MIN_TAIL_RATIO = 0.25
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """One segment of a long recording, in seconds from the start of the original.
+
+    ``start``/``end`` include the overlap shared with the neighbours; words and
+    utterances are kept only if their midpoint falls in ``keep_from``..``keep_until``.
+    """
+
+    start: float
+    end: float
+    keep_from: float
+    keep_until: float
+
+
+def plan_chunks(
+    duration: float,
+    silences: Sequence[tuple[float, float]],
+    target: float,
+    overlap: float,
+    search_window: float,
+) -> list[Chunk]:
+    """Cut ``duration`` seconds into ~``target`` long chunks, preferring silent points.
+
+    Each cut is placed at the middle of the silence closest to the ideal position
+    within ``search_window`` seconds, falling back to the ideal position itself.
+    """
+    midpoints = sorted((start + end) / 2 for start, end in silences)
+    cuts: list[float] = []
+    last = 0.0
+    while duration - last > target * (1 + _MIN_TAIL_RATIO):
+        ideal = last + target
+        nearby = [point for point in midpoints if abs(point - ideal) <= search_window]
+        cut = min(nearby, key=lambda point: abs(point - ideal)) if nearby else ideal
+        cuts.append(cut)
+        last = cut
+
+    bounds = [0.0, *cuts, duration]
+    return [
+        Chunk(
+            start=max(0.0, keep_from - overlap),
+            end=min(duration, keep_until + overlap),
+            keep_from=keep_from,
+            keep_until=keep_until,
+        )
+        for keep_from, keep_until in zip(bounds, bounds[1:])
+    ]
+
+
+async def split_recording(source: Path, workdir: Path) -> tuple[list[Chunk], list[Path]]:
+    """Plan chunks for ``source`` and extract each one as a compact audio file.
+
+    Returns a single chunk and the source itself when the recording is short.
+    """
+    settings = get_settings()
+    duration = await probe_duration(source)
+    silences = (
+        await detect_silences(source, duration)
+        if duration > settings.chunk_target_seconds
+        else []
+    )
+    chunks = plan_chunks(
+        duration,
+        silences,
+        target=settings.chunk_target_seconds,
+        overlap=settings.chunk_overlap_seconds,
+        search_window=settings.chunk_search_window_seconds,
+    )
+    if len(chunks) == 1:
+        return chunks, [source]
+
+    limit = asyncio.Semaphore(max(1, settings.chunk_max_parallel))
+
+    async def _extract(index: int, chunk: Chunk) -> Path:
+        segment = workdir / f"chunk-{index:04d}.ogg"
+        async with limit:
+            await extract_audio(source, segment, chunk.start, chunk.end)
+        return segment
+
+    paths = await asyncio.gather(*(_extract(i, chunk) for i, chunk in enumerate(chunks)))
+    return chunks, list(paths)
+
+
+def stitch_transcripts(
+    chunks: Sequence[Chunk], transcripts: Sequence[dict[str, Any]]
+) -> dict[str, Any]:
+    """Merge per-chunk provider transcripts into one transcript of the whole recording.
+
+    Word and utterance timestamps are shifted by the chunk offset and the overlap is
+    de-duplicated using each chunk's keep range. Speaker labels are local to a chunk;
+    they are mapped onto the running labels by how much each pair of speakers talks
+    at the same time in the overlap with the previous chunk. A speaker with no overlap
+    evidence takes a label the previous chunk used that is still free, else a new one.
+    """
+    for transcript in transcripts:
+        if transcript.get("status") == "error":
+            return {"status": "error", "error": transcript.get("error")}
+
+    words: list[dict[str, Any]] = []
+    utterances: list[dict[str, Any]] = []
+    texts: list[str] = []
+    known_labels: list[str] = []
+    previous: list[dict[str, Any]] = []
+    previous_chunk: Chunk | None = None
+
+    for chunk, transcript in zip(chunks, transcripts):
+        offset = round(chunk.start * 1000)
+        local = [_shift(u, offset) for u in transcript.get("utterances") or []]
+        window = (
+            (round(chunk.start * 1000), round(previous_chunk.end * 1000))
+            if previous_chunk is not None
+            else None
+        )
+        mapping = _map_speakers(local, previous, window, known_labels)
+
+        for utterance in local:
+            utterance["speaker"] = mapping.get(utterance["speaker"], utterance["speaker"])
+            if _owned(utterance, chunk, last=chunk is chunks[-1]):
+                utterances.append(utterance)
+        for word in transcript.get("words") or []:
+            word = _shift(word, offset)
+            if word.get("speaker") is not None:
+                word["speaker"] = mapping.get(word["speaker"], word["speaker"])
+            if _owned(word, chunk, last=chunk is chunks[-1]):
+                words.append(word)
+        texts.append(transcript.get("text") or "")
+
+        previous, previous_chunk = local, chunk
+
+    text = " ".join(word["text"] for word in words) if words else " ".join(filter(None, texts))
+    return {
+        "status": "completed",
+        "text": text,
+        "words": words,
+        "utterances": utterances or None,
+    }
+
+
+def shift_transcript(transcript: dict[str, Any], offset_seconds: float) -> dict[str, Any]:
+    """Move word and utterance timestamps later, e.g. past trimmed leading silence."""
+    offset = round(offset_seconds * 1000)
+    if not offset:
+        return transcript
+    shifted = dict(transcript)
+    for field in ("words", "utterances"):
+        if transcript.get(field):
+            shifted[field] = [_shift(item, offset) for item in transcript[field]]
+    return shifted
+
+
+def _map_speakers(
+    local: list[dict[str, Any]],
+    previous: list[dict[str, Any]],
+    window: tuple[int, int] | None,
+    known_labels: list[str],
+) -> dict[str, str]:
+    speakers = list(dict.fromkeys(u["speaker"] for u in local))
+    overlap: dict[tuple[str, str], int] = defaultdict(int)
+    if window is not None:
+        for mine in local:
+            for theirs in previous:
+                start = max(mine["start"], theirs["start"], window[0])
+                end = min(mine["end"], theirs["end"], window[1])
+                if end > start:
+                    overlap[(mine["speaker"], theirs["speaker"])] += end - start
+
+    mapping: dict[str, str] = {}
+    taken: set[str] = set()
+    for (mine, theirs), _ in sorted(overlap.items(), key=lambda item: -item[1]):
+        if mine not in mapping and theirs not in taken:
+            mapping[mine] = theirs
+            taken.add(theirs)
+
+    previous_labels = list(dict.fromkeys(u["speaker"] for u in previous))
+    for speaker in speakers:
+        if speaker in mapping:
+            continue
+        free = [label for label in previous_labels if label not in taken]
+        if free:
+            label = free[0]
+        elif not previous_labels and speaker not in known_labels:
+            label = speaker  # first chunk keeps the provider's labels
+        else:
+            label = _next_label(known_labels)
+        mapping[speaker] = label
+        taken.add(label)
+        if label not in known_labels:
+            known_labels.append(label)
+    return mapping
+
+
+def _next_label(used: Sequence[str]) -> str:
+    index = 0
+    while True:
+        label, n = "", index
+        while True:
+            label = chr(ord("A") + n % 26) + label
+            n = n // 26 - 1
+            if n < 0:
+                break
+        if label not in used:
+            return label
+        index += 1
+
+
+def _shift(item: dict[str, Any], offset_ms: int) -> dict[str, Any]:
+    shifted = {key: value for key, value in item.items() if key != "words"}
+    shifted["start"] = item["start"] + offset_ms
+    shifted["end"] = item["end"] + offset_ms
+    return shifted
+
+
+def _owned(item: dict[str, Any], chunk: Chunk, last: bool) -> bool:
+    midpoint = (item["start"] + item["end"]) / 2 / 1000
+    if last:
+        return chunk.keep_from <= midpoint
+    return chunk.keep_from <= midpoint < chunk.keep_until
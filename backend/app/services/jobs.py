@@ -1,18 +1,73 @@
-from sqlalchemy import select
+import base64
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only
 
-from app.models import TranscriptionJob
+from app.models import Transcript, TranscriptionJob, TranscriptionStatus
 
+# Columns of TranscriptionJobRead; listing selects only these.
+_LISTED_COLUMNS = (
+    TranscriptionJob.id,
+    TranscriptionJob.status,
+    TranscriptionJob.language,
+    TranscriptionJob.mode,
+    TranscriptionJob.result_object_key,
+    TranscriptionJob.error_message,
+    TranscriptionJob.created_at,
+    TranscriptionJob.updated_at,
+)
 
-async def list_jobs_for_user(session: AsyncSession, user_id: str) -> list[TranscriptionJob]:
-    stmt = (
-        select(TranscriptionJob)
-        .where(TranscriptionJob.user_id == user_id)
-        .order_by(TranscriptionJob.created_at.desc())
-    )
-    result = await session.execute(stmt)
-    return result.scalars().all()
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+async def list_jobs_for_user(
+    session: AsyncSession,
+    user_id: str,
+    limit: int = 50,
+    cursor: str | None = None,
+    statuses: Sequence[TranscriptionStatus] | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """Newest-first page of a user's jobs as plain rows, plus the cursor of the next page.
+
+    Pages are keyed on ``(created_at, id)`` so each one is an index range scan on
+    ``ix_transcription_job_user_created`` however long the history is.
+    """
+    stmt = select(*_LISTED_COLUMNS).where(TranscriptionJob.user_id == user_id)
+    if statuses:
+        stmt = stmt.where(TranscriptionJob.status.in_(statuses))
+    if cursor is not None:
+        created_at, job_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(TranscriptionJob.created_at, TranscriptionJob.id) < (created_at, job_id)
+        )
+    stmt = stmt.order_by(TranscriptionJob.created_at.desc(), TranscriptionJob.id.desc())
+    rows = (await session.execute(stmt.limit(limit + 1))).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+    return [dict(row) for row in rows], next_cursor
+
+
+def encode_cursor(created_at: datetime, job_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{job_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, job_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), job_id
+    except ValueError:
+        raise InvalidCursorError("Invalid cursor") from None
 
 
 async def get_job_for_user(
@@ -20,10 +75,40 @@ async def get_job_for_user(
     user_id: str,
     job_id: str,
 ) -> TranscriptionJob | None:
+    """The job row alone; transcript bodies are read with :func:`get_transcript_for_user`."""
+    stmt = select(TranscriptionJob).where(
+        TranscriptionJob.id == job_id, TranscriptionJob.user_id == user_id
+    )
+    result = await session.execute(stmt)
+    return result.scalar_one_or_none()
+
+
+async def get_transcript_for_user(
+    session: AsyncSession,
+    user_id: str,
+    job_id: str,
+    diarized: bool = False,
+) -> Transcript | None:
+    """Transcript of a user's job with only the plain text or the diarized JSON loaded."""
+    column = Transcript.diarized_json if diarized else Transcript.plain_text
     stmt = (
-        select(TranscriptionJob)
-        .options(selectinload(TranscriptionJob.transcript))
+        select(Transcript)
+        .options(load_only(column))
+        .join(TranscriptionJob, TranscriptionJob.id == Transcript.job_id)
         .where(TranscriptionJob.id == job_id, TranscriptionJob.user_id == user_id)
     )
     result = await session.execute(stmt)
     return result.scalar_one_or_none()
+
+
+async def get_job_by_provider_id(
+    session: AsyncSession, provider_job_id: str
+) -> TranscriptionJob | None:
+    stmt = (
+        select(TranscriptionJob)
+        .where(TranscriptionJob.provider_job_id == provider_job_id)
+        .order_by(TranscriptionJob.created_at.desc())
+        .limit(1)
+    )
+    result = await session.execute(stmt)
+    return result.scalars().first()
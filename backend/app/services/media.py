@@ -0,0 +1,119 @@
+import asyncio
+import re
+import shutil
+from pathlib import Path
+
+from app.core.config import get_settings
+
+_SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+_SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+class MediaError(Exception):
+    """Raised when ffmpeg/ffprobe cannot process a media file."""
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+async def probe_duration(path: Path) -> float:
+    """Duration of a media file in seconds."""
+    output = await _run(
+        "ffprobe",
+        "-v", "error",
+        "-show_entries", "format=duration",
+        "-of", "default=noprint_wrappers=1:nokey=1",
+        str(path),
+    )
+    try:
+        return float(output.strip())
+    except ValueError:
+        raise MediaError(f"Could not read duration of {path.name}") from None
+
+
+async def detect_silences(
+    path: Path, duration: float | None = None
+) -> list[tuple[float, float]]:
+    """Silent stretches of the audio track as ``(start, end)`` seconds.
+
+    ffmpeg does not always report the end of a silence running to the end of the
+    file; with ``duration`` given such a silence is closed there.
+    """
+    settings = get_settings()
+    log = await _run(
+        "ffmpeg",
+        "-hide_banner", "-nostats",
+        "-i", str(path),
+        "-vn",
+        "-af", (
+            f"silencedetect=noise={settings.silence_threshold_db}dB"
+            f":d={settings.silence_min_seconds}"
+        ),
+        "-f", "null", "-",
+        stderr=True,
+    )
+    silences: list[tuple[float, float]] = []
+    start: float | None = None
+    for line in log.splitlines():
+        if match := _SILENCE_START.search(line):
+            start = max(0.0, float(match.group(1)))
+        elif (match := _SILENCE_END.search(line)) and start is not None:
+            silences.append((start, float(match.group(1))))
+            start = None
+    if start is not None and duration is not None:
+        silences.append((start, duration))
+    return silences
+
+
+async def extract_audio(
+    source: Path,
+    destination: Path,
+    start: float | None = None,
+    end: float | None = None,
+) -> None:
+    """Write the audio track (optionally ``start``..``end`` seconds) as 16 kHz mono Opus.
+
+    Video and extra channels are dropped; Opus in VoIP mode at ``PREPROCESS_BITRATE``
+    keeps speech intelligible at a fraction of the original size.
+    """
+    args = ["ffmpeg", "-hide_banner", "-nostats", "-y"]
+    if start is not None:
+        args += ["-ss", f"{start:.3f}"]
+    if end is not None:
+        args += ["-to", f"{end:.3f}"]
+    args += [
+        "-i", str(source),
+        "-vn", "-ac", "1", "-ar", "16000",
+        "-c:a", "libopus", "-b:a", get_settings().preprocess_bitrate,
+        "-application", "voip",
+        str(destination),
+    ]
+    await _run(*args)
+
+
+def speech_bounds(
+    duration: float, silences: list[tuple[float, float]], edge: float = 0.05
+) -> tuple[float, float]:
+    """Start and end of the recording once leading and trailing silence are dropped."""
+    start, end = 0.0, duration
+    if silences and silences[0][0] <= edge:
+        start = silences[0][1]
+    if silences and silences[-1][1] >= duration - edge:
+        end = silences[-1][0]
+    if end <= start:  # all silence; keep the recording as is
+        return 0.0, duration
+    return start, end
+
+
+async def _run(*args: str, stderr: bool = False) -> str:
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    out, err = await process.communicate()
+    if process.returncode != 0:
+        detail = err.decode(errors="replace").strip().splitlines()
+        raise MediaError(f"{args[0]} failed: {detail[-1] if detail else process.returncode}")
+    return (err if stderr else out).decode(errors="replace")
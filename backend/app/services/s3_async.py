@@ -0,0 +1,303 @@
+import asyncio
+import base64
+import hashlib
+import os
+from collections.abc import AsyncIterator
+from datetime import datetime
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from urllib.parse import quote
+
+import httpx
+from botocore.auth import S3SigV4Auth
+from botocore.awsrequest import AWSRequest
+from botocore.credentials import Credentials
+
+from app.services.storage import (
+    S3_BATCH_SIZE,
+    ObjectStream,
+    StorageService,
+    StoredObject,
+    UploadedPart,
+    UploadSessionNotFound,
+    encode_text,
+)
+
+_S3_NS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+_WRITE_CHUNK_SIZE = 1024 * 1024
+
+
+class AsyncS3StorageService(StorageService):
+    """S3-compatible storage over a pooled ``httpx.AsyncClient``.
+
+    Requests are signed with botocore's SigV4 signer and sent on the event loop, so
+    parallel jobs share one keep-alive pool of ``S3_MAX_CONNECTIONS`` instead of queueing
+    for threads and botocore's ten connections. Objects larger than
+    ``S3_RANGE_THRESHOLD`` are downloaded as concurrent ranged GETs. Key generation and
+    presigning are inherited from :class:`StorageService` (they need no network).
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport | None = None) -> None:
+        super().__init__()
+        settings = self.settings
+        self.region = settings.s3_region or "us-east-1"
+        endpoint = (
+            str(settings.s3_endpoint)
+            if settings.s3_endpoint
+            else f"https://s3.{self.region}.amazonaws.com"
+        )
+        self.endpoint = endpoint.rstrip("/")
+        self._credentials = Credentials(settings.s3_access_key, settings.s3_secret_key)
+        self._http = httpx.AsyncClient(
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=settings.s3_max_connections,
+                max_keepalive_connections=settings.s3_max_connections,
+                keepalive_expiry=settings.s3_keepalive_seconds,
+            ),
+            timeout=httpx.Timeout(60.0, connect=10.0),
+        )
+
+    async def download_to_path(self, key: str, destination: Path) -> None:  # type: ignore[override]
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        settings = self.settings
+        head = await self._send("HEAD", key)
+        if head.status_code == 404:
+            raise FileNotFoundError(key)
+        head.raise_for_status()
+        size = int(head.headers.get("content-length", 0))
+
+        if size <= settings.s3_range_threshold:
+            await self._fetch_range(key, destination, 0, None, truncate=True)
+            return
+
+        part_size = settings.s3_range_part_size
+        await asyncio.to_thread(_preallocate, destination, size)
+        limit = asyncio.Semaphore(max(1, settings.s3_range_concurrency))
+
+        async def _part(start: int) -> None:
+            async with limit:
+                await self._fetch_range(key, destination, start, min(start + part_size, size) - 1)
+
+        await asyncio.gather(*(_part(start) for start in range(0, size, part_size)))
+
+    async def upload_text(self, key: str, content: str) -> None:  # type: ignore[override]
+        data, encoding = encode_text(content)
+        headers = {"content-type": "text/plain; charset=utf-8"}
+        if encoding:
+            headers["content-encoding"] = encoding
+        response = await self._send("PUT", key, content=data, headers=headers)
+        response.raise_for_status()
+
+    async def open_stream(self, key: str) -> ObjectStream:  # type: ignore[override]
+        response = await self._http.send(self._request("GET", key), stream=True)
+        if response.status_code >= 400:
+            await response.aclose()
+            if response.status_code == 404:
+                raise FileNotFoundError(key)
+            response.raise_for_status()
+
+        async def _chunks() -> AsyncIterator[bytes]:
+            try:
+                # Raw bytes: the body stays in its stored Content-Encoding.
+                async for chunk in response.aiter_raw(_WRITE_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                await response.aclose()
+
+        return ObjectStream(_chunks(), response.headers.get("content-encoding"))
+
+    async def delete_object(self, key: str) -> None:  # type: ignore[override]
+        response = await self._send("DELETE", key)
+        response.raise_for_status()
+
+    async def iter_objects(  # type: ignore[override]
+        self, prefix: str
+    ) -> AsyncIterator[list[StoredObject]]:
+        token: str | None = None
+        while True:
+            params = {"list-type": "2", "prefix": prefix, "max-keys": str(S3_BATCH_SIZE)}
+            if token:
+                params["continuation-token"] = token
+            response = await self._send("GET", "", params=params)
+            response.raise_for_status()
+            root = ET.fromstring(response.content)
+            objects = [
+                StoredObject(
+                    item.findtext(f"{_S3_NS}Key"),
+                    int(item.findtext(f"{_S3_NS}Size")),
+                    datetime.fromisoformat(
+                        item.findtext(f"{_S3_NS}LastModified").replace("Z", "+00:00")
+                    ),
+                )
+                for item in root.iter(f"{_S3_NS}Contents")
+            ]
+            if objects:
+                yield objects
+            token = root.findtext(f"{_S3_NS}NextContinuationToken")
+            if root.findtext(f"{_S3_NS}IsTruncated") != "true" or not token:
+                return
+
+    async def delete_objects(self, keys: list[str]) -> list[str]:  # type: ignore[override]
+        failed: list[str] = []
+        for start in range(0, len(keys), S3_BATCH_SIZE):
+            body = ET.Element("Delete")
+            ET.SubElement(body, "Quiet").text = "true"
+            for key in keys[start : start + S3_BATCH_SIZE]:
+                ET.SubElement(ET.SubElement(body, "Object"), "Key").text = key
+            content = ET.tostring(body)
+            response = await self._send(
+                "POST",
+                "",
+                params={"delete": ""},
+                content=content,
+                headers={
+                    "content-type": "application/xml",
+                    # DeleteObjects requires a body checksum.
+                    "content-md5": base64.b64encode(hashlib.md5(content).digest()).decode(),
+                },
+            )
+            response.raise_for_status()
+            failed += [
+                error.findtext(f"{_S3_NS}Key")
+                for error in ET.fromstring(response.content).iter(f"{_S3_NS}Error")
+            ]
+        return failed
+
+    async def content_hash(self, key: str) -> str | None:  # type: ignore[override]
+        response = await self._send("HEAD", key)
+        response.raise_for_status()
+        etag = response.headers.get("etag")
+        return "etag:" + etag.strip('"') if etag else None
+
+    async def create_multipart_upload(  # type: ignore[override]
+        self, key: str, content_type: str
+    ) -> str:
+        response = await self._send(
+            "POST", key, params={"uploads": ""}, headers={"content-type": content_type}
+        )
+        response.raise_for_status()
+        return ET.fromstring(response.content).findtext(f"{_S3_NS}UploadId")
+
+    async def list_uploaded_parts(  # type: ignore[override]
+        self, key: str, upload_id: str
+    ) -> list[UploadedPart]:
+        parts: list[UploadedPart] = []
+        marker = "0"
+        while True:
+            response = await self._send(
+                "GET",
+                key,
+                params={"uploadId": upload_id, "part-number-marker": marker},
+            )
+            _raise_for_upload(response)
+            root = ET.fromstring(response.content)
+            for part in root.iter(f"{_S3_NS}Part"):
+                parts.append(
+                    UploadedPart(
+                        int(part.findtext(f"{_S3_NS}PartNumber")),
+                        int(part.findtext(f"{_S3_NS}Size")),
+                        part.findtext(f"{_S3_NS}ETag"),
+                    )
+                )
+            if root.findtext(f"{_S3_NS}IsTruncated") != "true":
+                return parts
+            marker = root.findtext(f"{_S3_NS}NextPartNumberMarker")
+
+    async def complete_multipart_upload(  # type: ignore[override]
+        self, key: str, upload_id: str, parts: list[UploadedPart]
+    ) -> None:
+        body = ET.Element("CompleteMultipartUpload")
+        for part in sorted(parts, key=lambda part: part.part_number):
+            item = ET.SubElement(body, "Part")
+            ET.SubElement(item, "PartNumber").text = str(part.part_number)
+            ET.SubElement(item, "ETag").text = part.etag
+        response = await self._send(
+            "POST",
+            key,
+            params={"uploadId": upload_id},
+            content=ET.tostring(body),
+            headers={"content-type": "application/xml"},
+        )
+        _raise_for_upload(response)
+        # S3 may report a failed completion with 200 and an <Error> body.
+        if ET.fromstring(response.content).tag == "Error":
+            raise httpx.HTTPStatusError(
+                "CompleteMultipartUpload failed", request=response.request, response=response
+            )
+
+    async def abort_multipart_upload(  # type: ignore[override]
+        self, key: str, upload_id: str
+    ) -> None:
+        response = await self._send("DELETE", key, params={"uploadId": upload_id})
+        _raise_for_upload(response)
+
+    async def aclose(self) -> None:  # type: ignore[override]
+        await self._http.aclose()
+
+    async def _fetch_range(
+        self,
+        key: str,
+        destination: Path,
+        start: int,
+        end: int | None,
+        truncate: bool = False,
+    ) -> None:
+        headers = {"range": f"bytes={start}-{end}"} if end is not None else {}
+        request = self._request("GET", key, headers=headers)
+        fd = await asyncio.to_thread(
+            os.open, destination, os.O_WRONLY | os.O_CREAT | (os.O_TRUNC if truncate else 0)
+        )
+        try:
+            async with self._http.stream(
+                request.method, request.url, headers=request.headers
+            ) as response:
+                if response.status_code == 404:
+                    raise FileNotFoundError(key)
+                response.raise_for_status()
+                offset = start
+                async for chunk in response.aiter_bytes(_WRITE_CHUNK_SIZE):
+                    await asyncio.to_thread(os.pwrite, fd, chunk, offset)
+                    offset += len(chunk)
+        finally:
+            os.close(fd)
+
+    async def _send(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        content: bytes = b"",
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        request = self._request(method, key, params, content, headers)
+        return await self._http.request(
+            request.method, request.url, headers=request.headers, content=content or None
+        )
+
+    def _request(
+        self,
+        method: str,
+        key: str,
+        params: dict[str, str] | None = None,
+        content: bytes = b"",
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Request:
+        path = f"/{self.bucket}/{quote(key, safe='/~')}" if key else f"/{self.bucket}"
+        url = httpx.URL(self.endpoint + path, params=params)
+        aws_request = AWSRequest(
+            method=method, url=str(url), data=content, headers=dict(headers or {})
+        )
+        S3SigV4Auth(self._credentials, "s3", self.region).add_auth(aws_request)
+        return httpx.Request(method, url, headers=dict(aws_request.headers.items()))
+
+
+def _preallocate(path: Path, size: int) -> None:
+    with path.open("wb") as f:
+        f.truncate(size)
+
+
+def _raise_for_upload(response: httpx.Response) -> None:
+    if response.status_code == 404:
+        raise UploadSessionNotFound("Upload session not found")
+    response.raise_for_status()
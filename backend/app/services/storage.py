@@ -1,5 +1,17 @@
 import asyncio
+import gzip
+import hashlib
+import hmac
+import os
 import re
+import shutil
+import tempfile
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
 from pathlib import Path
 from typing import Final
 from urllib.parse import quote
@@ -7,16 +19,95 @@ from uuid import uuid4
 
 import boto3
 from botocore.client import Config
+from botocore.exceptions import ClientError
 
 from app.core.config import get_settings
 
 
+# Directory under LOCAL_STORAGE_DIR holding the content hashes recorded for uploads.
+_HASH_DIR = ".hashes"
+# Directory under LOCAL_STORAGE_DIR holding the parts of unfinished multipart uploads.
+_PARTS_DIR = ".uploads"
+# S3 multipart limits: at most 10,000 parts, each (but the last) at least 5 MiB.
+_MAX_PARTS = 10_000
+_MIN_PART_SIZE = 5 * 1024 * 1024
+_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+_COPY_CHUNK_SIZE = 1024 * 1024
+# S3 DeleteObjects and ListObjectsV2 handle at most this many keys per request.
+S3_BATCH_SIZE = 1000
+
+
 def _sanitize_filename(filename: str) -> str:
     name = Path(filename).name
     name = re.sub(r"[^A-Za-z0-9._-]+", "_", name)
     return name or "file"
 
 
+@dataclass(frozen=True)
+class UploadedPart:
+    part_number: int
+    size: int
+    etag: str
+
+
+@dataclass(frozen=True)
+class StoredObject:
+    key: str
+    size: int
+    modified: datetime
+
+
+@dataclass
+class ObjectStream:
+    """Stored bytes of an object, still in its ``content_encoding`` (e.g. gzip)."""
+
+    chunks: AsyncIterator[bytes]
+    content_encoding: str | None
+
+
+class UploadSessionError(Exception):
+    """Raised when a multipart upload is incomplete or inconsistent."""
+
+
+class UploadSessionNotFound(UploadSessionError):
+    """Raised when a multipart upload does not exist (never created, completed or aborted)."""
+
+
+@contextmanager
+def _no_such_upload() -> Iterator[None]:
+    try:
+        yield
+    except ClientError as exc:
+        if exc.response.get("Error", {}).get("Code") == "NoSuchUpload":
+            raise UploadSessionNotFound("Upload session not found") from None
+        raise
+
+
+def plan_part_size(total_size: int, preferred: int) -> int:
+    """Part size for a multipart upload of ``total_size`` bytes within S3's limits."""
+    part_size = max(preferred, _MIN_PART_SIZE)
+    while -(-total_size // part_size) > _MAX_PARTS:
+        part_size *= 2
+    return part_size
+
+
+def encode_text(content: str) -> tuple[bytes, str | None]:
+    """Body and ``Content-Encoding`` for a stored text object, gzipped when enabled."""
+    data = content.encode("utf-8")
+    settings = get_settings()
+    if not settings.compress_transcripts:
+        return data, None
+    return gzip.compress(data, compresslevel=settings.compression_level, mtime=0), "gzip"
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Upload exceeds the {max_bytes} byte limit")
+        self.max_bytes = max_bytes
+
+
 class StorageService:
     """Default S3-compatible storage backend."""
 
@@ -74,6 +165,72 @@ class StorageService:
             ExpiresIn=expires_in,
         )
 
+    async def create_multipart_upload(self, key: str, content_type: str) -> str:
+        def _create() -> str:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket, Key=key, ContentType=content_type
+            )
+            return response["UploadId"]
+
+        return await asyncio.to_thread(_create)
+
+    def create_presigned_part(
+        self, key: str, upload_id: str, part_number: int, expires_in: int = 3600
+    ) -> str:
+        return self.client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expires_in,
+        )
+
+    async def list_uploaded_parts(self, key: str, upload_id: str) -> list[UploadedPart]:
+        def _list() -> list[UploadedPart]:
+            paginator = self.client.get_paginator("list_parts")
+            with _no_such_upload():
+                pages = list(
+                    paginator.paginate(Bucket=self.bucket, Key=key, UploadId=upload_id)
+                )
+            return [
+                UploadedPart(part["PartNumber"], part["Size"], part["ETag"])
+                for page in pages
+                for part in page.get("Parts", [])
+            ]
+
+        return await asyncio.to_thread(_list)
+
+    async def complete_multipart_upload(
+        self, key: str, upload_id: str, parts: list[UploadedPart]
+    ) -> None:
+        def _complete() -> None:
+            with _no_such_upload():
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={
+                        "Parts": [
+                            {"PartNumber": part.part_number, "ETag": part.etag}
+                            for part in sorted(parts, key=lambda part: part.part_number)
+                        ]
+                    },
+                )
+
+        await asyncio.to_thread(_complete)
+
+    async def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        def _abort() -> None:
+            with _no_such_upload():
+                self.client.abort_multipart_upload(
+                    Bucket=self.bucket, Key=key, UploadId=upload_id
+                )
+
+        await asyncio.to_thread(_abort)
+
     async def download_to_path(self, key: str, destination: Path) -> None:
         destination.parent.mkdir(parents=True, exist_ok=True)
 
@@ -83,8 +240,21 @@ class StorageService:
 
         await asyncio.to_thread(_download)
 
+    @asynccontextmanager
+    async def local_file(self, key: str, isolate: bool = False) -> AsyncIterator[Path]:
+        """Yield a readable local path holding the object's bytes for the block's duration.
+
+        The object is streamed into a temporary file that is removed afterwards; it is
+        private to the caller whatever ``isolate`` says.
+        """
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "source"
+            await self.download_to_path(key, path)
+            yield path
+
     async def upload_text(self, key: str, content: str) -> None:
-        data = content.encode("utf-8")
+        data, encoding = encode_text(content)
+        extra = {"ContentEncoding": encoding} if encoding else {}
 
         def _upload() -> None:
             self.client.put_object(
@@ -92,10 +262,46 @@ class StorageService:
                 Key=key,
                 Body=data,
                 ContentType="text/plain; charset=utf-8",
+                **extra,
             )
 
         await asyncio.to_thread(_upload)
 
+    async def open_stream(self, key: str) -> ObjectStream:
+        """Read ``key`` a chunk at a time, without decoding its stored encoding."""
+        try:
+            response = await asyncio.to_thread(
+                self.client.get_object, Bucket=self.bucket, Key=key
+            )
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                raise FileNotFoundError(key) from exc
+            raise
+        body = response["Body"]
+
+        async def _chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await asyncio.to_thread(body.read, _COPY_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                body.close()
+
+        return ObjectStream(_chunks(), response.get("ContentEncoding"))
+
+    async def content_hash(self, key: str) -> str | None:
+        """Fingerprint of an object's bytes, or ``None`` if it cannot be determined.
+
+        S3 computes the ETag while storing the object: the MD5 of the body for single
+        part uploads, a digest of part digests for multipart ones. Either way equal
+        ETags mean equal content for the same upload path.
+        """
+
+        def _head() -> str | None:
+            etag = self.client.head_object(Bucket=self.bucket, Key=key).get("ETag")
+            return "etag:" + etag.strip('"') if etag else None
+
+        return await asyncio.to_thread(_head)
+
     async def delete_object(self, key: str) -> None:
         """Delete an object from the bucket; errors propagate to caller."""
 
@@ -104,6 +310,40 @@ class StorageService:
 
         await asyncio.to_thread(_delete)
 
+    async def iter_objects(self, prefix: str) -> AsyncIterator[list[StoredObject]]:
+        """Objects under ``prefix`` in pages of up to 1000."""
+        paginator = self.client.get_paginator("list_objects_v2")
+        pages = iter(
+            paginator.paginate(
+                Bucket=self.bucket, Prefix=prefix, PaginationConfig={"PageSize": S3_BATCH_SIZE}
+            )
+        )
+        while (page := await asyncio.to_thread(next, pages, None)) is not None:
+            objects = [
+                StoredObject(item["Key"], item["Size"], item["LastModified"])
+                for item in page.get("Contents", [])
+            ]
+            if objects:
+                yield objects
+
+    async def delete_objects(self, keys: list[str]) -> list[str]:
+        """Delete ``keys`` with one request per 1000; returns the keys that failed."""
+
+        def _delete(batch: list[str]) -> list[str]:
+            response = self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in batch], "Quiet": True},
+            )
+            return [error["Key"] for error in response.get("Errors", [])]
+
+        failed: list[str] = []
+        for start in range(0, len(keys), S3_BATCH_SIZE):
+            failed += await asyncio.to_thread(_delete, keys[start : start + S3_BATCH_SIZE])
+        return failed
+
+    async def aclose(self) -> None:
+        """Release network resources; the boto3 client needs no explicit cleanup."""
+
 
 class LocalStorageService(StorageService):
     """Local filesystem storage intended for development use."""
@@ -132,52 +372,322 @@ class LocalStorageService(StorageService):
         return f"local://upload/{quote(key)}"
 
     def create_presigned_get(self, key: str, expires_in: int = 900) -> str:  # type: ignore[override]
-        return f"local://download/{quote(key)}"
+        """Signed download link valid for ``expires_in`` seconds, checked without the DB."""
+        expires = int(time.time()) + expires_in
+        signature = self._download_signature(key, expires)
+        return f"local://download/{quote(key)}?expires={expires}&signature={signature}"
+
+    def verify_download(self, key: str, expires: int, signature: str) -> bool:
+        if expires < time.time():
+            return False
+        # Compare bytes: compare_digest rejects non-ASCII str arguments with TypeError.
+        expected = self._download_signature(key, expires).encode()
+        return hmac.compare_digest(expected, signature.encode())
+
+    def _download_signature(self, key: str, expires: int) -> str:
+        secret = self.settings.download_url_secret or self.settings.jwt_secret_key
+        message = f"GET\n{key}\n{expires}".encode("utf-8")
+        return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
 
     async def download_to_path(self, key: str, destination: Path) -> None:  # type: ignore[override]
         source = self._key_path(key)
         if not source.exists():
             raise FileNotFoundError(key)
         destination.parent.mkdir(parents=True, exist_ok=True)
-
-        def _copy() -> None:
-            destination.write_bytes(source.read_bytes())
-
-        await asyncio.to_thread(_copy)
+        # copyfile uses os.sendfile on Linux, so the bytes never pass through Python.
+        await asyncio.to_thread(shutil.copyfile, source, destination)
+
+    @asynccontextmanager
+    async def local_file(  # type: ignore[override]
+        self, key: str, isolate: bool = False
+    ) -> AsyncIterator[Path]:
+        """Yield the stored file itself, or with ``isolate`` a private link to it.
+
+        Reading in place costs no copy at all. An isolated path is a hardlink in a
+        temporary directory (a kernel-side copy across filesystems), so the caller keeps
+        the original bytes even if the key is deleted or replaced meanwhile.
+        """
+        source = self._key_path(key)
+        if not source.exists():
+            raise FileNotFoundError(key)
+        if not isolate:
+            yield source
+            return
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "source"
+            try:
+                await asyncio.to_thread(os.link, source, path)
+            except OSError:
+                await asyncio.to_thread(shutil.copyfile, source, path)
+            yield path
 
     async def upload_text(self, key: str, content: str) -> None:  # type: ignore[override]
-        target = self._key_path(key)
-        target.parent.mkdir(parents=True, exist_ok=True)
+        """Write ``key``, or ``key.gz`` when compressing (what nginx ``gzip_static`` serves)."""
+        plain = self._key_path(key)
+        compressed = _gz_path(plain)
+        plain.parent.mkdir(parents=True, exist_ok=True)
+        data, encoding = encode_text(content)
+        target, stale = (compressed, plain) if encoding else (plain, compressed)
 
         def _write() -> None:
-            target.write_text(content, encoding="utf-8")
+            target.write_bytes(data)
+            stale.unlink(missing_ok=True)
 
         await asyncio.to_thread(_write)
 
-    async def save_upload(self, key: str, data: bytes) -> None:
-        target = self._key_path(key)
+    async def open_stream(self, key: str) -> ObjectStream:  # type: ignore[override]
+        path = self.open_for_download(key)
+        handle = await asyncio.to_thread(path.open, "rb")
+
+        async def _chunks() -> AsyncIterator[bytes]:
+            try:
+                while chunk := await asyncio.to_thread(handle.read, _COPY_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                handle.close()
+
+        return ObjectStream(_chunks(), "gzip" if path != self._key_path(key) else None)
+
+    def _hash_path(self, key: str) -> Path:
+        return self._key_path(f"{_HASH_DIR}/{key}.sha256")
+
+    async def save_upload(self, key: str, data: bytes) -> str:
+        """Store an upload and return the SHA-256 of its bytes, kept for :meth:`content_hash`."""
+
+        async def _single() -> AsyncIterator[bytes]:
+            yield data
+
+        digest, _ = await self.save_upload_stream(key, _single())
+        return digest
+
+    async def save_upload_stream(
+        self,
+        key: str,
+        chunks: AsyncIterator[bytes],
+        max_bytes: int | None = None,
+    ) -> tuple[str, int]:
+        """Write an upload chunk by chunk; returns its SHA-256 and size.
+
+        Bytes go to a temporary file next to the target, hashed as they arrive, and are
+        renamed into place only once complete, so readers never see a partial object
+        and memory stays constant. Raises :class:`UploadTooLargeError` as soon as more
+        than ``max_bytes`` arrive.
+        """
+        hash_path = self._hash_path(key)
+        hash_path.parent.mkdir(parents=True, exist_ok=True)
+        digest, size = await self._write_stream(self._key_path(key), chunks, max_bytes)
+        await asyncio.to_thread(hash_path.write_text, digest, "ascii")
+        return digest, size
+
+    async def _write_stream(
+        self, target: Path, chunks: AsyncIterator[bytes], max_bytes: int | None
+    ) -> tuple[str, int]:
         target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.name}.{uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with partial.open("wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise UploadTooLargeError(max_bytes)
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+            await asyncio.to_thread(os.replace, partial, target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        return digest.hexdigest(), size
+
+    def _parts_dir(self, key: str, upload_id: str) -> Path:
+        if not _UPLOAD_ID.fullmatch(upload_id):
+            raise UploadSessionNotFound("Upload session not found")
+        parts_dir = self._key_path(f"{_PARTS_DIR}/{upload_id}")
+        try:
+            owner = (parts_dir / "key").read_text(encoding="utf-8")
+        except FileNotFoundError:
+            raise UploadSessionNotFound("Upload session not found") from None
+        if owner != key:
+            raise UploadSessionNotFound("Upload session not found")
+        return parts_dir
+
+    async def create_multipart_upload(  # type: ignore[override]
+        self, key: str, content_type: str
+    ) -> str:
+        upload_id = uuid4().hex
+        parts_dir = self._key_path(f"{_PARTS_DIR}/{upload_id}")
+        parts_dir.mkdir(parents=True)
+        (parts_dir / "key").write_text(key, encoding="utf-8")
+        return upload_id
+
+    def create_presigned_part(  # type: ignore[override]
+        self, key: str, upload_id: str, part_number: int, expires_in: int = 3600
+    ) -> str:
+        return f"local://upload-part/{upload_id}/{part_number}"
 
-        def _write() -> None:
-            target.write_bytes(data)
+    async def save_upload_part(
+        self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        chunks: AsyncIterator[bytes],
+        max_bytes: int | None = None,
+    ) -> UploadedPart:
+        """Store one part of a multipart upload; re-sending a part replaces it."""
+        if not 1 <= part_number <= _MAX_PARTS:
+            raise UploadSessionError(f"Part number must be between 1 and {_MAX_PARTS}")
+        parts_dir = self._parts_dir(key, upload_id)
+        digest, size = await self._write_stream(
+            parts_dir / f"{part_number:05d}.part", chunks, max_bytes
+        )
+        return UploadedPart(part_number, size, f'"{digest}"')
+
+    async def list_uploaded_parts(  # type: ignore[override]
+        self, key: str, upload_id: str
+    ) -> list[UploadedPart]:
+        parts_dir = self._parts_dir(key, upload_id)
+
+        def _list() -> list[UploadedPart]:
+            return [
+                UploadedPart(int(path.stem), path.stat().st_size, "")
+                for path in sorted(parts_dir.glob("*.part"))
+            ]
+
+        return await asyncio.to_thread(_list)
+
+    async def complete_multipart_upload(  # type: ignore[override]
+        self, key: str, upload_id: str, parts: list[UploadedPart]
+    ) -> None:
+        """Concatenate the parts in order into the final object, then drop the session.
+
+        Raises :class:`UploadTooLargeError` if the parts add up to more than
+        ``MAX_UPLOAD_BYTES``.
+        """
+        parts_dir = self._parts_dir(key, upload_id)
+        numbers = sorted(part.part_number for part in parts)
+        if numbers != list(range(1, len(numbers) + 1)):
+            raise UploadSessionError("Parts must be numbered 1..N without gaps")
+        paths = [parts_dir / f"{number:05d}.part" for number in numbers]
+        missing = [path.stem for path in paths if not path.exists()]
+        if missing:
+            raise UploadSessionError(f"Parts not uploaded: {', '.join(missing)}")
+
+        async def _concatenate() -> AsyncIterator[bytes]:
+            for path in paths:
+                with path.open("rb") as f:
+                    while chunk := await asyncio.to_thread(f.read, _COPY_CHUNK_SIZE):
+                        yield chunk
+
+        await self.save_upload_stream(
+            key, _concatenate(), max_bytes=self.settings.max_upload_bytes
+        )
+        await asyncio.to_thread(shutil.rmtree, parts_dir, True)
 
-        await asyncio.to_thread(_write)
+    async def abort_multipart_upload(  # type: ignore[override]
+        self, key: str, upload_id: str
+    ) -> None:
+        parts_dir = self._parts_dir(key, upload_id)
+        await asyncio.to_thread(shutil.rmtree, parts_dir, True)
+
+    async def content_hash(self, key: str) -> str | None:  # type: ignore[override]
+        hash_path = self._hash_path(key)
+
+        def _read() -> str | None:
+            try:
+                return f"sha256:{hash_path.read_text(encoding='ascii').strip()}"
+            except FileNotFoundError:
+                return None
+
+        return await asyncio.to_thread(_read)
+
+    def accel_redirect_uri(self, key: str, prefix: str) -> str:
+        """URI of ``key`` under an internal nginx location aliased to the storage directory."""
+        self._key_path(key)  # reject keys escaping the base path
+        return prefix.rstrip("/") + "/" + quote(key)
 
     def open_for_download(self, key: str) -> Path:
+        """Stored file for ``key``; a ``.gz`` path holds gzip-compressed text."""
         path = self._key_path(key)
-        if not path.exists():
-            raise FileNotFoundError(key)
-        return path
+        for candidate in (path, _gz_path(path)):
+            if candidate.exists():
+                return candidate
+        raise FileNotFoundError(key)
 
     async def delete_object(self, key: str) -> None:  # type: ignore[override]
         target = self._key_path(key)
+        hash_path = self._hash_path(key)
 
         def _remove() -> None:
             if target.exists():
                 target.unlink()
+            _gz_path(target).unlink(missing_ok=True)
+            hash_path.unlink(missing_ok=True)
 
         await asyncio.to_thread(_remove)
 
+    async def iter_objects(  # type: ignore[override]
+        self, prefix: str
+    ) -> AsyncIterator[list[StoredObject]]:
+        root = self._key_path(prefix)
+
+        def _walk() -> Iterator[StoredObject]:
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    path = Path(dirpath) / filename
+                    try:
+                        stat = path.stat()
+                    except FileNotFoundError:
+                        continue
+                    yield StoredObject(
+                        path.relative_to(self.base_path).as_posix(),
+                        stat.st_size,
+                        datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                    )
+
+        # The walk advances one page per thread hop, so memory is bounded by a page.
+        objects = _walk()
+        while page := await asyncio.to_thread(list, islice(objects, S3_BATCH_SIZE)):
+            yield page
+
+    async def delete_objects(self, keys: list[str]) -> list[str]:  # type: ignore[override]
+        failed: list[str] = []
+        for key in keys:
+            try:
+                await self.delete_object(key)
+            except OSError:
+                failed.append(key)
+        return failed
+
+    async def purge_internal(self, cutoff: datetime, dry_run: bool = False) -> int:
+        """Remove upload sessions untouched since ``cutoff`` and hashes of deleted objects."""
+
+        def _purge() -> int:
+            removed = 0
+            sessions = self.base_path / _PARTS_DIR
+            for session in sessions.iterdir() if sessions.is_dir() else ():
+                modified = datetime.fromtimestamp(session.stat().st_mtime, timezone.utc)
+                if modified < cutoff:
+                    removed += 1
+                    if not dry_run:
+                        shutil.rmtree(session, ignore_errors=True)
+            hashes = self.base_path / _HASH_DIR
+            for dirpath, _, filenames in os.walk(hashes):
+                for filename in filenames:
+                    sidecar = Path(dirpath) / filename
+                    key = sidecar.relative_to(hashes).as_posix().removesuffix(".sha256")
+                    if not self._key_path(key).exists():
+                        removed += 1
+                        if not dry_run:
+                            sidecar.unlink(missing_ok=True)
+            return removed
+
+        return await asyncio.to_thread(_purge)
+
+
+def _gz_path(path: Path) -> Path:
+    return path.with_name(path.name + ".gz")
+
 
 _storage_service: StorageService | LocalStorageService | None = None
 
@@ -188,6 +698,10 @@ def get_storage_service() -> StorageService | LocalStorageService:
         settings = get_settings()
         if settings.storage_backend == "local":
             _storage_service = LocalStorageService()
+        elif settings.storage_backend == "s3_async":
+            from app.services.s3_async import AsyncS3StorageService
+
+            _storage_service = AsyncS3StorageService()
         else:
             _storage_service = StorageService()
     return _storage_service
@@ -196,3 +710,11 @@ def get_storage_service() -> StorageService | LocalStorageService:
 def reset_storage_service() -> None:
     global _storage_service
     _storage_service = None
+
+
+async def close_storage_service() -> None:
+    """Close the shared backend's connections and drop it; the next call builds a new one."""
+    global _storage_service
+    if _storage_service is not None:
+        await _storage_service.aclose()
+        _storage_service = None
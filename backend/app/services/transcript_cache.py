@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, TypeVar
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.db.types import as_utc
+from app.models import CachedTranscript
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Minimum spacing between eviction passes within one process.
+_EVICTION_INTERVAL = 60.0
+
+
+class CacheKey(NamedTuple):
+    content_hash: str
+    language: str
+    mode: str
+    backend: str
+
+
+class TranscriptCache:
+    """Finished transcripts keyed by media content hash and transcription options.
+
+    Entries live in the ``cachedtranscript`` table so every worker shares them.
+    :meth:`single_flight` additionally collapses identical concurrent work within a
+    process onto one call. Entries older than ``TRANSCRIPT_CACHE_MAX_AGE_SECONDS`` are
+    evicted, then least recently used ones until the total fits
+    ``TRANSCRIPT_CACHE_MAX_BYTES``.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] | None = None) -> None:
+        self.settings = get_settings()
+        self._session_factory = session_factory or get_session_factory()
+        self._inflight: dict[CacheKey, asyncio.Future] = {}
+        self._next_eviction_at = 0.0
+
+    async def get(self, key: CacheKey) -> tuple[str, str | None] | None:
+        now = datetime.now(timezone.utc)
+        async with self._session_factory() as session:
+            stmt = select(CachedTranscript).where(*_matches(key))
+            entry = (await session.execute(stmt)).scalar_one_or_none()
+            if entry is None:
+                return None
+            if as_utc(entry.created_at) < now - self._max_age:
+                return None
+            entry.last_used_at = now
+            result = (entry.plain_text, entry.diarized_json)
+            await session.commit()
+        return result
+
+    async def put(self, key: CacheKey, plain_text: str, diarized_json: str | None) -> None:
+        size = len(plain_text.encode("utf-8")) + len((diarized_json or "").encode("utf-8"))
+        now = datetime.now(timezone.utc)
+        async with self._session_factory() as session:
+            # Replace rather than upsert so an expired entry is refreshed in place.
+            await session.execute(delete(CachedTranscript).where(*_matches(key)))
+            session.add(
+                CachedTranscript(
+                    content_hash=key.content_hash,
+                    language=key.language,
+                    mode=key.mode,
+                    backend=key.backend,
+                    plain_text=plain_text,
+                    diarized_json=diarized_json,
+                    size_bytes=size,
+                    created_at=now,
+                    last_used_at=now,
+                )
+            )
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another worker stored the same transcript concurrently.
+                await session.rollback()
+        await self._maybe_evict()
+
+    async def single_flight(
+        self,
+        key: CacheKey,
+        factory: Callable[[], Awaitable[T]],
+        while_waiting: Callable[[], AbstractAsyncContextManager] = nullcontext,
+    ) -> T:
+        """Run ``factory`` once for concurrent callers with the same key.
+
+        Followers wait inside ``while_waiting()`` and receive the leader's result or
+        exception. A ``None`` result is not shared, and neither is the leader being
+        cancelled: in both cases a follower runs ``factory`` itself.
+        """
+        while (leader := self._inflight.get(key)) is not None:
+            try:
+                async with while_waiting():
+                    result = await asyncio.shield(leader)
+            except asyncio.CancelledError:
+                if not leader.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                continue
+            if result is not None:
+                return result
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()  # retrieved; followers re-raise it themselves
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def evict(self) -> int:
+        """Drop expired entries, then the least recently used beyond the size budget."""
+        removed = 0
+        async with self._session_factory() as session:
+            expired = await session.execute(
+                delete(CachedTranscript).where(
+                    CachedTranscript.created_at < datetime.now(timezone.utc) - self._max_age
+                )
+            )
+            removed += expired.rowcount
+
+            max_bytes = self.settings.transcript_cache_max_bytes
+            total_stmt = select(func.coalesce(func.sum(CachedTranscript.size_bytes), 0))
+            total = (await session.execute(total_stmt)).scalar_one()
+            while total > max_bytes:
+                oldest = (
+                    await session.execute(
+                        select(CachedTranscript.id, CachedTranscript.size_bytes)
+                        .order_by(CachedTranscript.last_used_at)
+                        .limit(100)
+                    )
+                ).all()
+                if not oldest:
+                    break
+                victims: list[str] = []
+                for entry_id, size in oldest:
+                    if total <= max_bytes:
+                        break
+                    victims.append(entry_id)
+                    total -= size
+                await session.execute(
+                    delete(CachedTranscript).where(CachedTranscript.id.in_(victims))
+                )
+                removed += len(victims)
+            await session.commit()
+        if removed:
+            logger.info("Evicted %d cached transcripts", removed)
+        return removed
+
+    async def _maybe_evict(self) -> None:
+        now = time.monotonic()
+        if now < self._next_eviction_at:
+            return
+        self._next_eviction_at = now + _EVICTION_INTERVAL
+        try:
+            await self.evict()
+        except Exception:
+            logger.warning("Transcript cache eviction failed", exc_info=True)
+
+    @property
+    def _max_age(self) -> timedelta:
+        return timedelta(seconds=self.settings.transcript_cache_max_age_seconds)
+
+
+def _matches(key: CacheKey):
+    return (
+        CachedTranscript.content_hash == key.content_hash,
+        CachedTranscript.language == key.language,
+        CachedTranscript.mode == key.mode,
+        CachedTranscript.backend == key.backend,
+    )
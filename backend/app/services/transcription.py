@@ -5,24 +5,42 @@ import json
 import logging
 import ssl
 import tempfile
+from dataclasses import asdict
 from datetime import datetime, timezone
 from pathlib import Path
+from uuid import uuid4
 
-import assemblyai as aai
 import httpx
-from sqlalchemy import select
+from sqlalchemy import insert, update
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import selectinload
 
 from app.core.config import get_settings
 from app.db.session import get_session_factory
-from app.models import Transcript, TranscriptionJob, TranscriptionStatus, User
+from app.models import JobPriority, Transcript, TranscriptionJob, TranscriptionStatus, User
 from app.schemas import TranscriptionJobCreate
+from app.services.admission import AdmissionController
+from app.services.assemblyai import AssemblyAIClient, build_transcription_config
+from app.services.chunking import (
+    Chunk,
+    shift_transcript,
+    split_recording,
+    stitch_transcripts,
+)
+from app.services.media import (
+    detect_silences,
+    extract_audio,
+    ffmpeg_available,
+    probe_duration,
+    speech_bounds,
+)
 from app.services.storage import (
     LocalStorageService,
     StorageService,
     get_storage_service,
 )
+from app.services.transcript_cache import CacheKey, TranscriptCache
+from app.tasks.poller import ProviderPoller
 from app.tasks.runner import TranscriptionRunner
 
 logger = logging.getLogger(__name__)
@@ -33,12 +51,14 @@ class TranscriptionService:
         self, runner: TranscriptionRunner, storage: StorageService | None = None
     ) -> None:
         self.settings = get_settings()
-        if self.settings.transcription_backend == "assemblyai":
-            aai.settings.api_key = self.settings.assemblyai_api_key
         self.runner = runner
         self.storage = storage or get_storage_service()
         self._session_factory: async_sessionmaker[AsyncSession] = get_session_factory()
-        self.runner.set_startup_hook(self._recover_pending_jobs)
+        self.admission = AdmissionController()
+        self.cache = TranscriptCache()
+        self._provider: AssemblyAIClient | None = None
+        self.poller = ProviderPoller(self._provider_client)
+        self.runner.set_job_handler(self._process_job)
 
     async def create_job(
         self,
@@ -46,10 +66,13 @@ class TranscriptionService:
         user: User,
         payload: TranscriptionJobCreate,
     ) -> TranscriptionJob:
+        """Queue a job; raises ``QueueFullError`` when admission control rejects it."""
+        await self.admission.check(session, user.id)
         job = TranscriptionJob(
             user_id=user.id,
             language=payload.language,
             mode=payload.mode,
+            priority=JobPriority[payload.priority.upper()],
             source_object_key=payload.object_key,
             status=TranscriptionStatus.PENDING,
         )
@@ -57,39 +80,73 @@ class TranscriptionService:
         await session.commit()
         await session.refresh(job)
 
-        try:
-            self.runner.submit(lambda: self._process_job(job.id))
-        except RuntimeError:
-            logger.warning(
-                "Transcription runner not ready; job %s left pending", job.id
-            )
+        # The job row is the queue entry; wake the local dispatcher if one is running.
+        self.runner.notify()
         return job
 
-    async def _recover_pending_jobs(self) -> None:
+    async def create_jobs(
+        self,
+        session: AsyncSession,
+        user: User,
+        payloads: list[TranscriptionJobCreate],
+        awaiting_upload: bool = False,
+    ) -> list[TranscriptionJob]:
+        """Queue several jobs with one admission check, one INSERT and one commit.
+
+        With ``awaiting_upload`` the jobs are parked until :meth:`activate_uploads` sees
+        their media arrive.
+        """
+        await self.admission.check(session, user.id, new_jobs=len(payloads))
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": str(uuid4()),
+                "user_id": user.id,
+                "language": payload.language,
+                "mode": payload.mode,
+                "priority": JobPriority[payload.priority.upper()],
+                "source_object_key": payload.object_key,
+                "status": (
+                    TranscriptionStatus.AWAITING_UPLOAD
+                    if awaiting_upload
+                    else TranscriptionStatus.PENDING
+                ),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for payload in payloads
+        ]
+        await session.execute(insert(TranscriptionJob), rows)
+        await session.commit()
+
+        if not awaiting_upload:
+            self.runner.notify()
+        return [TranscriptionJob(**row) for row in rows]
+
+    async def activate_uploads(self, object_keys: list[str]) -> int:
+        """Queue the jobs waiting for these uploads; returns how many were queued."""
+        if not object_keys:
+            return 0
         async with self._session_factory() as session:
-            stmt = select(TranscriptionJob.id).where(
-                TranscriptionJob.status.in_(
-                    [TranscriptionStatus.PENDING, TranscriptionStatus.PROCESSING]
+            result = await session.execute(
+                update(TranscriptionJob)
+                .where(
+                    TranscriptionJob.source_object_key.in_(object_keys),
+                    TranscriptionJob.status == TranscriptionStatus.AWAITING_UPLOAD,
+                )
+                .values(
+                    status=TranscriptionStatus.PENDING,
+                    updated_at=datetime.now(timezone.utc),
                 )
             )
-            result = await session.execute(stmt)
-            job_ids = [row[0] for row in result.all()]
-
-        if job_ids:
-            logger.info("Recovering %d pending transcription jobs", len(job_ids))
-        for job_id in job_ids:
-            try:
-                self.runner.submit(lambda job_id=job_id: self._process_job(job_id))
-            except RuntimeError:
-                logger.error("Runner not available to recover job %s", job_id)
+            await session.commit()
+        if result.rowcount:
+            self.runner.notify()
+        return result.rowcount
 
     async def _process_job(self, job_id: str) -> None:
         async with self._session_factory() as session:
-            job = await session.get(
-                TranscriptionJob,
-                job_id,
-                options=[selectinload(TranscriptionJob.transcript)],
-            )
+            job = await session.get(TranscriptionJob, job_id)
             if not job:
                 logger.warning("Job %s not found", job_id)
                 return
@@ -102,29 +159,103 @@ class TranscriptionService:
             job.status = TranscriptionStatus.PROCESSING
             job.error_message = None
             job.updated_at = datetime.now(timezone.utc)
+            if job.content_hash is None:
+                job.content_hash = await self._content_hash(source_key)
+            cache_key = self._cache_key(job)
             await session.commit()
 
+        if cache_key is not None:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                logger.info("Job %s served from the transcript cache", job_id)
+                await self._store_result(job_id, source_key, *cached)
+                return
+
         try:
-            transcript_text, diarized_json = await self._run_transcription(job_id)
+            if cache_key is None:
+                result = await self._run_transcription(job_id)
+            else:
+                # Identical jobs running here at the same time share one provider run;
+                # waiting for it needs no execution slot.
+                result = await self.cache.single_flight(
+                    cache_key,
+                    lambda: self._run_transcription(job_id),
+                    self.runner.yield_slot,
+                )
+        except asyncio.CancelledError:
+            # Shutdown drain expired or the lease was lost. The job goes back to the queue
+            # with its provider transcript id persisted, so the next run resumes from there.
+            logger.info("Transcription job %s interrupted", job_id)
+            raise
         except Exception as exc:
             logger.exception("Transcription job %s failed", job_id)
-            async with self._session_factory() as session:
-                job = await session.get(TranscriptionJob, job_id)
-                if job:
-                    job.status = TranscriptionStatus.FAILED
-                    job.error_message = str(exc)
-                    job.updated_at = datetime.now(timezone.utc)
-                    await session.commit()
-            await self._cleanup_source_object(source_key)
+            await self._mark_failed(job_id, source_key, exc)
             return
 
-        # Persist results
+        if result is None:
+            # Handed off to the provider; the webhook completes the job.
+            return
+        transcript_text, diarized_json = result
+        await self._store_result(job_id, source_key, transcript_text, diarized_json)
+
+    async def complete_provider_job(self, job_id: str) -> None:
+        """Fetch a finished provider transcript and persist it (webhook completion path).
+
+        Jobs that are already finished are left untouched, so repeated deliveries are
+        harmless. Provider or network errors propagate; the submission fallback re-queues
+        the job if no later delivery succeeds.
+        """
         async with self._session_factory() as session:
-            job = await session.get(
-                TranscriptionJob,
+            job = await session.get(TranscriptionJob, job_id)
+            if not job:
+                logger.warning("Job %s not found for webhook", job_id)
+                return
+            if job.status in (TranscriptionStatus.COMPLETED, TranscriptionStatus.FAILED):
+                logger.info("Job %s already finished; ignoring webhook", job_id)
+                return
+            source_key = job.source_object_key
+            mode = job.mode
+            provider_job_id = job.provider_job_id
+            audio_offset = job.audio_offset_seconds or 0.0
+
+        transcript = await self._provider_client().get(provider_job_id)
+        if transcript.get("status") not in ("completed", "error"):
+            logger.warning(
+                "Webhook for job %s arrived while transcript %s is %s",
                 job_id,
-                options=[selectinload(TranscriptionJob.transcript)],
+                provider_job_id,
+                transcript.get("status"),
             )
+            return
+        try:
+            transcript_text, diarized_json = self._format_transcript(
+                shift_transcript(transcript, audio_offset), mode
+            )
+        except RuntimeError as exc:
+            logger.warning("Transcription job %s failed at provider: %s", job_id, exc)
+            await self._mark_failed(job_id, source_key, exc)
+            return
+        await self._store_result(job_id, source_key, transcript_text, diarized_json)
+
+    async def _mark_failed(self, job_id: str, source_key: str, exc: Exception) -> None:
+        async with self._session_factory() as session:
+            job = await session.get(TranscriptionJob, job_id)
+            if job:
+                job.status = TranscriptionStatus.FAILED
+                job.error_message = str(exc)
+                job.updated_at = datetime.now(timezone.utc)
+                await session.commit()
+        await self._cleanup_source_object(source_key)
+
+    async def _store_result(
+        self,
+        job_id: str,
+        source_key: str,
+        transcript_text: str,
+        diarized_json: str | None,
+    ) -> None:
+        async with self._session_factory() as session:
+            job = await session.get(TranscriptionJob, job_id)
             if not job:
                 logger.warning("Job %s missing when saving results", job_id)
                 return
@@ -148,6 +279,7 @@ class TranscriptionService:
             job.status = TranscriptionStatus.COMPLETED
             job.result_object_key = result_key
             job.updated_at = datetime.now(timezone.utc)
+            cache_key = self._cache_key(job)
 
             transcript = job.transcript
             if transcript is None:
@@ -163,9 +295,30 @@ class TranscriptionService:
                 transcript.updated_at = datetime.now(timezone.utc)
 
             await session.commit()
+
+        if cache_key is not None:
+            try:
+                await self.cache.put(cache_key, transcript_text, diarized_json)
+            except Exception:
+                logger.warning("Failed to cache transcript of job %s", job_id, exc_info=True)
         await self._cleanup_source_object(source_key)
 
-    async def _run_transcription(self, job_id: str) -> tuple[str, str | None]:
+    def _cache_key(self, job: TranscriptionJob) -> CacheKey | None:
+        if not self.settings.transcript_cache_enabled or not job.content_hash:
+            return None
+        return CacheKey(
+            job.content_hash, job.language, job.mode, self.settings.transcription_backend
+        )
+
+    async def _content_hash(self, key: str) -> str | None:
+        try:
+            return await self.storage.content_hash(key)
+        except Exception:
+            logger.warning("Could not fingerprint source object %s", key, exc_info=True)
+            return None
+
+    async def _run_transcription(self, job_id: str) -> tuple[str, str | None] | None:
+        """Transcribe a claimed job; ``None`` means it was handed off to the webhook."""
         async with self._session_factory() as session:
             job = await session.get(TranscriptionJob, job_id)
             if not job:
@@ -174,114 +327,347 @@ class TranscriptionService:
             source_key = job.source_object_key
             language = job.language
             mode = job.mode
-
-            if mode == "mono":
-                speaker_labels = False  # no diarization in mono mode
-                speakers_expected = None
-            elif mode == "dialogue":
-                speaker_labels = True
-                speakers_expected = 2
-            else:  # "multi"
-                speaker_labels = True
-                speakers_expected = None
+            provider_job_id = job.provider_job_id
+            provider_chunks = _load_chunks(job.provider_chunks)
+            audio_offset = job.audio_offset_seconds or 0.0
+            audio_seconds = job.audio_duration_seconds
 
         if self.settings.transcription_backend == "stub":
-            with tempfile.TemporaryDirectory() as tmpdir:
-                local_path = Path(tmpdir) / "source"
-                await self.storage.download_to_path(source_key, local_path)
+            async with self.storage.local_file(source_key) as local_path:
                 return await self._run_stub_transcription(local_path)
 
-        if language == "auto":
-            config = aai.TranscriptionConfig(
-                language_detection=True,
-                speaker_labels=speaker_labels,
-                speakers_expected=speakers_expected,
+        if provider_chunks or (not provider_job_id and self._chunking_available()):
+            return await self._run_chunked(job_id, source_key, language, mode, provider_chunks)
+
+        provider = self._provider_client()
+        webhook_url = self.settings.assemblyai_webhook_url
+        config = build_transcription_config(
+            language, mode, webhook_url, self.settings.assemblyai_webhook_secret
+        )
+
+        async def _submit_once() -> dict:
+            nonlocal audio_offset, audio_seconds
+            if self._preprocessing_available() or isinstance(self.storage, LocalStorageService):
+                with tempfile.TemporaryDirectory() as tmpdir:
+                    async with self.storage.local_file(source_key) as local_path:
+                        upload_path, audio_offset, audio_seconds = await self._preprocess(
+                            job_id, local_path, Path(tmpdir)
+                        )
+                        audio_url = await provider.upload(upload_path)
+            else:
+                audio_url = self.storage.create_presigned_get(
+                    source_key,
+                    expires_in=self.settings.assemblyai_presigned_ttl,
+                )
+            return await provider.submit(audio_url, config)
+
+        if provider_job_id:
+            # A previous run already submitted this media; resume polling instead of
+            # uploading and paying for a second transcription.
+            logger.info(
+                "Resuming AssemblyAI transcript %s for job %s", provider_job_id, job_id
             )
         else:
-            config = aai.TranscriptionConfig(
-                language_code=language,
-                speaker_labels=speaker_labels,
-                speakers_expected=speakers_expected,
-            )
+            max_attempts = max(1, self.settings.assemblyai_tls_retries)
+            submitted = None
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    submitted = await _submit_once()
+                    break
+                except (httpx.ConnectError, ssl.SSLCertVerificationError) as exc:
+                    message = str(exc)
+                    is_hostname_issue = "certificate verify failed" in message.lower()
+                    if attempt >= max_attempts or not is_hostname_issue:
+                        raise
+                    wait_seconds = min(2**attempt, 10)
+                    logger.warning(
+                        "AssemblyAI TLS handshake failed for job %s (attempt %d/%d): %s. Retrying in %ss",
+                        job_id,
+                        attempt,
+                        max_attempts,
+                        message,
+                        wait_seconds,
+                    )
+                    await asyncio.sleep(wait_seconds)
+                except Exception:
+                    # Any non-TLS failure should surface immediately.
+                    raise
 
-        async def _transcribe_once() -> aai.Transcript:
-            transcriber = aai.Transcriber()
-            if isinstance(self.storage, LocalStorageService):
-                with tempfile.TemporaryDirectory() as tmpdir:
-                    local_path = Path(tmpdir) / "source"
-                    await self.storage.download_to_path(source_key, local_path)
-                    return await asyncio.to_thread(
-                        transcriber.transcribe,
-                        str(local_path),
-                        config,
+            if submitted is None or not submitted.get("id"):
+                raise RuntimeError(
+                    "AssemblyAI transcription did not return a result after retries"
+                )
+            provider_job_id = submitted["id"]
+            await self._record_provider_job(job_id, provider_job_id)
+            if webhook_url:
+                # If the row already moved on (an early webhook finished it, or the lease
+                # was reaped) whoever owns it now completes the job.
+                if await self._mark_submitted(job_id):
+                    logger.info(
+                        "Job %s submitted as AssemblyAI transcript %s; awaiting webhook",
+                        job_id,
+                        provider_job_id,
                     )
-            audio_url = self.storage.create_presigned_get(
-                source_key,
-                expires_in=self.settings.assemblyai_presigned_ttl,
-            )
+                return None
 
-            def _run() -> aai.Transcript:
-                return transcriber.transcribe(audio_url, config=config)
+        # Waiting on AssemblyAI needs no local resources; let another job use the slot.
+        async with self.runner.yield_slot():
+            transcript = await self.poller.wait(provider_job_id, audio_seconds=audio_seconds)
+        return self._format_transcript(shift_transcript(transcript, audio_offset), mode)
 
-            return await asyncio.to_thread(_run)
+    async def _run_chunked(
+        self,
+        job_id: str,
+        source_key: str,
+        language: str,
+        mode: str,
+        saved: list[tuple[Chunk, str | None]],
+    ) -> tuple[str, str | None]:
+        """Transcribe overlapping chunks of the recording concurrently and stitch them.
+
+        ``saved`` is the chunk plan a previous run recorded. Once every chunk has a
+        transcript id, polling resumes without touching the media; otherwise chunks
+        already submitted keep their transcript and only the rest are uploaded.
+        """
+        if saved and all(transcript_id for _, transcript_id in saved):
+            logger.info("Resuming %d chunk transcripts for job %s", len(saved), job_id)
+            chunks = [chunk for chunk, _ in saved]
+            transcript_ids = [transcript_id for _, transcript_id in saved]
+            audio_offset = 0.0
+        else:
+            chunks, transcript_ids, audio_offset = await self._submit_chunks(
+                job_id, source_key, language, mode, saved
+            )
 
-        max_attempts = max(1, self.settings.assemblyai_tls_retries)
-        transcript = None
-        for attempt in range(1, max_attempts + 1):
-            try:
-                transcript = await _transcribe_once()
-                break
-            except (httpx.ConnectError, ssl.SSLCertVerificationError) as exc:
-                message = str(exc)
-                is_hostname_issue = "certificate verify failed" in message.lower()
-                if attempt >= max_attempts or not is_hostname_issue:
-                    raise
-                wait_seconds = min(2**attempt, 10)
-                logger.warning(
-                    "AssemblyAI TLS handshake failed for job %s (attempt %d/%d): %s. Retrying in %ss",
-                    job_id,
-                    attempt,
-                    max_attempts,
-                    message,
-                    wait_seconds,
+        async with self.runner.yield_slot():
+            transcripts = await asyncio.gather(
+                *(
+                    self.poller.wait(transcript_id, audio_seconds=chunk.end - chunk.start)
+                    for transcript_id, chunk in zip(transcript_ids, chunks)
                 )
-                await asyncio.sleep(wait_seconds)
-            except Exception:
-                # Any non-TLS failure should surface immediately.
-                raise
-
-        if transcript is None:
-            raise RuntimeError(
-                "AssemblyAI transcription did not return a result after retries"
             )
+        stitched = stitch_transcripts(chunks, transcripts)
+        return self._format_transcript(shift_transcript(stitched, audio_offset), mode)
+
+    async def _submit_chunks(
+        self,
+        job_id: str,
+        source_key: str,
+        language: str,
+        mode: str,
+        saved: list[tuple[Chunk, str | None]],
+    ) -> tuple[list[Chunk], list[str], float]:
+        """Split the recording and submit every chunk without a transcript yet.
+
+        Returns the chunk plan, one transcript id per chunk and the seconds trimmed off
+        the start (only when the recording fits a single chunk).
+        """
+        provider = self._provider_client()
+        # Chunks are always polled: a webhook for one chunk cannot complete the job.
+        config = build_transcription_config(language, mode)
+        limit = asyncio.Semaphore(max(1, self.settings.chunk_max_parallel))
+        save_lock = asyncio.Lock()
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            workdir = Path(tmpdir)
+            # Several ffmpeg passes read the source; keep it stable for all of them.
+            async with self.storage.local_file(source_key, isolate=True) as source:
+                chunks, segments = await split_recording(source, workdir)
+                if len(segments) == 1:
+                    upload_path, audio_offset, _ = await self._preprocess(job_id, source, workdir)
+                    async with limit:
+                        audio_url = await provider.upload(upload_path)
+                        transcript_id = (await provider.submit(audio_url, config))["id"]
+                    await self._record_provider_job(job_id, transcript_id)
+                    return chunks, [transcript_id], audio_offset
+
+                await self._record_media_stats(
+                    job_id,
+                    source_bytes=source.stat().st_size,
+                    processed_bytes=sum(path.stat().st_size for path in segments),
+                    duration=chunks[-1].end,
+                )
+                transcript_ids: list[str | None] = [None] * len(chunks)
+                if [chunk for chunk, _ in saved] == chunks:
+                    transcript_ids = [transcript_id for _, transcript_id in saved]
+                elif saved:
+                    logger.warning(
+                        "Chunk plan of job %s changed since its last run; resubmitting", job_id
+                    )
 
-        if transcript.status == "error":
-            raise RuntimeError(transcript.error or "Transcription failed")
+                async def _submit(index: int, segment: Path) -> None:
+                    if transcript_ids[index]:
+                        return
+                    async with limit:
+                        audio_url = await provider.upload(segment)
+                        transcript_ids[index] = (await provider.submit(audio_url, config))["id"]
+                    # Saved after every submission; the lock keeps writes in order so
+                    # the last one always holds every id.
+                    async with save_lock:
+                        await self._record_provider_chunks(job_id, chunks, transcript_ids)
+
+                await asyncio.gather(*(_submit(i, path) for i, path in enumerate(segments)))
+
+        logger.info(
+            "Job %s split into %d chunks: %s", job_id, len(chunks), ", ".join(transcript_ids)
+        )
+        return chunks, transcript_ids, 0.0
+
+    async def _preprocess(
+        self, job_id: str, source: Path, workdir: Path
+    ) -> tuple[Path, float, float | None]:
+        """Shrink ``source`` to compact mono speech audio when pre-processing is enabled.
+
+        Returns the file to upload, the seconds trimmed from its start (provider
+        timestamps are shifted back by this much) and the audio duration if known.
+        """
+        source_bytes = source.stat().st_size
+        if not self._preprocessing_available():
+            await self._record_media_stats(job_id, source_bytes=source_bytes)
+            return source, 0.0, None
+
+        duration = await probe_duration(source)
+        start, end = 0.0, duration
+        if self.settings.preprocess_trim_silence:
+            start, end = speech_bounds(duration, await detect_silences(source, duration))
+        target = workdir / "audio.ogg"
+        await extract_audio(
+            source, target, start=start or None, end=end if end < duration else None
+        )
+        processed_bytes = target.stat().st_size
+        await self._record_media_stats(
+            job_id,
+            source_bytes=source_bytes,
+            processed_bytes=processed_bytes,
+            duration=end - start,
+            offset=start,
+        )
+        logger.info(
+            "Job %s audio pre-processed: %d -> %d bytes (%.0f%% saved), %.1fs of %.1fs kept",
+            job_id,
+            source_bytes,
+            processed_bytes,
+            100 * (1 - processed_bytes / source_bytes) if source_bytes else 0,
+            end - start,
+            duration,
+        )
+        return target, start, end - start
 
-        text = transcript.text or ""
+    async def _record_media_stats(
+        self,
+        job_id: str,
+        source_bytes: int,
+        processed_bytes: int | None = None,
+        duration: float | None = None,
+        offset: float = 0.0,
+    ) -> None:
+        async with self._session_factory() as session:
+            job = await session.get(TranscriptionJob, job_id)
+            if job:
+                job.source_bytes = source_bytes
+                job.processed_bytes = processed_bytes
+                job.audio_duration_seconds = duration
+                job.audio_offset_seconds = offset
+                await session.commit()
+
+    def _preprocessing_available(self) -> bool:
+        if not self.settings.preprocess_audio:
+            return False
+        if not ffmpeg_available():
+            logger.warning("PREPROCESS_AUDIO is set but ffmpeg is missing; uploading as is")
+            return False
+        return True
+
+    def _chunking_available(self) -> bool:
+        if not self.settings.chunking_enabled:
+            return False
+        if not ffmpeg_available():
+            logger.warning("CHUNKING_ENABLED is set but ffmpeg is missing; not chunking")
+            return False
+        return True
+
+    def _format_transcript(self, transcript: dict, mode: str) -> tuple[str, str | None]:
+        if transcript.get("status") == "error":
+            raise RuntimeError(transcript.get("error") or "Transcription failed")
+
+        text = transcript.get("text") or ""
+        utterances = transcript.get("utterances") or []
         diarized_json = None
-        if transcript.utterances:
+        if utterances:
             diarized_json = json.dumps(
                 [
                     {
-                        "speaker": utterance.speaker,
-                        "start": utterance.start,
-                        "end": utterance.end,
-                        "text": utterance.text,
+                        "speaker": utterance["speaker"],
+                        "start": utterance["start"],
+                        "end": utterance["end"],
+                        "text": utterance["text"],
                     }
-                    for utterance in transcript.utterances
+                    for utterance in utterances
                 ],
                 ensure_ascii=False,
             )
-            if speaker_labels and mode in ("dialogue", "multi"):
+            if mode in ("dialogue", "multi"):
                 # Build a speaker-labelled transcript for dialog/multi so the saved TXT is readable.
                 text = "\n".join(
-                    f"Speaker {utterance.speaker}: {utterance.text}"
-                    for utterance in transcript.utterances
+                    f"Speaker {utterance['speaker']}: {utterance['text']}"
+                    for utterance in utterances
                 )
 
         return text, diarized_json
 
+    async def _record_provider_job(self, job_id: str, provider_job_id: str) -> None:
+        """Persist the provider transcript id as soon as it exists so work survives restarts."""
+        async with self._session_factory() as session:
+            job = await session.get(TranscriptionJob, job_id)
+            if job:
+                job.provider_job_id = provider_job_id
+                await session.commit()
+
+    async def _record_provider_chunks(
+        self, job_id: str, chunks: list[Chunk], transcript_ids: list[str | None]
+    ) -> None:
+        """Persist the chunk plan with the transcript ids submitted so far."""
+        async with self._session_factory() as session:
+            job = await session.get(TranscriptionJob, job_id)
+            if job:
+                job.provider_chunks = json.dumps(
+                    [
+                        {**asdict(chunk), "id": transcript_id}
+                        for chunk, transcript_id in zip(chunks, transcript_ids)
+                    ]
+                )
+                await session.commit()
+
+    async def _mark_submitted(self, job_id: str) -> bool:
+        """Move a running job to ``submitted`` so its lease and slot are released."""
+        async with self._session_factory() as session:
+            result = await session.execute(
+                update(TranscriptionJob)
+                .where(
+                    TranscriptionJob.id == job_id,
+                    TranscriptionJob.status == TranscriptionStatus.PROCESSING,
+                )
+                .values(
+                    status=TranscriptionStatus.SUBMITTED,
+                    updated_at=datetime.now(timezone.utc),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return result.rowcount == 1
+
+    def _provider_client(self) -> AssemblyAIClient:
+        if self._provider is None:
+            self._provider = AssemblyAIClient()
+        return self._provider
+
+    async def aclose(self) -> None:
+        """Stop the poller and close provider connections; call after the runner stops."""
+        await self.poller.aclose()
+        if self._provider is not None:
+            await self._provider.aclose()
+            self._provider = None
+
     async def _run_stub_transcription(self, local_path: Path) -> tuple[str, str | None]:
         def _read_text() -> str:
             try:
@@ -316,3 +702,13 @@ class TranscriptionService:
             if remainder and len(prefix) >= 8:  # heuristic to catch UUID-like prefix
                 name = remainder
         return name
+
+
+def _load_chunks(value: str | None) -> list[tuple[Chunk, str | None]]:
+    """Parse :attr:`TranscriptionJob.provider_chunks` into (chunk, transcript id) pairs."""
+    if not value:
+        return []
+    return [
+        (Chunk(**{field: entry[field] for field in Chunk.__dataclass_fields__}), entry["id"])
+        for entry in json.loads(value)
+    ]
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import get_settings
+from app.services.assemblyai import AssemblyAIClient, AssemblyAIError
+
+logger = logging.getLogger(__name__)
+
+_FINAL_STATUSES = ("completed", "error")
+# AssemblyAI typically finishes in a fraction of the audio length; the first poll for a
+# transcript of known duration is scheduled around that point.
+_EXPECTED_PROCESSING_RATIO = 0.25
+# Without a better estimate, wait roughly this share of the elapsed time between polls.
+_BACKOFF_RATIO = 0.1
+_LIST_LIMIT = 200
+# Transcripts due this soon are polled along with those already due, so the batch
+# does not drift apart into single fetches as their intervals diverge.
+_COALESCE_SECONDS = 1.0
+
+
+@dataclass
+class _Watch:
+    future: asyncio.Future
+    submitted_at: float
+    next_poll_at: float
+    audio_seconds: float | None = None
+    waiters: int = 0
+    # Consecutive failed polls; each one doubles the next interval.
+    failures: int = 0
+
+
+class ProviderPoller:
+    """Polls the status of every in-flight provider transcript from a single loop.
+
+    Jobs register a transcript id and await the result; nothing is held while they
+    wait. Each transcript gets an adaptive interval (first poll near the expected
+    completion time when the audio length is known, then backing off with elapsed
+    time). When several transcripts are due at once, one listing request tells which of
+    them are still queued or processing, and only settled ones are fetched in full.
+    """
+
+    def __init__(self, client_factory: Callable[[], AssemblyAIClient]) -> None:
+        self.settings = get_settings()
+        self._client_factory = client_factory
+        self._watches: dict[str, _Watch] = {}
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self.requests = 0
+
+    async def wait(self, transcript_id: str, audio_seconds: float | None = None) -> dict[str, Any]:
+        """Return the transcript once it is completed or errored."""
+        watch = self._watches.get(transcript_id)
+        if watch is None:
+            now = time.monotonic()
+            watch = _Watch(
+                future=asyncio.get_running_loop().create_future(),
+                submitted_at=now,
+                next_poll_at=now + self._interval(0.0, audio_seconds),
+                audio_seconds=audio_seconds,
+            )
+            self._watches[transcript_id] = watch
+            self._ensure_running()
+        watch.waiters += 1
+        try:
+            return await asyncio.shield(watch.future)
+        finally:
+            watch.waiters -= 1
+            if not watch.waiters and not watch.future.done():
+                # Every waiter was cancelled; stop polling on their behalf.
+                self._watches.pop(transcript_id, None)
+
+    @property
+    def tracked(self) -> int:
+        return len(self._watches)
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self._watches:
+            now = time.monotonic()
+            next_at = min(watch.next_poll_at for watch in self._watches.values())
+            if next_at <= now:
+                due = [
+                    tid
+                    for tid, watch in self._watches.items()
+                    if watch.next_poll_at <= now + _COALESCE_SECONDS
+                ]
+                try:
+                    await self._poll(due)
+                except Exception:
+                    logger.exception("Provider status poll failed")
+                    for transcript_id in due:
+                        self._reschedule(transcript_id, failed=True)
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), next_at - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, due: list[str]) -> None:
+        client = self._client_factory()
+        statuses: dict[str, str] = {}
+        if len(due) > 1:
+            try:
+                listing = await client.list_transcripts(limit=_LIST_LIMIT)
+                self.requests += 1
+                statuses = {item["id"]: item.get("status") for item in listing}
+            except Exception:
+                logger.warning("Listing provider transcripts failed", exc_info=True)
+
+        async def _poll_one(transcript_id: str) -> None:
+            if statuses.get(transcript_id) in ("queued", "processing"):
+                self._reschedule(transcript_id)
+                return
+            try:
+                transcript = await client.get(transcript_id)
+                self.requests += 1
+            except AssemblyAIError as exc:
+                if not exc.retryable:
+                    self._settle(transcript_id, exc)
+                    return
+                logger.warning("Polling transcript %s failed: %s", transcript_id, exc)
+                self._reschedule(transcript_id, failed=True)
+                return
+            except Exception:
+                logger.warning("Polling transcript %s failed", transcript_id, exc_info=True)
+                self._reschedule(transcript_id, failed=True)
+                return
+            if transcript.get("status") in _FINAL_STATUSES:
+                self._settle(transcript_id, transcript)
+            else:
+                self._reschedule(transcript_id)
+
+        await asyncio.gather(*(_poll_one(transcript_id) for transcript_id in due))
+
+    def _settle(self, transcript_id: str, result: dict[str, Any] | Exception) -> None:
+        watch = self._watches.pop(transcript_id, None)
+        if watch is None or watch.future.done():
+            return
+        if isinstance(result, Exception):
+            watch.future.set_exception(result)
+        else:
+            watch.future.set_result(result)
+
+    def _reschedule(self, transcript_id: str, failed: bool = False) -> None:
+        watch = self._watches.get(transcript_id)
+        if watch is None:
+            return
+        watch.failures = watch.failures + 1 if failed else 0
+        now = time.monotonic()
+        interval = self._interval(now - watch.submitted_at, watch.audio_seconds)
+        if watch.failures:
+            interval = min(
+                interval * 2**watch.failures, self.settings.assemblyai_poll_max_interval
+            )
+        watch.next_poll_at = now + interval
+
+    def _interval(self, elapsed: float, audio_seconds: float | None) -> float:
+        shortest = self.settings.assemblyai_poll_interval
+        longest = self.settings.assemblyai_poll_max_interval
+        if audio_seconds:
+            expected = audio_seconds * _EXPECTED_PROCESSING_RATIO
+            if elapsed < expected:
+                return min(max(expected - elapsed, shortest), longest)
+        return min(max(elapsed * _BACKOFF_RATIO, shortest), longest)
@@ -0,0 +1,417 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from sqlalchemy import and_, func, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.db.types import as_utc
+from app.models import TranscriptionJob, TranscriptionStatus
+
+logger = logging.getLogger(__name__)
+
+# Order of a user's claimable jobs: higher priority first, then oldest.
+_HEAD_ORDER = (
+    TranscriptionJob.priority.desc(),
+    TranscriptionJob.created_at,
+    TranscriptionJob.id,
+)
+
+
+@dataclass(frozen=True)
+class QueuedJob:
+    """Head-of-line job for one user, as seen by the scheduler."""
+
+    id: str
+    user_id: str
+    priority: int
+    created_at: datetime
+    # Jobs of this user currently leased by any worker.
+    user_running: int = 0
+
+
+def generate_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class JobQueue:
+    """Durable transcription queue backed by the ``transcriptionjob`` table.
+
+    Workers claim a pending job by taking a lease on its row and then heartbeat it while
+    the job runs. PostgreSQL claims use ``FOR UPDATE SKIP LOCKED`` so replicas never
+    block each other; other dialects (SQLite) serialise claims behind a lock and take
+    the lease with a compare-and-set update. Processing jobs only return to the queue
+    when their owner releases them or when :meth:`reap_stale` finds their heartbeat
+    expired, so a live worker's job is never handed to a second worker.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        worker_id: str | None = None,
+    ) -> None:
+        self.settings = get_settings()
+        self._session_factory = session_factory or get_session_factory()
+        self.worker_id = worker_id or generate_worker_id()
+        self._lock = asyncio.Lock()
+        # Head-of-line job per user, reused between scheduling decisions.
+        self._heads: dict[str, QueuedJob] = {}
+        self._heads_expire_at = 0.0
+        self._stale_users: set[str] = set()
+
+    @property
+    def lease_duration(self) -> timedelta:
+        return timedelta(seconds=self.settings.job_lease_seconds)
+
+    async def candidates(self, limit: int = 100) -> list[QueuedJob]:
+        """Return the next claimable job of each user (up to ``limit`` users).
+
+        Within a user, higher priority jobs come first and ties are served in creation
+        order. Each entry carries the user's count of live leases across all workers so
+        per-user concurrency caps hold cluster-wide.
+
+        Heads are cached between decisions so a decision does not grow with the
+        backlog: the queue is scanned when the cache runs dry, is invalidated or is
+        older than ``QUEUE_POLL_INTERVAL``, and otherwise only users whose head was just
+        claimed are looked up again, one index probe each.
+        """
+        now = _utcnow()
+        async with self._session_factory() as session:
+            if not self._heads or time.monotonic() >= self._heads_expire_at:
+                self._heads = {
+                    head.user_id: head for head in await self._scan_heads(session, limit)
+                }
+                self._heads_expire_at = time.monotonic() + self.settings.queue_poll_interval
+                self._stale_users.clear()
+            while self._stale_users:
+                user_id = self._stale_users.pop()
+                head = await self._user_head(session, user_id)
+                if head is None:
+                    self._heads.pop(user_id, None)
+                else:
+                    self._heads[user_id] = head
+
+            heads = sorted(self._heads.values(), key=lambda head: head.created_at)[:limit]
+            running = await self._running_counts(session, [head.user_id for head in heads], now)
+        return [replace(head, user_running=running.get(head.user_id, 0)) for head in heads]
+
+    def invalidate(self) -> None:
+        """Forget cached heads; the next :meth:`candidates` call rescans the queue."""
+        self._heads.clear()
+        self._stale_users.clear()
+
+    async def claim_job(self, job_id: str) -> bool:
+        """Lease a specific job picked by the scheduler; ``False`` if another worker won it."""
+        # Won or lost, this job no longer heads its user's queue.
+        self._stale_users.update(
+            user_id for user_id, head in self._heads.items() if head.id == job_id
+        )
+        async with self._session_factory() as session:
+            if session.bind.dialect.name == "postgresql":
+                return await self._claim_skip_locked(session, job_id)
+
+        async with self._lock:
+            async with self._session_factory() as session:
+                return await self._claim_compare_and_set(session, job_id)
+
+    async def renew(self, job_id: str) -> bool:
+        """Heartbeat a running job and extend its lease.
+
+        Returns ``False`` if this worker no longer owns the job (it was reaped).
+        """
+        now = _utcnow()
+        async with self._session_factory() as session:
+            result = await session.execute(
+                update(TranscriptionJob)
+                .where(
+                    TranscriptionJob.id == job_id,
+                    TranscriptionJob.lease_owner == self.worker_id,
+                )
+                .values(lease_expires_at=now + self.lease_duration, heartbeat_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return result.rowcount == 1
+
+    async def release(self, job_id: str) -> None:
+        """Drop this worker's lease; a job left unfinished goes back to ``pending``.
+
+        Releasing is a clean hand-back (a drained or cancelled run), not a crash, so the
+        claim is returned and ``MAX_JOB_ATTEMPTS`` is not enforced here; only
+        :meth:`reap_stale` fails jobs that keep dying.
+        """
+        owned = (
+            TranscriptionJob.id == job_id,
+            TranscriptionJob.lease_owner == self.worker_id,
+        )
+        async with self._session_factory() as session:
+            requeued = await session.execute(
+                update(TranscriptionJob)
+                .where(*owned, TranscriptionJob.status == TranscriptionStatus.PROCESSING)
+                .values(
+                    status=TranscriptionStatus.PENDING,
+                    attempts=TranscriptionJob.attempts - 1,
+                    updated_at=_utcnow(),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.execute(
+                update(TranscriptionJob)
+                .where(*owned)
+                .values(lease_owner=None, lease_expires_at=None, heartbeat_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        if requeued.rowcount:
+            self.invalidate()
+
+    async def reap_stale(self) -> tuple[int, int]:
+        """Re-queue processing jobs whose heartbeat expired; returns (requeued, failed).
+
+        Stale rows are walked with a keyset cursor on ``(created_at, id)`` in batches of
+        ``RECOVERY_BATCH_SIZE``, each in its own short transaction, so reaping after a
+        long outage never loads or locks the whole backlog at once. Jobs that already
+        used ``MAX_JOB_ATTEMPTS`` claims are failed instead of retried. Each update
+        re-checks staleness, so reapers on several replicas are safe.
+        """
+        cutoff = _utcnow() - timedelta(seconds=self.settings.job_heartbeat_timeout)
+        stale = (
+            TranscriptionJob.status == TranscriptionStatus.PROCESSING,
+            or_(
+                TranscriptionJob.heartbeat_at < cutoff,
+                and_(
+                    TranscriptionJob.heartbeat_at.is_(None),
+                    or_(
+                        TranscriptionJob.lease_expires_at.is_(None),
+                        TranscriptionJob.lease_expires_at < cutoff,
+                    ),
+                ),
+            ),
+        )
+        requeued = failed = 0
+        cursor: tuple[datetime, str] | None = None
+        while True:
+            stmt = (
+                select(TranscriptionJob.created_at, TranscriptionJob.id)
+                .where(*stale)
+                .order_by(TranscriptionJob.created_at, TranscriptionJob.id)
+                .limit(self.settings.recovery_batch_size)
+            )
+            if cursor is not None:
+                stmt = stmt.where(
+                    tuple_(TranscriptionJob.created_at, TranscriptionJob.id) > cursor
+                )
+            async with self._session_factory() as session:
+                batch = (await session.execute(stmt)).all()
+                if not batch:
+                    break
+                batch_requeued, batch_failed = await self._requeue(
+                    session, *stale, TranscriptionJob.id.in_([row.id for row in batch])
+                )
+                await session.commit()
+            requeued += batch_requeued
+            failed += batch_failed
+            cursor = (batch[-1].created_at, batch[-1].id)
+            if len(batch) < self.settings.recovery_batch_size:
+                break
+            logger.info(
+                "Reaping stale transcription jobs: %d re-queued, %d failed so far",
+                requeued,
+                failed,
+            )
+
+        if requeued or failed:
+            logger.warning(
+                "Reaped stale transcription jobs: %d re-queued, %d failed", requeued, failed
+            )
+        return requeued, failed
+
+    async def requeue_unanswered(self) -> int:
+        """Re-queue ``submitted`` jobs whose webhook never arrived.
+
+        After ``WEBHOOK_FALLBACK_SECONDS`` the job becomes claimable again; since it keeps
+        its ``provider_job_id`` the next run polls the existing transcript.
+        """
+        cutoff = _utcnow() - timedelta(seconds=self.settings.webhook_fallback_seconds)
+        async with self._session_factory() as session:
+            requeued, failed = await self._requeue(
+                session,
+                TranscriptionJob.status == TranscriptionStatus.SUBMITTED,
+                TranscriptionJob.updated_at < cutoff,
+            )
+            await session.commit()
+        if requeued or failed:
+            logger.warning(
+                "Webhook fallback: %d submitted jobs re-queued for polling, %d failed",
+                requeued,
+                failed,
+            )
+        return requeued
+
+    async def pending_count(self) -> int:
+        stmt = select(func.count()).select_from(TranscriptionJob).where(_claimable())
+        async with self._session_factory() as session:
+            return (await session.execute(stmt)).scalar_one()
+
+    async def _claim_skip_locked(self, session: AsyncSession, job_id: str) -> bool:
+        now = _utcnow()
+        stmt = (
+            select(TranscriptionJob.id)
+            .where(TranscriptionJob.id == job_id, _claimable())
+            .with_for_update(skip_locked=True)
+        )
+        if (await session.execute(stmt)).scalar_one_or_none() is None:
+            await session.rollback()
+            return False
+        await session.execute(self._lease(job_id, now))
+        await session.commit()
+        return True
+
+    async def _claim_compare_and_set(self, session: AsyncSession, job_id: str) -> bool:
+        now = _utcnow()
+        # Re-check claimability in the UPDATE itself so another process that won the
+        # race since the scheduler saw the job makes this a no-op.
+        result = await session.execute(self._lease(job_id, now).where(_claimable()))
+        if result.rowcount != 1:
+            await session.rollback()
+            return False
+        await session.commit()
+        return True
+
+    async def _scan_heads(self, session: AsyncSession, limit: int) -> list[QueuedJob]:
+        columns = (
+            TranscriptionJob.id,
+            TranscriptionJob.user_id,
+            TranscriptionJob.priority,
+            TranscriptionJob.created_at,
+        )
+        if session.bind.dialect.name == "postgresql":
+            # One row per user straight off ix_transcription_job_queue_head.
+            heads = (
+                select(*columns)
+                .where(_claimable())
+                .distinct(TranscriptionJob.user_id)
+                .order_by(TranscriptionJob.user_id, *_HEAD_ORDER)
+                .subquery()
+            )
+        else:
+            ranked = (
+                select(
+                    *columns,
+                    func.row_number()
+                    .over(partition_by=TranscriptionJob.user_id, order_by=_HEAD_ORDER)
+                    .label("position"),
+                )
+                .where(_claimable())
+                .subquery()
+            )
+            heads = (
+                select(ranked.c.id, ranked.c.user_id, ranked.c.priority, ranked.c.created_at)
+                .where(ranked.c.position == 1)
+                .subquery()
+            )
+        stmt = select(heads).order_by(heads.c.created_at).limit(limit)
+        return [_queued(row) for row in (await session.execute(stmt)).all()]
+
+    async def _user_head(self, session: AsyncSession, user_id: str) -> QueuedJob | None:
+        stmt = (
+            select(
+                TranscriptionJob.id,
+                TranscriptionJob.user_id,
+                TranscriptionJob.priority,
+                TranscriptionJob.created_at,
+            )
+            .where(_claimable(), TranscriptionJob.user_id == user_id)
+            .order_by(*_HEAD_ORDER)
+            .limit(1)
+        )
+        row = (await session.execute(stmt)).first()
+        return _queued(row) if row is not None else None
+
+    async def _running_counts(
+        self, session: AsyncSession, user_ids: Sequence[str], now: datetime
+    ) -> dict[str, int]:
+        if not user_ids:
+            return {}
+        stmt = (
+            select(TranscriptionJob.user_id, func.count())
+            .where(
+                TranscriptionJob.user_id.in_(set(user_ids)),
+                TranscriptionJob.status == TranscriptionStatus.PROCESSING,
+                TranscriptionJob.lease_expires_at >= now,
+            )
+            .group_by(TranscriptionJob.user_id)
+        )
+        return {user_id: count for user_id, count in (await session.execute(stmt)).all()}
+
+    async def _requeue(self, session: AsyncSession, *criteria) -> tuple[int, int]:
+        now = _utcnow()
+        max_attempts = self.settings.max_job_attempts
+        reset = {
+            "lease_owner": None,
+            "lease_expires_at": None,
+            "heartbeat_at": None,
+            "updated_at": now,
+        }
+        failed = await session.execute(
+            update(TranscriptionJob)
+            .where(*criteria, TranscriptionJob.attempts >= max_attempts)
+            .values(
+                status=TranscriptionStatus.FAILED,
+                error_message=f"Job abandoned after {max_attempts} attempts",
+                **reset,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        requeued = await session.execute(
+            update(TranscriptionJob)
+            .where(*criteria, TranscriptionJob.attempts < max_attempts)
+            .values(status=TranscriptionStatus.PENDING, **reset)
+            .execution_options(synchronize_session=False)
+        )
+        if requeued.rowcount:
+            # Re-queued jobs may head their user's queue again.
+            self.invalidate()
+        return requeued.rowcount, failed.rowcount
+
+    def _lease(self, job_id: str, now: datetime):
+        return (
+            update(TranscriptionJob)
+            .where(TranscriptionJob.id == job_id)
+            .values(
+                status=TranscriptionStatus.PROCESSING,
+                lease_owner=self.worker_id,
+                lease_expires_at=now + self.lease_duration,
+                heartbeat_at=now,
+                attempts=TranscriptionJob.attempts + 1,
+                started_at=func.coalesce(TranscriptionJob.started_at, now),
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+def _queued(row) -> QueuedJob:
+    return QueuedJob(
+        id=row.id,
+        user_id=row.user_id,
+        priority=row.priority,
+        created_at=as_utc(row.created_at),
+    )
+
+
+def _claimable():
+    # Stale processing jobs come back through reap_stale(), never by direct claim.
+    return TranscriptionJob.status == TranscriptionStatus.PENDING
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
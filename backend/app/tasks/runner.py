@@ -1,28 +1,116 @@
 import asyncio
 import logging
+import math
+import random
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from typing import Awaitable, Callable
 
 from app.core.config import get_settings
+from app.models import JobPriority
+from app.tasks.queue import JobQueue, QueuedJob
 
 logger = logging.getLogger(__name__)
 
+# Share of capacity each priority class receives relative to the others.
+PRIORITY_WEIGHTS: dict[int, float] = {
+    JobPriority.LOW: 1.0,
+    JobPriority.NORMAL: 2.0,
+    JobPriority.HIGH: 4.0,
+}
 
-StartupHook = Callable[[], Awaitable[None]]
-CoroFactory = Callable[[], Awaitable[None]]
+# Users considered per scheduling decision, and queue-wait samples kept for stats.
+_CANDIDATE_USERS = 200
+_WAIT_SAMPLES = 2000
+
+# Whether the current job task holds one of the runner's execution slots.
+_slot_held: ContextVar[bool] = ContextVar("transcription_slot_held", default=False)
+
+
+JobHandler = Callable[[str], Awaitable[None]]
+
+
+class FairScheduler:
+    """Weighted fair queuing across users.
+
+    Every user has a virtual finish tag. Dispatching a job advances the user's tag by
+    ``1 / weight`` (weight taken from the job's priority class), and the next job always
+    goes to the candidate with the smallest tag. A user with 300 queued jobs therefore
+    gets one slot in turn with everyone else instead of draining first. Users already
+    at ``per_user_limit`` running jobs are skipped.
+    """
+
+    def __init__(
+        self,
+        per_user_limit: int = 0,
+        weights: dict[int, float] | None = None,
+    ) -> None:
+        self.per_user_limit = per_user_limit
+        self.weights = weights or PRIORITY_WEIGHTS
+        self._virtual_time = 0.0
+        self._finish_tags: dict[str, float] = {}
+
+    def pick(self, candidates: Sequence[QueuedJob]) -> QueuedJob | None:
+        best: QueuedJob | None = None
+        best_key: tuple | None = None
+        for job in candidates:
+            if self.per_user_limit and job.user_running >= self.per_user_limit:
+                continue
+            key = (self._finish_tag(job), job.created_at, job.id)
+            if best_key is None or key < best_key:
+                best, best_key = job, key
+        return best
+
+    def charge(self, job: QueuedJob) -> None:
+        """Account for ``job`` having been dispatched."""
+        start = max(self._virtual_time, self._finish_tags.get(job.user_id, 0.0))
+        self._finish_tags[job.user_id] = start + 1.0 / self._weight(job)
+        self._virtual_time = start
+        # Tags at or behind virtual time carry no history; forget them to bound memory.
+        self._finish_tags = {
+            user_id: tag
+            for user_id, tag in self._finish_tags.items()
+            if tag > self._virtual_time
+        }
+
+    def _finish_tag(self, job: QueuedJob) -> float:
+        start = max(self._virtual_time, self._finish_tags.get(job.user_id, 0.0))
+        return start + 1.0 / self._weight(job)
+
+    def _weight(self, job: QueuedJob) -> float:
+        return self.weights.get(job.priority, 1.0)
 
 
 class TranscriptionRunner:
-    """Coordinates background transcription tasks within the FastAPI process."""
+    """Coordinates background transcription tasks within the FastAPI process.
 
-    def __init__(self) -> None:
+    When a job handler is registered the runner pulls work from the durable
+    :class:`JobQueue`, heartbeating every job it executes until the handler returns,
+    and periodically reaps jobs whose owner stopped heartbeating.
+    """
+
+    def __init__(self, queue: JobQueue | None = None) -> None:
         self._loop: asyncio.AbstractEventLoop | None = None
         self._tasks: set[asyncio.Task] = set()
         self._running = False
         self._semaphore: asyncio.Semaphore | None = None
-        self._startup_hook: StartupHook | None = None
+        self._inflight: asyncio.Semaphore | None = None
+        self._job_handler: JobHandler | None = None
+        self._queue = queue
+        self._dispatcher: asyncio.Task | None = None
+        self._reaper: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._scheduler = FairScheduler(get_settings().max_parallel_jobs_per_user)
+        self._wait_samples: deque[tuple[str, float]] = deque(maxlen=_WAIT_SAMPLES)
+        self._next_dispatch_at = 0.0
+        self._dispatched = 0
 
-    def set_startup_hook(self, hook: StartupHook) -> None:
-        self._startup_hook = hook
+    def set_job_handler(self, handler: JobHandler) -> None:
+        self._job_handler = handler
 
     async def start(self) -> None:
         if self._running:
@@ -30,34 +118,217 @@ class TranscriptionRunner:
         self._loop = asyncio.get_running_loop()
         settings = get_settings()
         self._semaphore = asyncio.Semaphore(settings.max_parallel_transcriptions)
+        self._inflight = asyncio.Semaphore(settings.max_inflight_transcriptions)
         self._running = True
-        if self._startup_hook:
-            await self._startup_hook()
+        if self._job_handler is not None:
+            if self._queue is None:
+                self._queue = JobQueue()
+            self._wakeup = asyncio.Event()
+            self._dispatcher = self._loop.create_task(self._dispatch_loop())
+            self._reaper = self._loop.create_task(self._reap_loop())
+
+    async def stop(self, grace_period: float | None = None) -> None:
+        """Stop claiming work, let in-flight jobs finish within the grace period, cancel the rest.
 
-    async def stop(self) -> None:
+        Cancelled jobs release their lease, so another worker resumes them immediately.
+        """
         if not self._running:
             return
         self._running = False
+        for background in (self._dispatcher, self._reaper):
+            if background is not None:
+                background.cancel()
+                await asyncio.gather(background, return_exceptions=True)
+        self._dispatcher = None
+        self._reaper = None
+
+        if grace_period is None:
+            grace_period = get_settings().shutdown_grace_seconds
+        if self._tasks and grace_period > 0:
+            logger.info(
+                "Draining %d in-flight transcription tasks (up to %.0fs)",
+                len(self._tasks),
+                grace_period,
+            )
+            _, unfinished = await asyncio.wait(set(self._tasks), timeout=grace_period)
+            if unfinished:
+                logger.warning(
+                    "Cancelling %d transcription tasks still running after drain",
+                    len(unfinished),
+                )
         for task in list(self._tasks):
             task.cancel()
         await asyncio.gather(*self._tasks, return_exceptions=True)
         self._tasks.clear()
         self._semaphore = None
+        self._inflight = None
+        self._wakeup = None
         self._loop = None
 
-    def submit(self, coro_factory: CoroFactory) -> None:
-        if not self._running or self._loop is None or self._semaphore is None:
-            raise RuntimeError("TranscriptionRunner not running")
+    def notify(self) -> None:
+        """Wake the dispatcher so newly queued jobs are claimed without waiting a poll."""
+        if self._queue is not None:
+            self._queue.invalidate()
+        if self._wakeup is not None:
+            self._wakeup.set()
 
-        async def wrapper() -> None:
-            async with self._semaphore:
-                try:
-                    await coro_factory()
-                except asyncio.CancelledError:
-                    raise
-                except Exception:  # pragma: no cover - logged for observability
-                    logger.exception("Unhandled error in transcription task")
+    @asynccontextmanager
+    async def yield_slot(self) -> AsyncIterator[None]:
+        """Give up the current job's execution slot while it only waits on the provider.
+
+        The job keeps its lease and counts against ``MAX_INFLIGHT_TRANSCRIPTIONS``;
+        the slot is re-acquired before the block exits. Outside a runner-managed job
+        this is a no-op.
+        """
+        semaphore = self._semaphore
+        if semaphore is None or not _slot_held.get():
+            yield
+            return
+        semaphore.release()
+        _slot_held.set(False)
+        try:
+            yield
+        finally:
+            await semaphore.acquire()
+            _slot_held.set(True)
 
-        task = self._loop.create_task(wrapper())
+    def queue_wait_stats(self, user_id: str | None = None) -> dict[str, float]:
+        """Summarise recent time-to-start (seconds from job creation to dispatch)."""
+        waits = sorted(
+            wait
+            for sample_user, wait in self._wait_samples
+            if user_id is None or sample_user == user_id
+        )
+        if not waits:
+            return {"count": 0}
+        return {
+            "count": len(waits),
+            "p50": _percentile(waits, 0.50),
+            "p95": _percentile(waits, 0.95),
+            "max": waits[-1],
+        }
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = self._loop.create_task(coro)
         self._tasks.add(task)
         task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch_loop(self) -> None:
+        settings = get_settings()
+        # Desynchronise replicas that restart together so they do not all hit storage
+        # and the provider in the same instant.
+        await asyncio.sleep(random.uniform(0, settings.dispatch_startup_jitter))
+        while self._running:
+            await self._inflight.acquire()
+            await self._semaphore.acquire()
+            await self._pace()
+            # Clear before claiming so a notify() racing with an empty claim is not lost.
+            self._wakeup.clear()
+            try:
+                job = await self._next_job()
+            except Exception:
+                logger.exception("Failed to claim transcription job")
+                job = None
+
+            if job is None:
+                self._semaphore.release()
+                self._inflight.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.queue_poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._record_wait(job)
+            self._dispatched += 1
+            self._spawn(self._run_claimed(job.id))
+
+    async def _pace(self) -> None:
+        """Limit claims to ``DISPATCH_RATE_PER_SECOND`` with jittered spacing."""
+        rate = get_settings().dispatch_rate_per_second
+        if rate <= 0:
+            return
+        now = time.monotonic()
+        delay = self._next_dispatch_at - now
+        if delay > 0:
+            await asyncio.sleep(delay)
+        spacing = random.uniform(0.5, 1.5) / rate
+        self._next_dispatch_at = max(now, self._next_dispatch_at) + spacing
+
+    async def _next_job(self) -> QueuedJob | None:
+        """Pick the fairest candidate and lease it, retrying if another worker wins it."""
+        while True:
+            candidates = await self._queue.candidates(limit=_CANDIDATE_USERS)
+            job = self._scheduler.pick(candidates)
+            if job is None:
+                return None
+            if await self._queue.claim_job(job.id):
+                self._scheduler.charge(job)
+                return job
+
+    def _record_wait(self, job: QueuedJob) -> None:
+        wait = (datetime.now(timezone.utc) - job.created_at).total_seconds()
+        self._wait_samples.append((job.user_id, wait))
+        logger.info(
+            "Dispatching job %s for user %s after %.1fs in queue", job.id, job.user_id, wait
+        )
+
+    async def _reap_loop(self) -> None:
+        settings = get_settings()
+        while True:
+            try:
+                requeued, _ = await self._queue.reap_stale()
+                requeued += await self._queue.requeue_unanswered()
+                if requeued:
+                    self.notify()
+                backlog = await self._queue.pending_count()
+                if backlog:
+                    logger.info(
+                        "Transcription backlog: %d pending, %d dispatched by this worker",
+                        backlog,
+                        self._dispatched,
+                    )
+            except Exception:
+                logger.exception("Failed to reap stale transcription jobs")
+            await asyncio.sleep(settings.reaper_interval)
+
+    async def _run_claimed(self, job_id: str) -> None:
+        _slot_held.set(True)
+        heartbeat = self._loop.create_task(
+            self._heartbeat(job_id, asyncio.current_task())
+        )
+        try:
+            await self._job_handler(job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # pragma: no cover - logged for observability
+            logger.exception("Unhandled error in transcription job %s", job_id)
+        finally:
+            heartbeat.cancel()
+            try:
+                await self._queue.release(job_id)
+            except Exception:
+                logger.warning("Failed to release lease on job %s", job_id, exc_info=True)
+            if _slot_held.get():
+                self._semaphore.release()
+            self._inflight.release()
+
+    async def _heartbeat(self, job_id: str, job_task: asyncio.Task) -> None:
+        interval = get_settings().job_heartbeat_interval
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                owned = await self._queue.renew(job_id)
+            except Exception:
+                logger.warning("Failed to heartbeat job %s", job_id, exc_info=True)
+                continue
+            if not owned:
+                # The reaper handed the job to someone else; stop to avoid duplicate work.
+                logger.warning("Lost lease on job %s; cancelling local run", job_id)
+                job_task.cancel()
+                return
+
+
+def _percentile(ordered: Sequence[float], fraction: float) -> float:
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
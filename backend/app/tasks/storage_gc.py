@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.db.types import as_utc
+from app.models import TranscriptionJob, TranscriptionStatus
+from app.services.storage import (
+    LocalStorageService,
+    StorageService,
+    StoredObject,
+    get_storage_service,
+)
+
+logger = logging.getLogger(__name__)
+
+# Jobs that will still read their source object.
+_UNFINISHED = (
+    TranscriptionStatus.AWAITING_UPLOAD,
+    TranscriptionStatus.PENDING,
+    TranscriptionStatus.PROCESSING,
+    TranscriptionStatus.SUBMITTED,
+)
+
+
+@dataclass
+class SweepStats:
+    scanned: int = 0
+    deleted: int = 0
+    bytes_freed: int = 0
+    failed: int = 0
+    internal_removed: int = 0
+    abandoned_jobs: int = 0
+    seconds: float = 0.0
+    dry_run: bool = False
+
+    @property
+    def objects_per_second(self) -> float:
+        return self.scanned / self.seconds if self.seconds else 0.0
+
+
+class StorageSweeper:
+    """Deletes stored objects no job needs any more.
+
+    ``uploads/`` objects older than ``GC_UPLOAD_RETENTION_SECONDS`` that no unfinished
+    job points at (presigned but never submitted, or left behind by a crash) are removed.
+    Under ``results/{user}/{job}/`` objects of deleted jobs go after the same grace
+    period, and with ``GC_RESULT_RETENTION_SECONDS`` set, results of jobs finished longer
+    ago than that are removed and unlinked from the job (the transcript stays in the
+    database). Storage is listed a page at a time and each page is reconciled with one
+    query and deleted in one batch. Local storage also drops abandoned upload sessions
+    and hash sidecars of deleted objects.
+    """
+
+    def __init__(
+        self,
+        storage: StorageService | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ) -> None:
+        self.settings = get_settings()
+        self.storage = storage or get_storage_service()
+        self._session_factory = session_factory or get_session_factory()
+        self._task: asyncio.Task | None = None
+        self.last_stats: SweepStats | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sweep(self, dry_run: bool | None = None) -> SweepStats:
+        settings = self.settings
+        stats = SweepStats(dry_run=settings.gc_dry_run if dry_run is None else dry_run)
+        started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        grace_cutoff = now - timedelta(seconds=settings.gc_upload_retention_seconds)
+        stats.abandoned_jobs = await self._fail_abandoned_jobs(grace_cutoff, stats.dry_run)
+
+        async for page in self.storage.iter_objects("uploads/"):
+            stats.scanned += len(page)
+            candidates = [obj for obj in page if as_utc(obj.modified) < grace_cutoff]
+            if candidates:
+                await self._delete(await self._unreferenced_uploads(candidates), stats)
+
+        async for page in self.storage.iter_objects("results/"):
+            stats.scanned += len(page)
+            expired = await self._expired_results(page, now, grace_cutoff, stats.dry_run)
+            await self._delete(expired, stats)
+
+        if isinstance(self.storage, LocalStorageService):
+            stats.internal_removed = await self.storage.purge_internal(
+                grace_cutoff, dry_run=stats.dry_run
+            )
+
+        stats.seconds = time.monotonic() - started
+        self.last_stats = stats
+        logger.info(
+            "Storage sweep%s: scanned %d objects in %.1fs (%.0f/s), %s %d (%d bytes), "
+            "%d failed, %d internal files, %d abandoned jobs",
+            " (dry run)" if stats.dry_run else "",
+            stats.scanned,
+            stats.seconds,
+            stats.objects_per_second,
+            "would delete" if stats.dry_run else "deleted",
+            stats.deleted,
+            stats.bytes_freed,
+            stats.failed,
+            stats.internal_removed,
+            stats.abandoned_jobs,
+        )
+        return stats
+
+    async def _fail_abandoned_jobs(self, cutoff: datetime, dry_run: bool) -> int:
+        """Fail jobs whose presigned upload never arrived, releasing their upload key."""
+        abandoned = (
+            TranscriptionJob.status == TranscriptionStatus.AWAITING_UPLOAD,
+            TranscriptionJob.created_at < cutoff,
+        )
+        async with self._session_factory() as session:
+            if dry_run:
+                stmt = select(func.count()).select_from(TranscriptionJob).where(*abandoned)
+                return (await session.execute(stmt)).scalar_one()
+            result = await session.execute(
+                update(TranscriptionJob)
+                .where(*abandoned)
+                .values(
+                    status=TranscriptionStatus.FAILED,
+                    error_message="Upload was not completed",
+                )
+            )
+            await session.commit()
+            return result.rowcount
+
+    async def _unreferenced_uploads(self, objects: list[StoredObject]) -> list[StoredObject]:
+        async with self._session_factory() as session:
+            referenced = set(
+                (
+                    await session.execute(
+                        select(TranscriptionJob.source_object_key).where(
+                            TranscriptionJob.source_object_key.in_([o.key for o in objects]),
+                            TranscriptionJob.status.in_(_UNFINISHED),
+                        )
+                    )
+                ).scalars()
+            )
+        return [obj for obj in objects if obj.key not in referenced]
+
+    async def _expired_results(
+        self,
+        objects: list[StoredObject],
+        now: datetime,
+        grace_cutoff: datetime,
+        dry_run: bool,
+    ) -> list[StoredObject]:
+        by_job: dict[str, list[StoredObject]] = {}
+        for obj in objects:
+            parts = obj.key.split("/")
+            if len(parts) >= 4:
+                by_job.setdefault(parts[2], []).append(obj)
+
+        async with self._session_factory() as session:
+            rows = (
+                await session.execute(
+                    select(
+                        TranscriptionJob.id, TranscriptionJob.status, TranscriptionJob.updated_at
+                    ).where(TranscriptionJob.id.in_(list(by_job)))
+                )
+            ).all()
+            existing = {job_id for job_id, _, _ in rows}
+
+            retention = self.settings.gc_result_retention_seconds
+            expiry_cutoff = now - timedelta(seconds=retention) if retention > 0 else None
+            expired_jobs = [
+                job_id
+                for job_id, status, updated_at in rows
+                if expiry_cutoff is not None
+                and status == TranscriptionStatus.COMPLETED
+                and as_utc(updated_at) < expiry_cutoff
+            ]
+            if expired_jobs and not dry_run:
+                await session.execute(
+                    update(TranscriptionJob)
+                    .where(
+                        TranscriptionJob.id.in_(expired_jobs),
+                        TranscriptionJob.status == TranscriptionStatus.COMPLETED,
+                    )
+                    .values(result_object_key=None)
+                )
+                await session.commit()
+
+        victims: list[StoredObject] = []
+        for job_id, job_objects in by_job.items():
+            if job_id in expired_jobs:
+                victims += job_objects
+            elif job_id not in existing:
+                victims += [o for o in job_objects if as_utc(o.modified) < grace_cutoff]
+        return victims
+
+    async def _delete(self, objects: list[StoredObject], stats: SweepStats) -> None:
+        if not objects:
+            return
+        if stats.dry_run:
+            for obj in objects:
+                logger.info("Storage sweep (dry run) would delete %s", obj.key)
+            stats.deleted += len(objects)
+            stats.bytes_freed += sum(obj.size for obj in objects)
+            return
+        failed = set(await self.storage.delete_objects([obj.key for obj in objects]))
+        for obj in objects:
+            if obj.key in failed:
+                stats.failed += 1
+            else:
+                stats.deleted += 1
+                stats.bytes_freed += obj.size
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Storage sweep failed")
+            await asyncio.sleep(self.settings.gc_interval_seconds)
@@ -0,0 +1,58 @@
+"""Standalone transcription worker.
+
+Run with ``python -m app.worker``. The process serves no HTTP traffic; it only claims
+jobs from the database queue and executes them, so the API tier (``PROCESS_ROLE=api``)
+and the transcription tier can be scaled independently.
+"""
+
+import asyncio
+import logging
+import signal
+
+from app.core.config import get_settings
+from app.services.storage import close_storage_service
+from app.services.transcription import TranscriptionService
+from app.tasks.runner import TranscriptionRunner
+from app.tasks.storage_gc import StorageSweeper
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(stop_event: asyncio.Event | None = None) -> None:
+    runner = TranscriptionRunner()
+    transcription_service = TranscriptionService(runner)
+    sweeper = StorageSweeper() if get_settings().gc_enabled else None
+
+    stop_event = stop_event or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:  # pragma: no cover - Windows event loops
+            pass
+
+    await runner.start()
+    if sweeper is not None:
+        await sweeper.start()
+    logger.info("Transcription worker started")
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info("Transcription worker stopping")
+        if sweeper is not None:
+            await sweeper.aclose()
+        await runner.stop()
+        await transcription_service.aclose()
+        await close_storage_service()
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
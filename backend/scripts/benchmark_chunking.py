@@ -0,0 +1,75 @@
+"""Compare time-to-result of single-shot and chunked AssemblyAI transcription.
+
+Usage (from backend/, with ASSEMBLYAI_API_KEY set and ffmpeg on PATH):
+
+    python -m scripts.benchmark_chunking path/to/recording.mp3 [--mode dialogue]
+
+Both runs go through the same client and poller the workers use; the chunked run
+includes silence detection, segment extraction and stitching.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.assemblyai import AssemblyAIClient, build_transcription_config
+from app.services.chunking import split_recording, stitch_transcripts
+from app.services.media import probe_duration
+from app.tasks.poller import ProviderPoller
+
+
+async def _single_shot(
+    client: AssemblyAIClient, poller: ProviderPoller, path: Path, config: dict
+) -> dict:
+    audio_url = await client.upload(path)
+    submitted = await client.submit(audio_url, config)
+    return await poller.wait(submitted["id"])
+
+
+async def _chunked(
+    client: AssemblyAIClient, poller: ProviderPoller, path: Path, config: dict
+) -> tuple[dict, int]:
+    with tempfile.TemporaryDirectory() as tmpdir:
+        chunks, segments = await split_recording(path, Path(tmpdir))
+        uploads = await asyncio.gather(*(client.upload(segment) for segment in segments))
+    submitted = await asyncio.gather(*(client.submit(url, config) for url in uploads))
+    transcripts = await asyncio.gather(*(poller.wait(item["id"]) for item in submitted))
+    return stitch_transcripts(chunks, transcripts), len(chunks)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--mode", default="dialogue", choices=["mono", "dialogue", "multi"])
+    args = parser.parse_args()
+
+    client = AssemblyAIClient()
+    poller = ProviderPoller(lambda: client)
+    config = build_transcription_config(args.language, args.mode)
+    duration = await probe_duration(args.path)
+    try:
+        started = time.monotonic()
+        single = await _single_shot(client, poller, args.path, config)
+        single_seconds = time.monotonic() - started
+
+        started = time.monotonic()
+        chunked, chunk_count = await _chunked(client, poller, args.path, config)
+        chunked_seconds = time.monotonic() - started
+    finally:
+        await poller.aclose()
+        await client.aclose()
+
+    print(f"audio:        {duration:8.1f}s")
+    print(f"single-shot:  {single_seconds:8.1f}s  ({len(single.get('text') or '')} chars)")
+    print(
+        f"chunked x{chunk_count:<3} {chunked_seconds:8.1f}s  "
+        f"({len(chunked.get('text') or '')} chars)"
+    )
+    print(f"speed-up:     {single_seconds / chunked_seconds:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,39 @@
+"""Run one storage sweep: delete stale uploads and results no job needs.
+
+Usage (from backend/, with the usual DATABASE_URL/STORAGE_BACKEND settings):
+
+    python -m scripts.storage_gc [--dry-run]
+
+Retention comes from GC_UPLOAD_RETENTION_SECONDS and GC_RESULT_RETENTION_SECONDS; with
+--dry-run nothing is deleted and the objects that would be are logged.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.services.storage import close_storage_service
+from app.tasks.storage_gc import StorageSweeper
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    try:
+        stats = await StorageSweeper().sweep(dry_run=args.dry_run or None)
+    finally:
+        await close_storage_service()
+    print(
+        f"scanned {stats.scanned} objects in {stats.seconds:.1f}s "
+        f"({stats.objects_per_second:.0f}/s); "
+        f"{'would delete' if stats.dry_run else 'deleted'} {stats.deleted} "
+        f"({stats.bytes_freed} bytes), {stats.failed} failed, "
+        f"{stats.internal_removed} internal files"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
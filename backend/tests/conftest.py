@@ -65,6 +65,8 @@ def configure_environment():
     os.environ["S3_BUCKET_UPLOADS"] = "test-bucket"
     os.environ["STORAGE_BACKEND"] = "local"
     os.environ["TRANSCRIPTION_BACKEND"] = "stub"
+    os.environ["DISPATCH_RATE_PER_SECOND"] = "0"
+    os.environ["DISPATCH_STARTUP_JITTER"] = "0"
     get_settings.cache_clear()
     db_session.reset_session_factory()
     storage_service.reset_storage_service()
@@ -84,7 +86,6 @@ def app_instance(configure_environment):
     app.state.transcription_runner = runner
     app.state.transcription_service = transcription_service
 
-    app.state.transcription_runner.submit = lambda coro_factory: None  # type: ignore[attr-defined]
     app.state.transcription_service.storage = storage_service._storage_service  # type: ignore[attr-defined]
     return app
 
@@ -1,5 +1,14 @@
+import json
+from urllib.parse import quote_plus
+
 import pytest
 
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.models import Transcript, TranscriptionJob, TranscriptionStatus
+from app.services import storage as storage_service
+from app.services.storage import LocalStorageService
+
 
 @pytest.mark.asyncio
 async def test_auth_flow_and_presign(client):
@@ -55,3 +64,406 @@ async def test_auth_flow_and_presign(client):
     items = jobs_list.json()
     assert len(items) == 1
     assert items[0]["id"] == job_data["id"]
+
+
+async def _auth_headers(client, email: str) -> dict[str, str]:
+    await client.post("/auth/register", json={"email": email, "password": "Password123"})
+    login_resp = await client.post(
+        "/auth/login",
+        data={"username": email, "password": "Password123"},
+        headers={"Content-Type": "application/x-www-form-urlencoded"},
+    )
+    return {"Authorization": f"Bearer {login_resp.json()['access_token']}"}
+
+
+@pytest.mark.asyncio
+async def test_create_job_rejected_when_user_queue_full(client, app_instance):
+    headers = await _auth_headers(client, "busy@example.com")
+    settings = app_instance.state.transcription_service.settings
+    settings.max_queued_jobs_per_user = 1
+    try:
+        payload = {"object_key": "uploads/busy/a.txt", "language": "en", "mode": "mono"}
+        first = await client.post("/jobs/", json=payload, headers=headers)
+        assert first.status_code == 201
+
+        second = await client.post("/jobs/", json=payload, headers=headers)
+        assert second.status_code == 429
+        assert int(second.headers["Retry-After"]) >= 1
+    finally:
+        settings.max_queued_jobs_per_user = 0
+
+
+@pytest.mark.asyncio
+async def test_batch_presign_and_job_creation(client, app_instance):
+    headers = await _auth_headers(client, "bulk@example.com")
+    presigned = await client.post(
+        "/files/presign/batch",
+        json={"files": [{"filename": f"call-{i}.mp3"} for i in range(3)]},
+        headers=headers,
+    )
+    assert presigned.status_code == 200
+    keys = [item["object_key"] for item in presigned.json()]
+    assert [key.rsplit("/", 1)[-1] for key in keys] == ["call-0.mp3", "call-1.mp3", "call-2.mp3"]
+
+    settings = app_instance.state.transcription_service.settings
+    settings.max_queued_jobs_per_user = 4
+    try:
+        created = await client.post(
+            "/jobs/batch",
+            json={"jobs": [{"object_key": key, "mode": "dialogue"} for key in keys]},
+            headers=headers,
+        )
+        assert created.status_code == 201
+        jobs = created.json()
+        assert [job["status"] for job in jobs] == ["pending"] * 3
+        assert len({job["id"] for job in jobs}) == 3
+
+        # Admission control takes or refuses a batch as a whole.
+        rejected = await client.post(
+            "/jobs/batch",
+            json={"jobs": [{"object_key": key} for key in keys[:2]]},
+            headers=headers,
+        )
+        assert rejected.status_code == 429
+    finally:
+        settings.max_queued_jobs_per_user = 0
+
+    listed = (await client.get("/jobs/", headers=headers)).json()
+    assert sorted(job["id"] for job in listed) == sorted(job["id"] for job in jobs)
+
+
+@pytest.mark.asyncio
+async def test_presigned_jobs_count_toward_user_queue_limit(client, app_instance):
+    headers = await _auth_headers(client, "presigner@example.com")
+    settings = app_instance.state.transcription_service.settings
+    settings.max_queued_jobs_per_user = 2
+    try:
+        files = [{"filename": f"call-{i}.mp3", "job": {"mode": "mono"}} for i in range(2)]
+        accepted = await client.post("/files/presign/batch", json={"files": files}, headers=headers)
+        assert accepted.status_code == 200
+
+        rejected = await client.post(
+            "/files/presign", json={"filename": "one-more.mp3", "job": {}}, headers=headers
+        )
+        assert rejected.status_code == 429
+        assert int(rejected.headers["Retry-After"]) >= 1
+    finally:
+        settings.max_queued_jobs_per_user = 0
+
+
+def _s3_object_created(key: str) -> dict:
+    """What a bucket notification looks like when MinIO/S3 delivers it."""
+    return {
+        "Records": [
+            {
+                "eventName": "s3:ObjectCreated:Put",
+                "s3": {"bucket": {"name": "test-bucket"}, "object": {"key": quote_plus(key)}},
+            }
+        ]
+    }
+
+
+@pytest.mark.asyncio
+async def test_upload_completion_queues_job_created_at_presign(client, tmp_path, monkeypatch):
+    headers = await _auth_headers(client, "autostart@example.com")
+    presigned = await client.post(
+        "/files/presign",
+        json={"filename": "team call.mp3", "job": {"language": "de", "mode": "dialogue"}},
+        headers=headers,
+    )
+    assert presigned.status_code == 200
+    key, job_id = presigned.json()["object_key"], presigned.json()["job_id"]
+    job = (await client.get(f"/jobs/{job_id}", headers=headers)).json()
+    assert (job["status"], job["language"], job["mode"]) == ("awaiting_upload", "de", "dialogue")
+
+    # S3: the bucket notifies the API once the client's PUT lands.
+    monkeypatch.setattr(get_settings(), "s3_event_secret", "bucket-token")
+    event = _s3_object_created(key)
+    assert (await client.post("/files/events/s3", json=event)).status_code == 401
+    delivered = await client.post(
+        "/files/events/s3", json=event, headers={"Authorization": "Bearer bucket-token"}
+    )
+    assert delivered.status_code == 204
+    assert (await client.get(f"/jobs/{job_id}", headers=headers)).json()["status"] == "pending"
+
+    # Local storage: the upload handler itself starts the job.
+    monkeypatch.setattr(get_settings(), "local_storage_dir", str(tmp_path))
+    monkeypatch.setattr(storage_service, "_storage_service", LocalStorageService())
+    presigned = (
+        await client.post(
+            "/files/presign", json={"filename": "memo.txt", "job": {}}, headers=headers
+        )
+    ).json()
+    assert presigned["upload_url"].startswith("/files/upload/")
+    uploaded = await client.put(presigned["upload_url"], content=b"hello", headers=headers)
+    assert uploaded.status_code == 200
+    job = (await client.get(f"/jobs/{presigned['job_id']}", headers=headers)).json()
+    assert job["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_job_listing_pages_by_cursor_and_filters_status(client):
+    headers = await _auth_headers(client, "historian@example.com")
+    created = await client.post(
+        "/jobs/batch",
+        json={"jobs": [{"object_key": f"uploads/h/{i}.mp3"} for i in range(5)]},
+        headers=headers,
+    )
+    expected = sorted(
+        created.json(), key=lambda job: (job["created_at"], job["id"]), reverse=True
+    )
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = await client.get("/jobs/", params=params, headers=headers)
+        assert page.status_code == 200
+        assert len(page.json()) <= 2
+        seen += [job["id"] for job in page.json()]
+        cursor = page.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert seen == [job["id"] for job in expected]
+
+    pending = await client.get("/jobs/", params={"status": "pending"}, headers=headers)
+    assert len(pending.json()) == 5
+    failed = await client.get("/jobs/", params={"status": "failed"}, headers=headers)
+    assert failed.json() == []
+    bad = await client.get("/jobs/", params={"cursor": "not-a-cursor"}, headers=headers)
+    assert bad.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_transcript_endpoint_serves_ranges_and_time_windows(client):
+    headers = await _auth_headers(client, "reader@example.com")
+    user_id = (await client.get("/auth/me", headers=headers)).json()["id"]
+    utterances = [
+        {"speaker": "A", "start": 0, "end": 4000, "text": "Hello there."},
+        {"speaker": "B", "start": 4500, "end": 9000, "text": "Hi!"},
+        {"speaker": "A", "start": 9500, "end": 12000, "text": "Bye."},
+    ]
+    async with get_session_factory()() as session:
+        job = TranscriptionJob(
+            user_id=user_id,
+            language="en",
+            mode="dialogue",
+            source_object_key="uploads/reader/call.mp3",
+            status=TranscriptionStatus.COMPLETED,
+        )
+        session.add(job)
+        await session.flush()
+        session.add(
+            Transcript(
+                job_id=job.id,
+                plain_text="Speaker A: Hello there.",
+                diarized_json=json.dumps(utterances),
+            )
+        )
+        await session.commit()
+        job_id = job.id
+
+    url = f"/jobs/{job_id}/transcript"
+    full = await client.get(url, headers=headers)
+    assert full.text == "Speaker A: Hello there."
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = await client.get(url, headers={**headers, "Range": "bytes=0-8"})
+    assert partial.status_code == 206
+    assert partial.text == "Speaker A"
+    assert partial.headers["content-range"] == "bytes 0-8/23"
+    tail = await client.get(url, headers={**headers, "Range": "bytes=-6"})
+    assert tail.text == "there."
+    beyond = await client.get(url, headers={**headers, "Range": "bytes=50-"})
+    assert beyond.status_code == 416
+
+    window = await client.get(
+        url, params={"format": "json", "start": 5, "end": 9.5}, headers=headers
+    )
+    assert [u["text"] for u in window.json()] == ["Hi!"]
+    assert (await client.get(url, params={"start": 5}, headers=headers)).status_code == 400
+
+    other = await _auth_headers(client, "snoop@example.com")
+    assert (await client.get(url, headers=other)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_transcript_text_is_streamed_from_result_object(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "local_storage_dir", str(tmp_path))
+    storage = LocalStorageService()
+    monkeypatch.setattr(storage_service, "_storage_service", storage)
+    headers = await _auth_headers(client, "streamer@example.com")
+    user_id = (await client.get("/auth/me", headers=headers)).json()["id"]
+    text = "Speaker A: " + "long transcript " * 2000
+    async with get_session_factory()() as session:
+        job = TranscriptionJob(
+            user_id=user_id,
+            language="en",
+            mode="mono",
+            source_object_key="uploads/streamer/talk.mp3",
+            status=TranscriptionStatus.COMPLETED,
+        )
+        session.add(job)
+        await session.flush()
+        job.result_object_key = f"results/{user_id}/{job.id}/talk.txt"
+        session.add(Transcript(job_id=job.id, plain_text=text))
+        await session.commit()
+        job_id, result_key = job.id, job.result_object_key
+    await storage.upload_text(result_key, text)
+
+    url = f"/jobs/{job_id}/transcript"
+    encoded = await client.get(url, headers=headers)
+    # The stored gzip object is passed through as-is.
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.text == text
+    plain = await client.get(url, headers={**headers, "Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in plain.headers
+    assert plain.text == text
+
+    partial = await client.get(url, headers={**headers, "Range": "bytes=0-8"})
+    assert partial.status_code == 206
+    assert partial.text == "Speaker A"
+
+    await storage.delete_object(result_key)
+    assert (await client.get(url, headers=headers)).text == text
+
+
+@pytest.mark.asyncio
+async def test_local_upload_is_streamed_with_size_limit(client, tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "local_storage_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "max_upload_bytes", 10)
+    monkeypatch.setattr(storage_service, "_storage_service", LocalStorageService())
+    headers = await _auth_headers(client, "uploader@example.com")
+    user_id = (await client.get("/auth/me", headers=headers)).json()["id"]
+    key = f"uploads/{user_id}/abc_note.txt"
+
+    accepted = await client.put(f"/files/upload/{key}", content=b"0123456789", headers=headers)
+    assert accepted.status_code == 200
+    assert (tmp_path / key).read_bytes() == b"0123456789"
+
+    async def _oversized():
+        for _ in range(3):
+            yield b"0123456789"
+
+    rejected = await client.put(f"/files/upload/{key}", content=_oversized(), headers=headers)
+    assert rejected.status_code == 413
+    # The previous object is untouched and no partial file is left behind.
+    assert (tmp_path / key).read_bytes() == b"0123456789"
+    assert sorted(p.name for p in (tmp_path / key).parent.iterdir()) == ["abc_note.txt"]
+
+
+@pytest.mark.asyncio
+async def test_resumable_local_upload_session(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "local_storage_dir", str(tmp_path))
+    storage = LocalStorageService()
+    monkeypatch.setattr(storage_service, "_storage_service", storage)
+    headers = await _auth_headers(client, "resumer@example.com")
+
+    created = await client.post(
+        "/files/uploads",
+        json={"filename": "long call.mp3", "content_type": "audio/mpeg", "size": 12},
+        headers=headers,
+    )
+    assert created.status_code == 201
+    session = created.json()
+    upload_id, key = session["upload_id"], session["object_key"]
+    part_url = session["parts"][0]["upload_url"]
+    assert part_url.startswith(f"/files/uploads/{upload_id}/parts/1?object_key=")
+
+    # Parts may arrive out of order; the offset only counts the contiguous prefix.
+    second = part_url.replace("/parts/1?", "/parts/2?")
+    assert (await client.put(second, content=b"world!", headers=headers)).status_code == 200
+    status_url = f"/files/uploads/{upload_id}?object_key={key}"
+    assert (await client.get(status_url, headers=headers)).json()["offset"] == 0
+    assert (await client.put(part_url, content=b"hello ", headers=headers)).status_code == 200
+    assert (await client.get(status_url, headers=headers)).json()["offset"] == 12
+
+    completed = await client.post(
+        f"/files/uploads/{upload_id}/complete", json={"object_key": key}, headers=headers
+    )
+    assert completed.status_code == 200
+    assert (tmp_path / key).read_bytes() == b"hello world!"
+    assert (await storage.content_hash(key)).startswith("sha256:")
+    assert (await client.get(status_url, headers=headers)).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_upload_session_limit_uses_stored_part_sizes(client, tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "local_storage_dir", str(tmp_path))
+    monkeypatch.setattr(storage_service, "_storage_service", LocalStorageService())
+    headers = await _auth_headers(client, "oversized@example.com")
+    created = (
+        await client.post(
+            "/files/uploads",
+            json={"filename": "big.mp3", "content_type": "audio/mpeg", "size": 10},
+            headers=headers,
+        )
+    ).json()
+    upload_id, key = created["upload_id"], created["object_key"]
+    part_url = created["parts"][0]["upload_url"]
+
+    monkeypatch.setattr(settings, "max_upload_bytes", 8)
+    for number in (1, 2):
+        url = part_url.replace("/parts/1?", f"/parts/{number}?")
+        assert (await client.put(url, content=b"12345678", headers=headers)).status_code == 200
+
+    # Understating part sizes does not get 16 bytes past an 8 byte limit.
+    declared = [{"part_number": n, "size": 1, "etag": ""} for n in (1, 2)]
+    completed = await client.post(
+        f"/files/uploads/{upload_id}/complete",
+        json={"object_key": key, "parts": declared},
+        headers=headers,
+    )
+    assert completed.status_code == 413
+    assert not (tmp_path / key).exists()
+
+
+@pytest.mark.asyncio
+async def test_local_download_links_are_signed_and_expire(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "local_storage_dir", str(tmp_path))
+    storage = LocalStorageService()
+    monkeypatch.setattr(storage_service, "_storage_service", storage)
+    key = "results/user-1/job_call transcript.txt"
+    await storage.upload_text(key, "hello")
+
+    url = "/files/download/" + storage.create_presigned_get(key).removeprefix("local://download/")
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.text == "hello"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"].startswith("private, max-age=")
+    for refusal in ("identity", "gzip;q=0", "identity;q=1, gzip;q=0", "*;q=0"):
+        plain = await client.get(url, headers={"Accept-Encoding": refusal})
+        assert "content-encoding" not in plain.headers
+        assert plain.content == b"hello"
+    weighted = await client.get(url, headers={"Accept-Encoding": "br, GZIP;q=0.5"})
+    assert weighted.headers["content-encoding"] == "gzip"
+
+    tampered = url.replace("job_call", "job_other")
+    assert (await client.get(tampered)).status_code == 403
+    forged = url.split("&signature=")[0] + "&signature=%C3%A9"
+    assert (await client.get(forged)).status_code == 403
+    expired = "/files/download/" + storage.create_presigned_get(key, expires_in=-1).removeprefix(
+        "local://download/"
+    )
+    assert (await client.get(expired)).status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_local_download_is_handed_to_nginx(client, tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "local_storage_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "x_accel_redirect_prefix", "/_protected/")
+    storage = LocalStorageService()
+    monkeypatch.setattr(storage_service, "_storage_service", storage)
+    key = "results/user-1/job_call transcript.txt"
+    await storage.upload_text(key, "hello")
+
+    url = "/files/download/" + storage.create_presigned_get(key).removeprefix("local://download/")
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.headers["x-accel-redirect"] == (
+        "/_protected/results/user-1/job_call%20transcript.txt"
+    )
+    assert response.content == b""
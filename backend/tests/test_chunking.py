@@ -0,0 +1,76 @@
+from app.services.chunking import Chunk, plan_chunks, shift_transcript, stitch_transcripts
+from app.services.media import speech_bounds
+
+
+def _transcript(utterances: list[tuple[str, int, int, str]]) -> dict:
+    items = [
+        {"speaker": speaker, "start": start, "end": end, "text": text}
+        for speaker, start, end, text in utterances
+    ]
+    return {"status": "completed", "utterances": items, "words": [dict(item) for item in items]}
+
+
+def test_plan_chunks_cuts_at_nearby_silences():
+    silences = [(100.0, 101.0), (590.0, 592.0), (1230.0, 1232.0)]
+
+    chunks = plan_chunks(1500.0, silences, target=600, overlap=15, search_window=60)
+
+    assert [(c.keep_from, c.keep_until) for c in chunks] == [
+        (0.0, 591.0),
+        (591.0, 1231.0),
+        (1231.0, 1500.0),
+    ]
+    assert (chunks[1].start, chunks[1].end) == (576.0, 1246.0)
+    assert plan_chunks(700.0, silences, target=600, overlap=15, search_window=60) == [
+        Chunk(start=0.0, end=700.0, keep_from=0.0, keep_until=700.0)
+    ]
+
+
+def test_stitch_shifts_offsets_dedupes_overlap_and_reconciles_speakers():
+    chunks = [Chunk(0, 20, 0, 10), Chunk(5, 20, 10, 20)]
+    first = _transcript(
+        [
+            ("A", 0, 4000, "Hi there"),
+            ("B", 4500, 9000, "Hello"),
+            ("A", 9500, 12000, "How are you"),
+        ]
+    )
+    # The provider labelled the second chunk's speakers the other way round.
+    second = _transcript(
+        [
+            ("A", 0, 4000, "Hello"),
+            ("B", 4500, 7000, "How are you"),
+            ("A", 8000, 14000, "Fine thanks"),
+        ]
+    )
+
+    stitched = stitch_transcripts(chunks, [first, second])
+
+    assert [(u["speaker"], u["start"], u["end"], u["text"]) for u in stitched["utterances"]] == [
+        ("A", 0, 4000, "Hi there"),
+        ("B", 4500, 9000, "Hello"),
+        ("A", 9500, 12000, "How are you"),
+        ("B", 13000, 19000, "Fine thanks"),
+    ]
+    assert stitched["text"] == "Hi there Hello How are you Fine thanks"
+
+
+def test_stitch_reports_failed_chunk():
+    chunks = [Chunk(0, 20, 0, 10), Chunk(5, 20, 10, 20)]
+    failed = {"status": "error", "error": "Audio too short"}
+
+    assert stitch_transcripts(chunks, [_transcript([]), failed]) == {
+        "status": "error",
+        "error": "Audio too short",
+    }
+
+
+def test_trimmed_lead_in_is_added_back_to_timestamps():
+    silences = [(0.0, 2.5), (30.0, 31.0), (58.0, 60.0)]
+    start, end = speech_bounds(60.0, silences)
+    assert (start, end) == (2.5, 58.0)
+
+    shifted = shift_transcript(_transcript([("A", 0, 1000, "Hello")]), start)
+
+    assert shifted["utterances"][0]["start"] == 2500
+    assert shifted["words"][0]["end"] == 3500
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.models import TranscriptionJob, TranscriptionStatus
+from app.services.admission import AdmissionController, QueueFullError
+from app.tasks.queue import JobQueue
+
+
+async def _create_job(**overrides) -> str:
+    values = {
+        "user_id": str(uuid4()),
+        "language": "en",
+        "mode": "mono",
+        "source_object_key": "uploads/queue-test/sample.txt",
+        "status": TranscriptionStatus.PENDING,
+    }
+    values.update(overrides)
+    async with get_session_factory()() as session:
+        job = TranscriptionJob(**values)
+        session.add(job)
+        await session.commit()
+        return job.id
+
+
+async def _claim(queue: JobQueue) -> str | None:
+    """Lease the oldest head-of-line job, as the dispatcher does without a scheduler."""
+    for job in await queue.candidates():
+        if await queue.claim_job(job.id):
+            return job.id
+    return None
+
+
+async def _drain(queue: JobQueue) -> list[str]:
+    claimed = []
+    while (job_id := await _claim(queue)) is not None:
+        claimed.append(job_id)
+    return claimed
+
+
+@pytest.mark.asyncio
+async def test_claim_leases_each_job_once():
+    first = JobQueue(worker_id="worker-a")
+    second = JobQueue(worker_id="worker-b")
+    await _drain(first)
+
+    job_ids = {await _create_job() for _ in range(3)}
+    claimed_a = await _claim(first)
+    assert not await second.claim_job(claimed_a)
+    claimed_b = await _drain(second)
+
+    assert {claimed_a, *claimed_b} == job_ids
+    assert claimed_a not in claimed_b
+
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, claimed_a)
+        assert job.status == TranscriptionStatus.PROCESSING
+        assert job.lease_owner == "worker-a"
+        assert job.attempts == 1
+
+    assert await first.renew(claimed_a)
+    assert not await second.renew(claimed_a)
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_only_stale_jobs():
+    queue = JobQueue(worker_id="worker-c")
+    await _drain(queue)
+
+    stale = datetime.now(timezone.utc) - timedelta(hours=1)
+    stale_id = await _create_job(
+        status=TranscriptionStatus.PROCESSING,
+        lease_owner="crashed-worker",
+        heartbeat_at=stale,
+        attempts=1,
+    )
+    exhausted_id = await _create_job(
+        status=TranscriptionStatus.PROCESSING,
+        lease_owner="crashed-worker",
+        heartbeat_at=stale,
+        attempts=queue.settings.max_job_attempts,
+    )
+    live_id = await _create_job(
+        status=TranscriptionStatus.PROCESSING,
+        lease_owner="live-worker",
+        heartbeat_at=datetime.now(timezone.utc),
+    )
+
+    # Processing jobs are never claimed directly, even when their owner is gone.
+    assert await _claim(queue) is None
+    assert await queue.reap_stale() == (1, 1)
+    assert await _claim(queue) == stale_id
+
+    async with get_session_factory()() as session:
+        exhausted = await session.get(TranscriptionJob, exhausted_id)
+        live = await session.get(TranscriptionJob, live_id)
+        assert exhausted.status == TranscriptionStatus.FAILED
+        assert live.lease_owner == "live-worker"
+
+
+@pytest.mark.asyncio
+async def test_release_requeues_unfinished_job():
+    queue = JobQueue(worker_id="worker-d")
+    await _drain(queue)
+
+    job_id = await _create_job()
+    assert await _claim(queue) == job_id
+    await queue.release(job_id)
+
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        assert job.status == TranscriptionStatus.PENDING
+        assert job.lease_owner is None
+        # A released claim is given back; only crashes count toward MAX_JOB_ATTEMPTS.
+        assert job.attempts == 0
+
+
+@pytest.mark.asyncio
+async def test_reaper_pages_through_large_backlog():
+    queue = JobQueue(worker_id="worker-e")
+    await _drain(queue)
+    queue.settings.recovery_batch_size = 2
+    try:
+        stale = datetime.now(timezone.utc) - timedelta(hours=1)
+        job_ids = {
+            await _create_job(status=TranscriptionStatus.PROCESSING, heartbeat_at=stale)
+            for _ in range(5)
+        }
+        assert await queue.reap_stale() == (5, 0)
+        assert set(await _drain(queue)) == job_ids
+    finally:
+        queue.settings.recovery_batch_size = 500
+
+
+@pytest.mark.asyncio
+async def test_candidates_reuse_cached_heads():
+    queue = JobQueue(worker_id="worker-h")
+    await _drain(queue)
+
+    user_id = str(uuid4())
+    first = await _create_job(user_id=user_id)
+    second = await _create_job(user_id=user_id)
+    assert [job.id for job in await queue.candidates()] == [first]
+
+    # Until invalidated, only the user whose head was claimed is looked up again.
+    newcomer = await _create_job()
+    assert await queue.claim_job(first)
+    assert [job.id for job in await queue.candidates()] == [second]
+
+    queue.invalidate()
+    assert [job.id for job in await queue.candidates()] == [second, newcomer]
+    await _drain(queue)
+
+
+@pytest.mark.asyncio
+async def test_estimated_wait_assumes_configured_workers(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "max_estimated_wait_seconds", 3600)
+    monkeypatch.setattr(settings, "max_parallel_transcriptions", 3)
+    admission = AdmissionController()
+    # Recent jobs took a minute each.
+    admission._duration_cache = (float("inf"), 60.0)
+
+    async with get_session_factory()() as session:
+        # 10,000 jobs on the few workers holding leases would wait for hours.
+        monkeypatch.setattr(settings, "admission_worker_count", 1)
+        with pytest.raises(QueueFullError) as rejected:
+            await admission.check(session, str(uuid4()), new_jobs=10_000)
+        assert not rejected.value.per_user
+        assert rejected.value.retry_after > 1
+
+        # Idle workers hold no lease but will drain the queue all the same.
+        monkeypatch.setattr(settings, "admission_worker_count", 1000)
+        await admission.check(session, str(uuid4()), new_jobs=10_000)
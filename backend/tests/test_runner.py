@@ -0,0 +1,229 @@
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import JobPriority
+from app.tasks.queue import QueuedJob
+from app.tasks.runner import FairScheduler, TranscriptionRunner
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _queue(user_id: str, count: int, offset: int = 0, priority: int = JobPriority.NORMAL):
+    return deque(
+        QueuedJob(
+            id=f"{user_id}-{i}",
+            user_id=user_id,
+            priority=priority,
+            created_at=T0 + timedelta(seconds=offset + i),
+        )
+        for i in range(count)
+    )
+
+
+def _dispatch_order(scheduler: FairScheduler, queues: dict[str, deque]) -> list[QueuedJob]:
+    order = []
+    while any(queues.values()):
+        heads = [queue[0] for queue in queues.values() if queue]
+        job = scheduler.pick(heads)
+        scheduler.charge(job)
+        queues[job.user_id].popleft()
+        order.append(job)
+    return order
+
+
+def test_bulk_user_does_not_starve_small_users():
+    queues = {"bulk": _queue("bulk", 300)}
+    for n in range(5):
+        # Small users submit after the bulk upload has been queued.
+        queues[f"small-{n}"] = _queue(f"small-{n}", 2, offset=400)
+
+    order = _dispatch_order(FairScheduler(), queues)
+    positions = [i for i, job in enumerate(order) if job.user_id != "bulk"]
+
+    # Round-robin across six active users: all ten small jobs start within two rounds.
+    assert max(positions) < 12
+
+
+def test_priority_weights_and_user_cap():
+    queues = {
+        "high": _queue("high", 20, priority=JobPriority.HIGH),
+        "low": _queue("low", 20, priority=JobPriority.LOW),
+    }
+    first = _dispatch_order(FairScheduler(), queues)[:10]
+    assert sum(job.user_id == "high" for job in first) >= 7
+
+    capped = FairScheduler(per_user_limit=2)
+    busy = QueuedJob("busy-1", "busy", JobPriority.NORMAL, T0, user_running=2)
+    idle = QueuedJob("idle-1", "idle", JobPriority.NORMAL, T0 + timedelta(hours=1))
+    assert capped.pick([busy, idle]) is idle
+    assert capped.pick([busy]) is None
+
+
+def test_queue_wait_stats():
+    runner = TranscriptionRunner()
+    assert runner.queue_wait_stats() == {"count": 0}
+
+    now = datetime.now(timezone.utc)
+    for seconds in range(1, 21):
+        runner._record_wait(QueuedJob(f"j{seconds}", "u1", 1, now - timedelta(seconds=seconds)))
+    runner._record_wait(QueuedJob("other", "u2", 1, now))
+
+    stats = runner.queue_wait_stats("u1")
+    assert stats["count"] == 20
+    assert 18 <= stats["p95"] <= 20
+    assert runner.queue_wait_stats()["count"] == 21
+
+
+class FakeQueue:
+    def __init__(self, job_ids: list[str]) -> None:
+        self.pending = [QueuedJob(job_id, "user", JobPriority.NORMAL, T0) for job_id in job_ids]
+        self.released: list[str] = []
+
+    async def candidates(self, limit: int = 100) -> list[QueuedJob]:
+        return self.pending[:1]
+
+    def invalidate(self) -> None:
+        pass
+
+    async def claim_job(self, job_id: str) -> bool:
+        self.pending = [job for job in self.pending if job.id != job_id]
+        return True
+
+    async def renew(self, job_id: str) -> bool:
+        return True
+
+    async def release(self, job_id: str) -> None:
+        self.released.append(job_id)
+
+    async def reap_stale(self) -> tuple[int, int]:
+        return 0, 0
+
+    async def requeue_unanswered(self) -> int:
+        return 0
+
+    async def pending_count(self) -> int:
+        return len(self.pending)
+
+
+async def _start_runner(job_seconds: float, finished: list[str]) -> tuple[TranscriptionRunner, FakeQueue]:
+    queue = FakeQueue(["job-1"])
+    runner = TranscriptionRunner(queue=queue)
+
+    async def handler(job_id: str) -> None:
+        await asyncio.sleep(job_seconds)
+        finished.append(job_id)
+
+    runner.set_job_handler(handler)
+    await runner.start()
+    while queue.pending:
+        await asyncio.sleep(0.01)
+    return runner, queue
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_in_flight_jobs():
+    finished: list[str] = []
+    runner, queue = await _start_runner(0.05, finished)
+
+    await runner.stop(grace_period=5)
+
+    assert finished == ["job-1"]
+    assert queue.released == ["job-1"]
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_jobs_after_grace_period():
+    finished: list[str] = []
+    runner, queue = await _start_runner(30, finished)
+
+    await runner.stop(grace_period=0.05)
+
+    assert finished == []
+    # The lease is handed back so another worker can resume the job.
+    assert queue.released == ["job-1"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_on_last_attempt_is_requeued(monkeypatch):
+    from uuid import uuid4
+
+    from app.core.config import get_settings
+    from app.db.session import get_session_factory
+    from app.models import TranscriptionJob, TranscriptionStatus
+    from app.tasks.queue import JobQueue
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "dispatch_startup_jitter", 0)
+    queue = JobQueue(worker_id="worker-drain")
+    while await queue.candidates():
+        for job in await queue.candidates():
+            await queue.claim_job(job.id)
+
+    async with get_session_factory()() as session:
+        job = TranscriptionJob(
+            user_id=str(uuid4()),
+            language="en",
+            mode="mono",
+            source_object_key="uploads/runner-test/sample.txt",
+            status=TranscriptionStatus.PENDING,
+            attempts=settings.max_job_attempts - 1,
+        )
+        session.add(job)
+        await session.commit()
+        job_id = job.id
+
+    started = asyncio.Event()
+
+    async def handler(claimed_id: str) -> None:
+        started.set()
+        await asyncio.sleep(30)
+
+    runner = TranscriptionRunner(queue=queue)
+    runner.set_job_handler(handler)
+    await runner.start()
+    await asyncio.wait_for(started.wait(), 5)
+    await runner.stop(grace_period=0.05)
+
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        # Interrupted by a deploy, not crashed: the job is resumed, not abandoned.
+        assert job.status == TranscriptionStatus.PENDING
+        assert job.attempts == settings.max_job_attempts - 1
+        assert job.lease_owner is None
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_storage_sweeper(monkeypatch):
+    from app import worker
+    from app.core.config import get_settings
+    from app.services import storage as storage_service
+
+    events: list[str] = []
+
+    class RecordingSweeper:
+        async def start(self) -> None:
+            events.append("start")
+
+        async def aclose(self) -> None:
+            events.append("aclose")
+
+    class RecordingStorage:
+        async def aclose(self) -> None:
+            events.append("storage closed")
+
+    monkeypatch.setattr(get_settings(), "gc_enabled", True)
+    monkeypatch.setattr(storage_service, "_storage_service", RecordingStorage())
+    monkeypatch.setattr(worker, "StorageSweeper", RecordingSweeper)
+    monkeypatch.setattr(worker, "TranscriptionRunner", lambda: TranscriptionRunner(FakeQueue([])))
+
+    stop = asyncio.Event()
+    task = asyncio.create_task(worker.run_worker(stop))
+    while not events:
+        await asyncio.sleep(0.01)
+    stop.set()
+    await task
+
+    assert events == ["start", "aclose", "storage closed"]
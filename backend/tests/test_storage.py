@@ -0,0 +1,150 @@
+import os
+import time
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.models import TranscriptionJob
+from app.services.storage import LocalStorageService
+from app.tasks.storage_gc import StorageSweeper
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "local_storage_dir", str(tmp_path))
+    return LocalStorageService()
+
+
+@pytest.mark.asyncio
+async def test_local_file_reads_in_place_or_through_a_private_link(local_storage):
+    key = "uploads/user/abc_call.mp3"
+    await local_storage.save_upload(key, b"audio-bytes")
+    stored = local_storage.open_for_download(key)
+
+    async with local_storage.local_file(key) as path:
+        assert path == stored
+
+    async with local_storage.local_file(key, isolate=True) as path:
+        assert path != stored
+        assert path.stat().st_ino == stored.stat().st_ino
+        await local_storage.delete_object(key)
+        assert path.read_bytes() == b"audio-bytes"
+    assert not path.exists()
+
+    with pytest.raises(FileNotFoundError):
+        async with local_storage.local_file(key):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_local_listing_is_paged(local_storage, monkeypatch):
+    from app.services import storage as storage_service
+
+    monkeypatch.setattr(storage_service, "S3_BATCH_SIZE", 2)
+    keys = {f"uploads/user-{n}/a_{n}.mp3" for n in range(5)}
+    for key in keys:
+        await local_storage.save_upload(key, b"x")
+
+    pages = [page async for page in local_storage.iter_objects("uploads/")]
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert {obj.key for page in pages for obj in page} == keys
+
+
+@pytest.mark.asyncio
+async def test_async_s3_downloads_large_objects_in_signed_ranges(tmp_path, monkeypatch):
+    from app.services.s3_async import AsyncS3StorageService
+
+    settings = get_settings()
+    monkeypatch.setattr(settings, "s3_range_threshold", 10)
+    monkeypatch.setattr(settings, "s3_range_part_size", 4)
+    body = bytes(range(26))
+    ranges: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.raw_path == f"/{settings.s3_bucket_uploads}/uploads/u/a%20b.mp3".encode()
+        assert request.headers["authorization"].startswith("AWS4-HMAC-SHA256")
+        if request.method == "HEAD":
+            return httpx.Response(200, headers={"content-length": str(len(body))})
+        start, end = map(int, request.headers["range"].removeprefix("bytes=").split("-"))
+        ranges.append(request.headers["range"])
+        return httpx.Response(206, content=body[start : end + 1])
+
+    storage = AsyncS3StorageService(transport=httpx.MockTransport(handler))
+    destination = tmp_path / "media"
+    try:
+        await storage.download_to_path("uploads/u/a b.mp3", destination)
+    finally:
+        await storage.aclose()
+
+    assert destination.read_bytes() == body
+    assert len(ranges) == 7
+
+
+@pytest.mark.asyncio
+async def test_async_s3_streams_objects_in_their_stored_encoding():
+    import gzip
+
+    from app.services.s3_async import AsyncS3StorageService
+
+    stored = gzip.compress(b"hello transcript")
+
+    class Body(httpx.AsyncByteStream):
+        # A byte-string body would be pre-read by httpx and could not be streamed raw.
+        async def __aiter__(self):
+            yield stored
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/missing.txt"):
+            return httpx.Response(404)
+        return httpx.Response(200, stream=Body(), headers={"content-encoding": "gzip"})
+
+    storage = AsyncS3StorageService(transport=httpx.MockTransport(handler))
+    try:
+        stream = await storage.open_stream("results/u/j/talk.txt")
+        assert stream.content_encoding == "gzip"
+        assert b"".join([chunk async for chunk in stream.chunks]) == stored
+        with pytest.raises(FileNotFoundError):
+            await storage.open_stream("results/u/j/missing.txt")
+    finally:
+        await storage.aclose()
+
+
+@pytest.mark.asyncio
+async def test_storage_sweeper_removes_only_unreferenced_stale_objects(local_storage):
+    user_id = str(uuid4())
+    old = time.time() - 2 * 86400
+    stale_upload = f"uploads/{user_id}/stale_call.mp3"
+    queued_upload = f"uploads/{user_id}/queued_call.mp3"
+    fresh_upload = f"uploads/{user_id}/fresh_call.mp3"
+    orphan_result = f"results/{user_id}/{uuid4()}/call.txt"
+    for key in (stale_upload, queued_upload, fresh_upload):
+        await local_storage.save_upload(key, b"audio")
+    await local_storage.upload_text(orphan_result, "transcript")
+    for key in (stale_upload, queued_upload, orphan_result + ".gz"):
+        os.utime(local_storage.base_path / key, (old, old))
+    async with get_session_factory()() as session:
+        session.add(
+            TranscriptionJob(
+                user_id=user_id, language="en", mode="mono", source_object_key=queued_upload
+            )
+        )
+        await session.commit()
+
+    sweeper = StorageSweeper(storage=local_storage)
+    dry = await sweeper.sweep(dry_run=True)
+    assert (dry.scanned, dry.deleted) == (4, 2)
+    assert (local_storage.base_path / stale_upload).exists()
+
+    stats = await sweeper.sweep(dry_run=False)
+    assert stats.deleted == 2
+    assert stats.internal_removed == 0  # sidecars went with their objects
+    remaining = {
+        obj.key for page in [p async for p in local_storage.iter_objects("")] for obj in page
+    }
+    assert stale_upload not in remaining
+    assert orphan_result + ".gz" not in remaining
+    assert {queued_upload, fresh_upload} <= remaining
@@ -0,0 +1,286 @@
+import asyncio
+import json
+from uuid import uuid4
+
+import httpx
+import pytest
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.db.session import get_session_factory
+from app.models import Transcript, TranscriptionJob, TranscriptionStatus
+from app.services.assemblyai import AssemblyAIClient
+from app.services.storage import LocalStorageService
+from app.services.transcript_cache import CacheKey, TranscriptCache
+from app.services.transcription import TranscriptionService
+from app.tasks.poller import ProviderPoller
+from app.tasks.runner import TranscriptionRunner
+
+UTTERANCES = [
+    {"speaker": "A", "start": 0, "end": 1200, "text": "Hello there."},
+    {"speaker": "B", "start": 1300, "end": 2500, "text": "Hi!"},
+]
+
+
+class FakeAssemblyAI:
+    """In-process stand-in for the AssemblyAI REST API."""
+
+    def __init__(self, polls_before_done: int = 1) -> None:
+        self.polls_before_done = polls_before_done
+        self.requests: list[tuple[str, str]] = []
+        self.transcripts: dict[str, dict] = {}
+        # Status codes answered (once each) to the next transcript fetches.
+        self.fetch_errors: list[int] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append((request.method, request.url.path))
+        if request.url.path == "/v2/upload":
+            return httpx.Response(200, json={"upload_url": "https://cdn.example/upload/1"})
+        if request.url.path == "/v2/transcript" and request.method == "POST":
+            transcript_id = f"tr-{len(self.transcripts) + 1}"
+            self.transcripts[transcript_id] = {
+                "request": json.loads(request.content),
+                "polls": 0,
+            }
+            return httpx.Response(200, json={"id": transcript_id, "status": "queued"})
+        if request.url.path == "/v2/transcript":
+            items = [
+                {"id": transcript_id, "status": self._observe(transcript_id)}
+                for transcript_id in reversed(self.transcripts)
+            ]
+            return httpx.Response(200, json={"transcripts": items})
+
+        transcript_id = request.url.path.rsplit("/", 1)[-1]
+        if self.fetch_errors:
+            return httpx.Response(self.fetch_errors.pop(0), json={"error": "Unavailable"})
+        status = self._observe(transcript_id)
+        if status != "completed":
+            return httpx.Response(200, json={"id": transcript_id, "status": status})
+        return httpx.Response(
+            200,
+            json={
+                "id": transcript_id,
+                "status": "completed",
+                "text": "Hello there. Hi!",
+                "utterances": UTTERANCES,
+            },
+        )
+
+    def _observe(self, transcript_id: str) -> str:
+        state = self.transcripts[transcript_id]
+        state["polls"] += 1
+        return "completed" if state["polls"] > self.polls_before_done else "processing"
+
+    def client(self) -> AssemblyAIClient:
+        return AssemblyAIClient(transport=httpx.MockTransport(self.handler))
+
+
+@pytest.fixture
+def assemblyai_service(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "local_storage_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "transcription_backend", "assemblyai")
+    monkeypatch.setattr(settings, "assemblyai_poll_interval", 0)
+
+    provider = FakeAssemblyAI()
+    service = TranscriptionService(TranscriptionRunner(), storage=LocalStorageService())
+    service._provider = provider.client()
+    return service, provider
+
+
+async def _create_job(storage, mode: str = "dialogue", media: bytes | None = None) -> str:
+    user_id = str(uuid4())
+    key = f"uploads/{user_id}/{uuid4()}_call.mp3"
+    # Unique media by default so earlier tests' cached transcripts never match.
+    await storage.save_upload(key, media or f"fake-audio-{uuid4()}".encode())
+    async with get_session_factory()() as session:
+        job = TranscriptionJob(
+            user_id=user_id, language="en", mode=mode, source_object_key=key
+        )
+        session.add(job)
+        await session.commit()
+        return job.id
+
+
+@pytest.mark.asyncio
+async def test_assemblyai_job_runs_on_async_client(assemblyai_service):
+    service, provider = assemblyai_service
+    job_id = await _create_job(service.storage)
+
+    await service._process_job(job_id)
+    await service.aclose()
+
+    assert provider.requests[:2] == [("POST", "/v2/upload"), ("POST", "/v2/transcript")]
+    submitted = provider.transcripts["tr-1"]["request"]
+    assert submitted["speaker_labels"] is True
+    assert submitted["speakers_expected"] == 2
+
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        transcript = await session.get(Transcript, job_id)
+        assert job.status == TranscriptionStatus.COMPLETED
+        assert job.provider_job_id == "tr-1"
+        assert transcript.plain_text == "Speaker A: Hello there.\nSpeaker B: Hi!"
+        assert json.loads(transcript.diarized_json) == UTTERANCES
+        stored = (
+            await session.execute(
+                text("SELECT plain_text FROM transcript WHERE job_id = :id"), {"id": job_id}
+            )
+        ).scalar_one()
+        assert stored.startswith(b"\x1f\x8b")  # gzip
+    assert service.storage.open_for_download(job.result_object_key).name.endswith(".txt.gz")
+
+
+@pytest.mark.asyncio
+async def test_transient_poll_error_does_not_fail_job(assemblyai_service):
+    service, provider = assemblyai_service
+    provider.fetch_errors = [503]
+    job_id = await _create_job(service.storage)
+
+    await service._process_job(job_id)
+    await service.aclose()
+
+    assert provider.fetch_errors == []
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        assert job.status == TranscriptionStatus.COMPLETED
+
+
+@pytest.mark.asyncio
+async def test_chunked_job_resumes_submitted_chunks(assemblyai_service):
+    service, provider = assemblyai_service
+    client = provider.client()
+    chunk_ids = [(await client.submit("https://cdn.example/chunk", {}))["id"] for _ in range(2)]
+    await client.aclose()
+    provider.requests.clear()
+
+    job_id = await _create_job(service.storage)
+    chunks = [
+        {"start": 0.0, "end": 3.5, "keep_from": 0.0, "keep_until": 3.0},
+        {"start": 2.5, "end": 6.0, "keep_from": 3.0, "keep_until": 6.0},
+    ]
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        # What an interrupted run leaves behind after submitting both chunks.
+        job.provider_chunks = json.dumps(
+            [{**chunk, "id": chunk_id} for chunk, chunk_id in zip(chunks, chunk_ids)]
+        )
+        await session.commit()
+
+    await service._process_job(job_id)
+    await service.aclose()
+
+    # Nothing is uploaded or submitted again; the existing chunk transcripts are polled.
+    assert {method for method, _ in provider.requests} == {"GET"}
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        transcript = await session.get(Transcript, job_id)
+        assert job.status == TranscriptionStatus.COMPLETED
+        assert [u["start"] for u in json.loads(transcript.diarized_json)] == [0, 1300, 2500, 3800]
+
+
+@pytest.mark.asyncio
+async def test_poller_batches_status_checks(monkeypatch):
+    monkeypatch.setattr(get_settings(), "assemblyai_poll_interval", 0)
+    provider = FakeAssemblyAI(polls_before_done=3)
+    client = provider.client()
+    transcript_ids = [(await client.submit("https://cdn.example/a", {}))["id"] for _ in range(5)]
+    provider.requests.clear()
+
+    poller = ProviderPoller(lambda: client)
+    results = await asyncio.gather(*(poller.wait(tid) for tid in transcript_ids))
+    await poller.aclose()
+    await client.aclose()
+
+    assert [result["status"] for result in results] == ["completed"] * 5
+    assert poller.tracked == 0
+    # Listings answer "still processing" for every job at once; each transcript is then
+    # fetched individually only when it has settled.
+    fetches = [path for method, path in provider.requests if path != "/v2/transcript"]
+    assert sorted(fetches) == sorted(f"/v2/transcript/{tid}" for tid in transcript_ids)
+    assert poller.requests < 5 * 3
+
+
+@pytest.mark.asyncio
+async def test_webhook_completes_submitted_job(
+    assemblyai_service, client, app_instance, monkeypatch
+):
+    service, provider = assemblyai_service
+    settings = get_settings()
+    monkeypatch.setattr(
+        settings, "assemblyai_webhook_url", "https://api.example/jobs/webhooks/assemblyai"
+    )
+    monkeypatch.setattr(settings, "assemblyai_webhook_secret", "hook-secret")
+    monkeypatch.setattr(app_instance.state, "transcription_service", service)
+    provider.polls_before_done = 0  # AssemblyAI only calls back once the transcript settled
+    job_id = await _create_job(service.storage)
+
+    await service._process_job(job_id)
+
+    submitted = provider.transcripts["tr-1"]["request"]
+    assert submitted["webhook_url"] == settings.assemblyai_webhook_url
+    assert submitted["webhook_auth_header_value"] == "hook-secret"
+    assert ("GET", "/v2/transcript/tr-1") not in provider.requests
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        assert job.status == TranscriptionStatus.SUBMITTED
+
+    body = {"transcript_id": "tr-1", "status": "completed"}
+    rejected = await client.post(
+        "/jobs/webhooks/assemblyai", json=body, headers={"X-Webhook-Secret": "wrong"}
+    )
+    assert rejected.status_code == 401
+
+    for _ in range(2):  # deliveries may repeat
+        response = await client.post(
+            "/jobs/webhooks/assemblyai", json=body, headers={"X-Webhook-Secret": "hook-secret"}
+        )
+        assert response.status_code == 204
+    await service.aclose()
+
+    async with get_session_factory()() as session:
+        job = await session.get(TranscriptionJob, job_id)
+        transcript = await session.get(Transcript, job_id)
+        assert job.status == TranscriptionStatus.COMPLETED
+        assert transcript.plain_text == "Speaker A: Hello there.\nSpeaker B: Hi!"
+    assert provider.requests.count(("GET", "/v2/transcript/tr-1")) == 1
+
+
+@pytest.mark.asyncio
+async def test_identical_media_is_transcribed_once(assemblyai_service):
+    service, provider = assemblyai_service
+    media = f"same-recording-{uuid4()}".encode()
+    first, second = [await _create_job(service.storage, media=media) for _ in range(2)]
+
+    await asyncio.gather(service._process_job(first), service._process_job(second))
+    assert provider.requests.count(("POST", "/v2/transcript")) == 1
+
+    provider.requests.clear()
+    third = await _create_job(service.storage, media=media)
+    await service._process_job(third)
+    await service.aclose()
+    assert provider.requests == []
+
+    async with get_session_factory()() as session:
+        for job_id in (first, second, third):
+            job = await session.get(TranscriptionJob, job_id)
+            transcript = await session.get(Transcript, job_id)
+            assert job.status == TranscriptionStatus.COMPLETED
+            assert job.content_hash.startswith("sha256:")
+            assert transcript.plain_text == "Speaker A: Hello there.\nSpeaker B: Hi!"
+
+
+@pytest.mark.asyncio
+async def test_transcript_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(get_settings(), "transcript_cache_max_bytes", 10)
+    cache = TranscriptCache()
+    keys = [CacheKey(f"sha256:{uuid4()}", "en", "mono", "stub") for _ in range(3)]
+    for key in keys:
+        await cache.put(key, "12345", None)
+    assert await cache.get(keys[0]) is not None  # refreshes its last use
+
+    await cache.evict()
+
+    assert await cache.get(keys[1]) is None
+    assert await cache.get(keys[0]) == ("12345", None)
+    assert await cache.get(keys[2]) == ("12345", None)
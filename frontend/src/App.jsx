@@ -96,6 +96,7 @@ function App() {
   const fileInputRef = useRef(null);
 
   const [history, setHistory] = useState([]);
+  const [historyCursor, setHistoryCursor] = useState(null);
   const [isLoadingHistory, setLoadingHistory] = useState(false);
   const [selectedHistoryJob, setSelectedHistoryJob] = useState(null);
   const [historyPreviewText, setHistoryPreviewText] = useState('');
@@ -285,18 +286,24 @@ function App() {
     [fetchTranscriptText]
   );
 
-  const fetchHistory = useCallback(async () => {
-    setLoadingHistory(true);
-    try {
-      const response = await apiFetch('/jobs/', { method: 'GET' });
-      const jobs = await response.json();
-      setHistory(jobs);
-    } catch (error) {
-      console.error('Failed to fetch history:', error);
-    } finally {
-      setLoadingHistory(false);
-    }
-  }, [apiFetch]);
+  // The job list is paged; X-Next-Cursor is set while older jobs remain.
+  const fetchHistory = useCallback(
+    async (cursor = null) => {
+      setLoadingHistory(true);
+      try {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+        const response = await apiFetch(`/jobs/${query}`, { method: 'GET' });
+        const jobs = await response.json();
+        setHistory((previous) => (cursor ? [...previous, ...jobs] : jobs));
+        setHistoryCursor(response.headers.get('X-Next-Cursor'));
+      } catch (error) {
+        console.error('Failed to fetch history:', error);
+      } finally {
+        setLoadingHistory(false);
+      }
+    },
+    [apiFetch]
+  );
 
   // Load history when authenticated
   useEffect(() => {
@@ -304,6 +311,7 @@ function App() {
       fetchHistory();
     } else {
       setHistory([]);
+      setHistoryCursor(null);
       setSelectedHistoryJob(null);
       setHistoryPreviewText('');
     }
@@ -454,6 +462,7 @@ function App() {
     setJobStatus(null);
     setStatusMessage('');
     setHistory([]);
+    setHistoryCursor(null);
     setSelectedHistoryJob(null);
     setHistoryPreviewText('');
   };
@@ -681,8 +690,10 @@ function App() {
                 <div>
                   <strong>Status:</strong>
                   <span className={`job-status-badge job-status-badge--${jobStatus.status}`}>
+                    {jobStatus.status === 'awaiting_upload' && '⏱️'}
                     {jobStatus.status === 'pending' && '⏱️'}
                     {jobStatus.status === 'processing' && '⚙️'}
+                    {jobStatus.status === 'submitted' && '⚙️'}
                     {jobStatus.status === 'completed' && '✅'}
                     {jobStatus.status === 'failed' && '❌'}
                     {' '}
@@ -713,7 +724,7 @@ function App() {
             <button
               type="button"
               className="history-refresh"
-              onClick={fetchHistory}
+              onClick={() => fetchHistory()}
               disabled={isLoadingHistory}
               title="Refresh history"
             >
@@ -738,8 +749,10 @@ function App() {
                     onClick={() => handleHistoryJobClick(job)}
                   >
                     <span className="history-item__status">
+                      {job.status === 'awaiting_upload' && '⏱️'}
                       {job.status === 'pending' && '⏱️'}
                       {job.status === 'processing' && '⚙️'}
+                      {job.status === 'submitted' && '⚙️'}
                       {job.status === 'completed' && '✅'}
                       {job.status === 'failed' && '❌'}
                     </span>
@@ -788,6 +801,17 @@ function App() {
               ))}
             </ul>
           )}
+
+          {historyCursor && (
+            <button
+              type="button"
+              className="history-more"
+              onClick={() => fetchHistory(historyCursor)}
+              disabled={isLoadingHistory}
+            >
+              {isLoadingHistory ? 'Loading...' : 'Load older jobs'}
+            </button>
+          )}
         </section>
       )}
 